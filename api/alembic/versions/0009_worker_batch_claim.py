@@ -0,0 +1,35 @@
+"""Worker: partial index for batch claiming queued outbound messages
+
+Revision ID: 0009_worker_batch_claim
+Revises: 0008_phase5b_outcomes_align
+Create Date: 2026-10-17
+
+The worker claims work with a single
+`UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING ...`.
+A partial index over queued rows keeps the FIFO scan cheap even when the table
+is dominated by sent/failed history.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009_worker_batch_claim"
+down_revision = "0008_phase5b_outcomes_align"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_outbound_messages_queued_created",
+        "outbound_messages",
+        ["created_at"],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbound_messages_queued_created", table_name="outbound_messages")
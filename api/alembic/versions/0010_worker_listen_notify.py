@@ -0,0 +1,34 @@
+"""Worker: index for the next scheduled outbound message
+
+Revision ID: 0010_worker_listen_notify
+Revises: 0009_worker_batch_claim
+Create Date: 2026-10-17
+
+With LISTEN/NOTIFY the worker no longer polls on a fixed interval; when idle
+it only asks for the earliest future `not_before_at` to size its wait. A
+partial index keeps that lookup cheap.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010_worker_listen_notify"
+down_revision = "0009_worker_batch_claim"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_outbound_messages_queued_not_before",
+        "outbound_messages",
+        ["not_before_at"],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbound_messages_queued_not_before", table_name="outbound_messages")
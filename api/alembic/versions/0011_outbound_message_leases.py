@@ -0,0 +1,42 @@
+"""Worker: claim leases on outbound messages
+
+Revision ID: 0011_outbound_message_leases
+Revises: 0010_worker_listen_notify
+Create Date: 2026-10-17
+
+A claimed message records which worker holds it and until when. Workers
+extend the lease while a send is in flight; a reaper returns rows whose lease
+expired (crashed worker, killed container) to the queue.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011_outbound_message_leases"
+down_revision = "0010_worker_listen_notify"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("outbound_messages") as batch:
+        batch.add_column(sa.Column("claimed_by", sa.String(length=120), nullable=True))
+        batch.add_column(sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True))
+
+    op.create_index(
+        "ix_outbound_messages_sending_lease",
+        "outbound_messages",
+        ["lease_expires_at"],
+        postgresql_where=sa.text("status = 'sending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbound_messages_sending_lease", table_name="outbound_messages")
+
+    with op.batch_alter_table("outbound_messages") as batch:
+        batch.drop_column("lease_expires_at")
+        batch.drop_column("claimed_by")
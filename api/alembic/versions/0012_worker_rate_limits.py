@@ -0,0 +1,36 @@
+"""Worker: shared send rate-limit buckets
+
+Revision ID: 0012_worker_rate_limits
+Revises: 0011_outbound_message_leases
+Create Date: 2026-10-17
+
+One row per token bucket (a channel, or a channel + sender). Every worker
+process takes tokens from the same row with a single atomic UPDATE, so the
+configured provider rate holds across replicas.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012_worker_rate_limits"
+down_revision = "0011_outbound_message_leases"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rate_limit_buckets",
+        sa.Column("key", sa.String(length=200), primary_key=True, nullable=False),
+        sa.Column("tokens", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("refilled_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=True),
+        sa.Column("day_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("rate_limit_buckets")
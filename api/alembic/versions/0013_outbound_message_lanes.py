@@ -0,0 +1,42 @@
+"""Worker: priority lanes for outbound messages
+
+Revision ID: 0013_outbound_message_lanes
+Revises: 0012_worker_rate_limits
+Create Date: 2026-10-17
+
+Each queued message belongs to a lane (interactive, automation, marketing).
+Workers claim a weighted share from every lane per batch, so a large
+marketing send cannot starve a coordinator's one-off reply.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0013_outbound_message_lanes"
+down_revision = "0012_worker_rate_limits"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("outbound_messages") as batch:
+        batch.add_column(
+            sa.Column("lane", sa.String(length=20), nullable=False, server_default="interactive")
+        )
+
+    op.create_index(
+        "ix_outbound_messages_queued_lane_created",
+        "outbound_messages",
+        ["lane", "created_at"],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbound_messages_queued_lane_created", table_name="outbound_messages")
+
+    with op.batch_alter_table("outbound_messages") as batch:
+        batch.drop_column("lane")
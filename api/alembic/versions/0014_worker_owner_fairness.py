@@ -0,0 +1,40 @@
+"""Worker: indexes for per-owner fair claiming
+
+Revision ID: 0014_worker_owner_fairness
+Revises: 0013_outbound_message_lanes
+Create Date: 2026-10-17
+
+The claim walks queued messages owner by owner (oldest first per owner and
+lane) and counts each owner's in-flight ('sending') messages.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0014_worker_owner_fairness"
+down_revision = "0013_outbound_message_lanes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_outbound_messages_queued_owner",
+        "outbound_messages",
+        ["owner_user_id", "lane", "created_at"],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+    op.create_index(
+        "ix_outbound_messages_sending_owner",
+        "outbound_messages",
+        ["owner_user_id"],
+        postgresql_where=sa.text("status = 'sending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbound_messages_sending_owner", table_name="outbound_messages")
+    op.drop_index("ix_outbound_messages_queued_owner", table_name="outbound_messages")
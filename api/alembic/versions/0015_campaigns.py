@@ -0,0 +1,62 @@
+"""Campaigns: server-side bulk sends
+
+Revision ID: 0015_campaigns
+Revises: 0014_worker_owner_fairness
+Create Date: 2026-10-17
+
+A campaign sends one template to a customer segment. Its outbound messages
+are created with a single INSERT ... SELECT and point back at the campaign
+for progress reporting.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0015_campaigns"
+down_revision = "0014_worker_owner_fairness"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "campaigns",
+        sa.Column("id", sa.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("owner_user_id", sa.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("name", sa.String(length=200), nullable=False),
+        sa.Column("channel", sa.String(length=20), nullable=False),
+        sa.Column("template_id", sa.UUID(as_uuid=True), sa.ForeignKey("templates.id"), nullable=False),
+        sa.Column("variables", sa.JSON(), nullable=True),
+        sa.Column("segment", sa.JSON(), nullable=True),
+        sa.Column("not_before_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("matched_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("queued_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.create_index("ix_campaigns_owner_created", "campaigns", ["owner_user_id", "created_at"])
+
+    with op.batch_alter_table("outbound_messages") as batch:
+        batch.add_column(
+            sa.Column("campaign_id", sa.UUID(as_uuid=True), sa.ForeignKey("campaigns.id"), nullable=True)
+        )
+
+    op.create_index(
+        "ix_outbound_messages_campaign_status",
+        "outbound_messages",
+        ["campaign_id", "status"],
+        postgresql_where=sa.text("campaign_id IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbound_messages_campaign_status", table_name="outbound_messages")
+
+    with op.batch_alter_table("outbound_messages") as batch:
+        batch.drop_column("campaign_id")
+
+    op.drop_index("ix_campaigns_owner_created", table_name="campaigns")
+    op.drop_table("campaigns")
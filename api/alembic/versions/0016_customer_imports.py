@@ -0,0 +1,46 @@
+"""Customer imports: bulk CSV/NDJSON uploads
+
+Revision ID: 0016_customer_imports
+Revises: 0015_campaigns
+Create Date: 2026-10-17
+
+One row per upload, with progress counters and a capped sample of the
+rows that were rejected.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0016_customer_imports"
+down_revision = "0015_campaigns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "customer_imports",
+        sa.Column("id", sa.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("owner_user_id", sa.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=True),
+        sa.Column("format", sa.String(length=10), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="processing"),
+        sa.Column("processed_rows", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("inserted_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("duplicate_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rejected_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rejected_rows", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_customer_imports_owner_created", "customer_imports", ["owner_user_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_customer_imports_owner_created", table_name="customer_imports")
+    op.drop_table("customer_imports")
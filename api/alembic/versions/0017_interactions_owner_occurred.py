@@ -0,0 +1,28 @@
+"""Index interactions by owner and time
+
+Revision ID: 0017_interactions_owner_occurred
+Revises: 0016_customer_imports
+Create Date: 2026-10-17
+
+Exports (and other owner-wide timelines) read interactions in occurred_at
+order; with this index they stream straight off the index instead of
+sorting every row first.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0017_interactions_owner_occurred"
+down_revision = "0016_customer_imports"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_interactions_owner_occurred", "interactions", ["owner_user_id", "occurred_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_interactions_owner_occurred", table_name="interactions")
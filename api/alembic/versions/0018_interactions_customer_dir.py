@@ -0,0 +1,31 @@
+"""Index interactions by customer, direction and time
+
+Revision ID: 0018_interactions_customer_dir
+Revises: 0017_interactions_owner_occurred
+Create Date: 2026-10-17
+
+The inbox list takes max(occurred_at) per customer and direction in a
+LATERAL subquery; with this index each lookup is a single index probe.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0018_interactions_customer_dir"
+down_revision = "0017_interactions_owner_occurred"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_interactions_customer_direction_occurred",
+        "interactions",
+        ["customer_id", "direction", "occurred_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_interactions_customer_direction_occurred", table_name="interactions")
@@ -0,0 +1,96 @@
+"""Inbox: materialised per-customer conversation state
+
+Revision ID: 0019_conversation_state
+Revises: 0018_interactions_customer_dir
+Create Date: 2026-10-17
+
+One row per customer with last inbound/outbound times, a preview of the
+latest message, unread count and bucket, so the inbox reads an index range
+instead of aggregating interactions. Backfilled here; later repairs use
+`python -m app.services.conversation_state`.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0019_conversation_state"
+down_revision = "0018_interactions_customer_dir"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "customer_conversation_state",
+        sa.Column(
+            "customer_id",
+            sa.UUID(as_uuid=True),
+            sa.ForeignKey("customers.id", ondelete="CASCADE"),
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column("owner_user_id", sa.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("last_inbound_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_outbound_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "activity_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("'1970-01-01 00:00:00+00'"),
+        ),
+        sa.Column("last_message_direction", sa.String(length=10), nullable=True),
+        sa.Column("last_message_preview", sa.String(length=200), nullable=True),
+        sa.Column("unread_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("bucket", sa.String(length=20), nullable=False, server_default="open"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.create_index(
+        "ix_customer_conversation_state_owner_bucket_activity",
+        "customer_conversation_state",
+        ["owner_user_id", "bucket", "activity_at", "customer_id"],
+    )
+    op.create_index("ix_customers_owner_follow_up", "customers", ["owner_user_id", "next_follow_up_at"])
+
+    op.execute(
+        """
+        INSERT INTO customer_conversation_state
+            (customer_id, owner_user_id, last_inbound_at, last_outbound_at, activity_at,
+             last_message_direction, last_message_preview, unread_count, bucket, updated_at)
+        SELECT c.id, c.owner_user_id, li.at, lo.at,
+               COALESCE(last.occurred_at, CAST('1970-01-01 00:00:00+00' AS timestamptz)),
+               last.direction, left(COALESCE(last.content, last.subject), 200),
+               unread.n,
+               CASE WHEN c.stage LIKE 'closed%' THEN 'closed'
+                    WHEN lo.at IS NOT NULL AND (li.at IS NULL OR lo.at >= li.at) THEN 'waiting'
+                    ELSE 'open' END,
+               now()
+        FROM customers c
+        CROSS JOIN LATERAL (
+            SELECT max(occurred_at) AS at FROM interactions WHERE customer_id = c.id AND direction = 'inbound'
+        ) li
+        CROSS JOIN LATERAL (
+            SELECT max(occurred_at) AS at FROM interactions WHERE customer_id = c.id AND direction = 'outbound'
+        ) lo
+        LEFT JOIN LATERAL (
+            SELECT occurred_at, CAST(direction AS varchar) AS direction, content, subject
+            FROM interactions
+            WHERE customer_id = c.id
+            ORDER BY occurred_at DESC, id DESC
+            LIMIT 1
+        ) last ON true
+        CROSS JOIN LATERAL (
+            SELECT count(*) AS n
+            FROM interactions
+            WHERE customer_id = c.id AND direction = 'inbound' AND (lo.at IS NULL OR occurred_at > lo.at)
+        ) unread
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_customers_owner_follow_up", table_name="customers")
+    op.drop_index("ix_customer_conversation_state_owner_bucket_activity", table_name="customer_conversation_state")
+    op.drop_table("customer_conversation_state")
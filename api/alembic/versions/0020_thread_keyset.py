@@ -0,0 +1,37 @@
+"""Index interactions and outbound messages by customer and time
+
+Revision ID: 0020_thread_keyset
+Revises: 0019_conversation_state
+Create Date: 2026-10-17
+
+The inbox thread pages through a customer's interactions and outbound
+messages by (time, id); each side of a page is one index range scan.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0020_thread_keyset"
+down_revision = "0019_conversation_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_interactions_customer_occurred",
+        "interactions",
+        ["customer_id", "occurred_at", "id"],
+    )
+    op.create_index(
+        "ix_outbound_messages_customer_created",
+        "outbound_messages",
+        ["customer_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbound_messages_customer_created", table_name="outbound_messages")
+    op.drop_index("ix_interactions_customer_occurred", table_name="interactions")
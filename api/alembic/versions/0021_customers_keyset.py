@@ -0,0 +1,29 @@
+"""Index customers by owner and created/updated time
+
+Revision ID: 0021_customers_keyset
+Revises: 0020_thread_keyset
+Create Date: 2026-10-17
+
+GET /customers pages by (created_at, id) or (updated_at, id) within an
+owner; each page is one index range scan.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0021_customers_keyset"
+down_revision = "0020_thread_keyset"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_customers_owner_created", "customers", ["owner_user_id", "created_at", "id"])
+    op.create_index("ix_customers_owner_updated", "customers", ["owner_user_id", "updated_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_customers_owner_updated", table_name="customers")
+    op.drop_index("ix_customers_owner_created", table_name="customers")
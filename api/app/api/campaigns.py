@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.auth.deps import get_current_user
+from app.db.models import Campaign, OutboundMessage, Template, User
+from app.db.session import get_db
+from app.schemas.campaign import CampaignCreate, CampaignOut, CampaignProgress
+from app.services.campaigns import enqueue_campaign
+
+
+router = APIRouter(prefix="/campaigns", tags=["campaigns"])
+
+
+def _progress(db: Session, campaign_ids: list[UUID]) -> dict[UUID, CampaignProgress]:
+    progress = {cid: CampaignProgress() for cid in campaign_ids}
+    if not campaign_ids:
+        return progress
+    rows = (
+        db.query(OutboundMessage.campaign_id, OutboundMessage.status, func.count(OutboundMessage.id))
+        .filter(OutboundMessage.campaign_id.in_(campaign_ids))
+        .group_by(OutboundMessage.campaign_id, OutboundMessage.status)
+        .all()
+    )
+    for campaign_id, msg_status, n in rows:
+        if msg_status in CampaignProgress.model_fields:
+            setattr(progress[campaign_id], msg_status, n)
+    return progress
+
+
+def _out(campaign: Campaign, progress: CampaignProgress) -> CampaignOut:
+    return CampaignOut(
+        id=campaign.id,
+        name=campaign.name,
+        channel=campaign.channel,
+        template_id=campaign.template_id,
+        variables=campaign.variables,
+        segment=campaign.segment,
+        not_before_at=campaign.not_before_at,
+        matched_count=campaign.matched_count,
+        queued_count=campaign.queued_count,
+        skipped_count=campaign.matched_count - campaign.queued_count,
+        progress=progress,
+        created_at=campaign.created_at,
+    )
+
+
+@router.get("", response_model=list[CampaignOut])
+def list_campaigns(
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> list[CampaignOut]:
+    campaigns = (
+        db.query(Campaign)
+        .filter(Campaign.owner_user_id == user.id)
+        .order_by(Campaign.created_at.desc())
+        .limit(200)
+        .all()
+    )
+    progress = _progress(db, [c.id for c in campaigns])
+    return [_out(c, progress[c.id]) for c in campaigns]
+
+
+@router.post("", response_model=CampaignOut, status_code=status.HTTP_201_CREATED)
+def create_campaign(
+    payload: CampaignCreate,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> CampaignOut:
+    tpl = db.get(Template, payload.template_id)
+    if tpl is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+    if tpl.channel != payload.channel:
+        raise HTTPException(status_code=400, detail="Template channel does not match campaign channel")
+
+    campaign = Campaign(
+        owner_user_id=user.id,
+        name=payload.name,
+        channel=payload.channel,
+        template_id=tpl.id,
+        variables=payload.variables,
+        segment=payload.segment.model_dump(exclude_none=True),
+        not_before_at=payload.not_before_at,
+    )
+    db.add(campaign)
+    db.flush()
+    enqueue_campaign(db, campaign, cancel_on_inbound=payload.cancel_on_inbound)
+    db.commit()
+    db.refresh(campaign)
+    return _out(campaign, _progress(db, [campaign.id])[campaign.id])
+
+
+@router.get("/{campaign_id}", response_model=CampaignOut)
+def get_campaign(
+    campaign_id: UUID,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> CampaignOut:
+    campaign = db.get(Campaign, campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    if campaign.owner_user_id != user.id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return _out(campaign, _progress(db, [campaign.id])[campaign.id])
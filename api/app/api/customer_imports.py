@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Literal, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy.orm import Session
+
+from app.auth.deps import get_current_user
+from app.db.models import CustomerImport, User
+from app.db.session import get_db
+from app.schemas.customer_import import CustomerImportOut
+from app.services.customer_import import CustomerImportError, detect_format, run_import
+
+
+router = APIRouter(prefix="/customers", tags=["customers"])
+
+
+def _mark_failed(db: Session, imp: CustomerImport, error: str) -> None:
+    db.rollback()
+    imp.status = "failed"
+    imp.error = error
+    imp.finished_at = datetime.now(tz=timezone.utc)
+    db.add(imp)
+    db.commit()
+
+
+@router.post("/import", response_model=CustomerImportOut, status_code=201)
+def import_customers(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = Query(default=None, description="Defaults to the file extension"),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> CustomerImportOut:
+    fmt = format or detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .ndjson file (or pass ?format=)")
+
+    # Committed up front so progress can be polled while the file streams in.
+    imp = CustomerImport(owner_user_id=user.id, filename=(file.filename or "")[:255] or None, format=fmt)
+    db.add(imp)
+    db.commit()
+    db.refresh(imp)
+
+    try:
+        run_import(db, imp, file.file)
+    except CustomerImportError as e:
+        _mark_failed(db, imp, str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        _mark_failed(db, imp, "internal error")
+        raise
+
+    db.commit()
+    db.refresh(imp)
+    return imp
+
+
+@router.get("/imports/{import_id}", response_model=CustomerImportOut)
+def get_customer_import(
+    import_id: UUID,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> CustomerImportOut:
+    imp = db.get(CustomerImport, import_id)
+    if imp is None or imp.owner_user_id != user.id:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return imp
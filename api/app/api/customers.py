@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+import sqlalchemy as sa
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.auth.deps import get_current_user
-from app.db.models import Customer, User
+from app.db.models import Customer, CustomerTag, Tag, User
 from app.db.session import get_db
 from app.schemas.customer import CustomerCreate, CustomerOut, CustomerUpdate
+from app.services.exports import EXPORT_MEDIA_TYPES, export_headers, iter_export
+from app.services.pagination import NEXT_CURSOR_HEADER, InvalidCursor, decode_cursor, encode_cursor
+from app.services.tags import tag_names_subquery
 
 from uuid import UUID 
 
@@ -44,16 +51,124 @@ def create_customer(
     return customer
 
 
+# Columns GET /customers?fields=... can return (id is always included).
+CUSTOMER_LIST_FIELDS = tuple(CustomerOut.model_fields)
+_SORT_COLUMNS = {"created_at": Customer.created_at, "updated_at": Customer.updated_at}
+
+
 @router.get("", response_model=list[CustomerOut])
 def list_customers(
+    response: Response,
+    limit: int = 100,
+    cursor: str | None = None,
+    sort: Literal["created_at", "updated_at"] = "created_at",
+    stage: str | None = None,
+    tag: str | None = None,
+    can_contact: bool | None = None,
+    language: str | None = None,
+    follow_up_after: datetime | None = None,
+    follow_up_before: datetime | None = None,
+    fields: str | None = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """One page of customers, newest first by `sort` (created_at or updated_at).
+
+    Keyset-paginated on (sort, id) over ix_customers_owner_created /
+    ix_customers_owner_updated, so every page costs O(limit). When more may
+    follow, pass the X-Next-Cursor response header back as `cursor` (with the
+    same `sort`). `fields=name,stage,...` returns only those keys (plus id).
+    """
+    limit = min(max(limit, 1), 500)
+
+    selected = list(CUSTOMER_LIST_FIELDS)
+    if fields:
+        wanted = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = sorted(wanted - set(CUSTOMER_LIST_FIELDS))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        selected = [f for f in CUSTOMER_LIST_FIELDS if f == "id" or f in wanted]
+
+    sort_col = _SORT_COLUMNS[sort]
+    columns = [
+        tag_names_subquery(Customer.id).label(f) if f == "tag_names" else getattr(Customer, f).label(f)
+        for f in selected
+    ]
+    stmt = (
+        sa.select(*columns, sort_col.label("sort_key"))
+        .where(Customer.owner_user_id == user.id)
+        .order_by(sort_col.desc(), Customer.id.desc())
+        .limit(limit)
+    )
+    if cursor:
+        try:
+            cursor_sort, at, last_id = decode_cursor(cursor, (str, datetime, UUID))
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if cursor_sort != sort:
+            raise HTTPException(status_code=400, detail="Cursor was issued for a different sort")
+        stmt = stmt.where(sa.tuple_(sort_col, Customer.id) < sa.tuple_(at, last_id))
+
+    if stage:
+        stmt = stmt.where(Customer.stage == stage)
+    if can_contact is not None:
+        stmt = stmt.where(Customer.can_contact.is_(can_contact))
+    if language:
+        stmt = stmt.where(Customer.language == language)
+    if follow_up_after is not None:
+        stmt = stmt.where(Customer.next_follow_up_at >= follow_up_after)
+    if follow_up_before is not None:
+        stmt = stmt.where(Customer.next_follow_up_at <= follow_up_before)
+    if tag:
+        stmt = stmt.where(
+            sa.exists()
+            .where(CustomerTag.customer_id == Customer.id)
+            .where(CustomerTag.tag_id == Tag.id)
+            .where(Tag.owner_user_id == user.id)
+            .where(Tag.name == tag)
+        )
+
+    rows = db.execute(stmt).all()
+    headers = {}
+    if len(rows) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(sort, rows[-1].sort_key, rows[-1].id)
+
+    items = [{f: (getattr(r, f) or []) if f == "tag_names" else getattr(r, f) for f in selected} for r in rows]
+    if fields:
+        # Partial rows don't fit CustomerOut; skip response_model validation.
+        return JSONResponse(jsonable_encoder(items), headers=headers)
+    response.headers.update(headers)
+    return items
+
+
+@router.get("/export")
+def export_customers(
+    format: Literal["csv", "ndjson"] = "csv",
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
-) -> list[CustomerOut]:
-    return (
-        db.query(Customer)
-        .filter(Customer.owner_user_id == user.id)
-        .order_by(Customer.id.asc())
-        .all()
+) -> StreamingResponse:
+    stmt = (
+        sa.select(
+            Customer.id,
+            Customer.name,
+            Customer.email,
+            Customer.phone,
+            Customer.company,
+            Customer.stage,
+            Customer.language,
+            Customer.can_contact,
+            Customer.next_follow_up_at,
+            tag_names_subquery(Customer.id).label("tags"),
+            Customer.created_at,
+            Customer.updated_at,
+        )
+        .where(Customer.owner_user_id == user.id)
+        .order_by(Customer.created_at.asc(), Customer.id.asc())
+    )
+    return StreamingResponse(
+        iter_export(db.get_bind(), stmt, fmt=format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=export_headers("customers", format),
     )
 
 
@@ -80,7 +195,6 @@ def update_customer(
         if key == "email" and value is not None:
             value = str(value)
         setattr(customer, key, value)
-    from datetime import timezone
     customer.updated_at = datetime.now(tz=timezone.utc)
 
     db.add(customer)
@@ -68,6 +68,9 @@ def _get_email_provider():
         smtp_from_email=settings.smtp_from_email,
         smtp_from_name=settings.smtp_from_name,
         smtp_use_starttls=settings.smtp_use_starttls,
+        smtp_pool_size=settings.smtp_pool_size,
+        smtp_idle_timeout_seconds=settings.smtp_idle_timeout_seconds,
+        smtp_max_messages_per_connection=settings.smtp_max_messages_per_connection,
     )
 
 
@@ -104,7 +107,9 @@ def send_email(
         if tpl.category == "marketing" and not customer.can_contact:
             raise HTTPException(status_code=403, detail="Customer cannot be contacted for marketing")
 
-        rendered = render_template(subject=tpl.subject, body=tpl.body, context=context)
+        rendered = render_template(
+            subject=tpl.subject, body=tpl.body, context=context, template_id=tpl.id, updated_at=tpl.updated_at
+        )
         if not rendered.subject:
             raise HTTPException(status_code=400, detail="Rendered subject is empty")
         rendered_subject, rendered_body = rendered.subject, rendered.body
@@ -9,6 +9,7 @@ from app.auth.deps import get_current_user
 from app.db.models import Customer, User
 from app.db.session import get_db
 from app.schemas.customer import CustomerOut
+from app.services.tags import load_tag_names
 
 router = APIRouter(prefix="/followups", tags=["followups"])
 
@@ -27,6 +28,7 @@ def list_followups(
 
     q = (
         db.query(Customer)
+        .options(load_tag_names())
         .filter(
             Customer.owner_user_id == user.id,
             Customer.next_follow_up_at.isnot(None),
@@ -3,12 +3,13 @@ from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
+import sqlalchemy as sa
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlalchemy import func, or_, and_
+from sqlalchemy import or_, and_
 from sqlalchemy.orm import Session
 
 from app.auth.deps import get_current_user
-from app.db.models import Customer, Interaction, OutboundMessage, Tag, CustomerTag, User
+from app.db.models import Customer, CustomerConversationState, Interaction, OutboundMessage, Tag, CustomerTag, User
 from app.db.session import get_db
 from app.schemas.inbox import (
     InboxCustomerOut,
@@ -19,178 +20,280 @@ from app.schemas.inbox import (
     SendTextIn,
     SendTemplateIn,
 )
+from app.services.outbound_lanes import LANE_INTERACTIVE, resolve_lane
+from app.services.pagination import NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER, InvalidCursor, decode_cursor, encode_cursor
+from app.services.tags import tag_names_subquery
 
 
 router = APIRouter(prefix="/inbox", tags=["inbox"])
 
 
-def _bucket_for(customer: Customer, now: datetime, last_in: datetime | None, last_out: datetime | None) -> str:
-    if (customer.stage or "").startswith("closed"):
-        return "closed"
-    if customer.next_follow_up_at is not None and customer.next_follow_up_at <= now:
-        return "followup_due"
-    if last_out is not None and (last_in is None or last_out >= last_in):
-        return "waiting"
-    return "open"
+# Inbox ordering: follow-ups due first, then unanswered, waiting on the customer, closed.
+_BUCKET_RANK = {"followup_due": 0, "open": 1, "waiting": 2, "closed": 3}
+
+
+def _inbox_branch(user: User, bucket: str, now: datetime, filters: list, *, cursor: tuple | None, size: int):
+    """One bucket's rows, most recent activity first.
+
+    Reads customer_conversation_state in index order
+    (ix_customer_conversation_state_owner_bucket_activity); only the small
+    follow-up-due set, found via ix_customers_owner_follow_up, needs a sort.
+    """
+    state = CustomerConversationState
+    due = and_(Customer.next_follow_up_at.is_not(None), Customer.next_follow_up_at <= now)
+    stmt = (
+        sa.select(
+            Customer.id,
+            Customer.name,
+            Customer.email,
+            Customer.phone,
+            Customer.company,
+            Customer.stage,
+            Customer.next_follow_up_at,
+            state.last_inbound_at,
+            state.last_outbound_at,
+            state.last_message_direction,
+            state.last_message_preview,
+            state.unread_count,
+            state.activity_at,
+            sa.literal(bucket).label("bucket"),
+            sa.literal(_BUCKET_RANK[bucket]).label("bucket_rank"),
+        )
+        .select_from(state)
+        .join(Customer, Customer.id == state.customer_id)
+        .where(state.owner_user_id == user.id, *filters)
+    )
+    if bucket == "followup_due":
+        stmt = stmt.where(state.bucket != "closed", Customer.owner_user_id == user.id, due)
+    else:
+        stmt = stmt.where(state.bucket == bucket)
+        if bucket != "closed":
+            stmt = stmt.where(sa.not_(due))
+    if cursor is not None:
+        activity, last_id = cursor
+        stmt = stmt.where(sa.tuple_(state.activity_at, state.customer_id) < sa.tuple_(activity, last_id))
+    return stmt.order_by(state.activity_at.desc(), state.customer_id.desc()).limit(size)
 
 
 @router.get("/customers", response_model=list[InboxCustomerOut])
 def list_inbox_customers(
+    response: Response,
     bucket: str | None = None,
     stage: str | None = None,
     tag: str | None = None,
     q: str | None = None,
     limit: int = 50,
     offset: int = 0,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> list[InboxCustomerOut]:
+    """Inbox page ordered by bucket, then most recent activity.
+
+    One UNION ALL statement over the materialised conversation state, one
+    index range per bucket, so a page costs O(limit + offset) rows at any
+    book size. Pass the X-Next-Cursor response header back as `cursor` for
+    the next page (`offset` still works but gets slower the deeper it goes).
+    """
     limit = min(max(limit, 1), 200)
     offset = max(offset, 0)
 
-    last_in = (
-        db.query(Interaction.customer_id.label("customer_id"), func.max(Interaction.occurred_at).label("last_in"))
-        .filter(Interaction.owner_user_id == user.id)
-        .filter(Interaction.direction == "inbound")
-        .group_by(Interaction.customer_id)
-        .subquery()
-    )
-    last_out = (
-        db.query(Interaction.customer_id.label("customer_id"), func.max(Interaction.occurred_at).label("last_out"))
-        .filter(Interaction.owner_user_id == user.id)
-        .filter(Interaction.direction == "outbound")
-        .group_by(Interaction.customer_id)
-        .subquery()
-    )
-
-    cq = db.query(Customer).filter(Customer.owner_user_id == user.id)
+    filters = []
     if stage:
-        cq = cq.filter(Customer.stage == stage)
+        filters.append(Customer.stage == stage)
     if q:
         like = f"%{q}%"
-        cq = cq.filter(or_(Customer.name.ilike(like), Customer.phone.ilike(like), Customer.email.ilike(like), Customer.company.ilike(like)))
+        filters.append(or_(Customer.name.ilike(like), Customer.phone.ilike(like), Customer.email.ilike(like), Customer.company.ilike(like)))
     if tag:
-        cq = (
-            cq.join(CustomerTag, CustomerTag.customer_id == Customer.id)
-            .join(Tag, Tag.id == CustomerTag.tag_id)
-            .filter(Tag.owner_user_id == user.id)
-            .filter(Tag.name == tag)
+        filters.append(
+            sa.exists()
+            .where(CustomerTag.customer_id == Customer.id)
+            .where(CustomerTag.tag_id == Tag.id)
+            .where(Tag.owner_user_id == user.id)
+            .where(Tag.name == tag)
         )
 
-    # fetch base customers
-    customers = cq.order_by(Customer.updated_at.desc()).offset(offset).limit(limit).all()
-    if not customers:
-        return []
+    after: tuple[int, datetime, UUID] | None = None
+    if cursor:
+        try:
+            rank, activity, last_id = decode_cursor(cursor, (int, datetime, UUID))
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        after = (rank, activity, last_id)
 
-    ids = [c.id for c in customers]
-    in_rows = dict(db.query(last_in.c.customer_id, last_in.c.last_in).filter(last_in.c.customer_id.in_(ids)).all())
-    out_rows = dict(db.query(last_out.c.customer_id, last_out.c.last_out).filter(last_out.c.customer_id.in_(ids)).all())
     now = datetime.now(timezone.utc)
+    branches = []
+    for name, rank in _BUCKET_RANK.items():
+        if bucket and name != bucket:
+            continue
+        if after is not None and rank < after[0]:
+            continue
+        branch_cursor = after[1:] if after is not None and rank == after[0] else None
+        branches.append(_inbox_branch(user, name, now, filters, cursor=branch_cursor, size=offset + limit))
+    if not branches:
+        return []
+
+    rows = sa.union_all(*branches).subquery("inbox")
+    page = (
+        sa.select(rows)
+        .order_by(rows.c.bucket_rank.asc(), rows.c.activity_at.desc(), rows.c.id.desc())
+        .offset(offset)
+        .limit(limit)
+        .subquery("page")
+    )
+
+    # Tags only for the rows on this page.
+    result = db.execute(
+        sa.select(page, tag_names_subquery(page.c.id).label("tags")).order_by(
+            page.c.bucket_rank.asc(), page.c.activity_at.desc(), page.c.id.desc()
+        )
+    ).all()
+
+    if len(result) == limit:
+        last = result[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.bucket_rank, last.activity_at, last.id)
 
     out: list[InboxCustomerOut] = []
-    for c in customers:
-        li = in_rows.get(c.id)
-        lo = out_rows.get(c.id)
-        last_activity_at = None
-        last_activity_direction = None
-        if li and (not lo or li >= lo):
-            last_activity_at = li
-            last_activity_direction = "inbound"
-        elif lo:
-            last_activity_at = lo
-            last_activity_direction = "outbound"
-
-        b = _bucket_for(c, now, li, lo)
-        if bucket and b != bucket:
-            continue
+    for r in result:
+        last_activity_at = max((t for t in (r.last_inbound_at, r.last_outbound_at) if t is not None), default=None)
         out.append(
             InboxCustomerOut(
-                id=c.id,
-                name=c.name,
-                email=c.email,
-                phone=c.phone,
-                company=c.company,
-                stage=c.stage,
-                tags=c.tag_names,
-                next_follow_up_at=c.next_follow_up_at,
-                last_inbound_at=li,
-                last_outbound_at=lo,
+                id=r.id,
+                name=r.name,
+                email=r.email,
+                phone=r.phone,
+                company=r.company,
+                stage=r.stage,
+                tags=r.tags or [],
+                next_follow_up_at=r.next_follow_up_at,
+                last_inbound_at=r.last_inbound_at,
+                last_outbound_at=r.last_outbound_at,
                 last_activity_at=last_activity_at,
-                last_activity_direction=last_activity_direction,
-                bucket=b,
+                last_activity_direction=r.last_message_direction,
+                last_message_preview=r.last_message_preview,
+                unread_count=r.unread_count,
+                bucket=r.bucket,
             )
         )
+    return out
 
-    # Sort: followup_due first, then most recent activity
-    def _sort_key(x: InboxCustomerOut):
-        bucket_rank = {"followup_due": 0, "open": 1, "waiting": 2, "closed": 3}
-        return (bucket_rank.get(x.bucket, 9), x.last_activity_at or datetime(1970, 1, 1, tzinfo=timezone.utc))
 
-    out.sort(key=_sort_key, reverse=False)
-    return out
+def _thread_branches(user: User, customer_id: UUID, *, before: tuple | None, after: tuple | None, size: int):
+    """Interactions and queued/sent messages as one (occurred_at, id) stream.
+
+    Each side is cut to `size` rows in index order
+    (ix_interactions_customer_occurred / ix_outbound_messages_customer_created)
+    before the merge, so a page never reads more than 2 * size rows.
+    """
+    descending = after is None
+    sides = []
+    for kind, table, at, columns in (
+        (
+            "interaction",
+            Interaction,
+            Interaction.occurred_at,
+            (
+                sa.cast(Interaction.direction, sa.String).label("direction"),
+                sa.cast(Interaction.channel, sa.String).label("channel"),
+                Interaction.content.label("content"),
+                Interaction.subject.label("subject"),
+                sa.null().cast(sa.String).label("status"),
+                sa.null().cast(sa.UUID(as_uuid=True)).label("template_id"),
+            ),
+        ),
+        (
+            "outbound_message",
+            OutboundMessage,
+            OutboundMessage.created_at,
+            (
+                sa.literal("outbound", sa.String).label("direction"),
+                OutboundMessage.channel.label("channel"),
+                OutboundMessage.body.label("content"),
+                sa.null().cast(sa.Text).label("subject"),
+                OutboundMessage.status.label("status"),
+                OutboundMessage.template_id.label("template_id"),
+            ),
+        ),
+    ):
+        stmt = sa.select(
+            sa.literal(kind, sa.String).label("kind"),
+            table.id.label("id"),
+            at.label("occurred_at"),
+            *columns,
+        ).where(table.customer_id == customer_id, table.owner_user_id == user.id)
+        key = sa.tuple_(at, table.id)
+        if before is not None:
+            stmt = stmt.where(key < sa.tuple_(*before))
+        if after is not None:
+            stmt = stmt.where(key > sa.tuple_(*after))
+        order = (at.desc(), table.id.desc()) if descending else (at.asc(), table.id.asc())
+        sides.append(stmt.order_by(*order).limit(size))
+    return sa.union_all(*sides).subquery("thread")
 
 
 @router.get("/customers/{customer_id}/thread", response_model=list[ThreadItem])
 def get_thread(
     customer_id: UUID,
+    response: Response,
+    limit: int = 50,
+    before: str | None = None,
+    after: str | None = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> list[ThreadItem]:
+    """One page of a conversation, oldest first.
+
+    Without a cursor this is the latest `limit` items. X-Next-Cursor (sent
+    when the page is full) continues in the same direction: pass it back as
+    `before` to scroll to older items, or as `after` when paging forward.
+    X-Prev-Cursor points at the other end of the page, e.g. pass it as
+    `after` to poll for new messages.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Pass either before or after, not both")
+    limit = min(max(limit, 1), 200)
+
     c = db.get(Customer, customer_id)
     if c is None:
         raise HTTPException(status_code=404, detail="Customer not found")
     if c.owner_user_id != user.id:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    interactions = (
-        db.query(Interaction)
-        .filter(Interaction.owner_user_id == user.id)
-        .filter(Interaction.customer_id == customer_id)
-        .order_by(Interaction.occurred_at.desc())
-        .limit(300)
-        .all()
-    )
-    outbound = (
-        db.query(OutboundMessage)
-        .filter(OutboundMessage.owner_user_id == user.id)
-        .filter(OutboundMessage.customer_id == customer_id)
-        .order_by(OutboundMessage.created_at.desc())
-        .limit(300)
-        .all()
-    )
+    try:
+        before_key = tuple(decode_cursor(before, (datetime, UUID))) if before else None
+        after_key = tuple(decode_cursor(after, (datetime, UUID))) if after else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    items: list[ThreadItem] = []
-    for i in interactions:
-        items.append(
-            ThreadItem(
-                kind="interaction",
-                id=i.id,
-                direction=i.direction,
-                channel=i.channel,
-                occurred_at=i.occurred_at,
-                content=i.content,
-                subject=i.subject,
-                status=None,
-                template_id=None,
-            )
-        )
-    for m in outbound:
-        items.append(
-            ThreadItem(
-                kind="outbound_message",
-                id=m.id,
-                direction="outbound",
-                channel=m.channel,
-                occurred_at=m.created_at,
-                content=m.body,
-                subject=None,
-                status=m.status,
-                template_id=m.template_id,
-            )
+    thread = _thread_branches(user, customer_id, before=before_key, after=after_key, size=limit)
+    if after_key is None:
+        order = (thread.c.occurred_at.desc(), thread.c.id.desc())
+    else:
+        order = (thread.c.occurred_at.asc(), thread.c.id.asc())
+    rows = db.execute(sa.select(thread).order_by(*order).limit(limit)).all()
+
+    if rows:
+        # rows[0] is the end we started from, rows[-1] the end we travelled to.
+        if len(rows) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].occurred_at, rows[-1].id)
+        response.headers[PREV_CURSOR_HEADER] = encode_cursor(rows[0].occurred_at, rows[0].id)
+    if after_key is None:
+        rows.reverse()
+
+    return [
+        ThreadItem(
+            kind=r.kind,
+            id=r.id,
+            direction=r.direction,
+            channel=r.channel,
+            occurred_at=r.occurred_at,
+            content=r.content,
+            subject=r.subject,
+            status=r.status,
+            template_id=r.template_id,
         )
-
-    items.sort(key=lambda x: x.occurred_at)
-    return items
+        for r in rows
+    ]
 
 
 @router.post("/customers/{customer_id}/stage", status_code=status.HTTP_204_NO_CONTENT, response_class=Response)
@@ -306,6 +409,7 @@ def send_text(
         customer_id=customer_id,
         channel=payload.channel,
         status="queued",
+        lane=LANE_INTERACTIVE,
         body=payload.body,
         not_before_at=not_before,
         cancel_on_inbound=payload.cancel_on_inbound,
@@ -338,6 +442,7 @@ def send_template(
         customer_id=customer_id,
         channel=payload.channel,
         status="queued",
+        lane=resolve_lane(db, default=LANE_INTERACTIVE, template_id=payload.template_id),
         template_id=payload.template_id,
         variables=payload.variables,
         not_before_at=not_before,
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from typing import Literal
 
+import sqlalchemy as sa
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.auth.deps import get_current_user
 from app.db.models import Customer, Interaction, User
 from app.db.session import get_db
 from app.schemas.interaction import InteractionCreate, InteractionOut
+from app.services.exports import EXPORT_MEDIA_TYPES, export_headers, iter_export
 
 from uuid import UUID
 
@@ -60,3 +64,38 @@ def list_interactions(
         .order_by(Interaction.occurred_at.desc())
         .all()
     )
+
+
+@router.get("/interactions/export")
+def export_interactions(
+    format: Literal["csv", "ndjson"] = "csv",
+    customer_id: UUID | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """All of the user's interactions (optionally one customer / a time window), oldest first."""
+    stmt = sa.select(
+        Interaction.id,
+        Interaction.customer_id,
+        Interaction.channel,
+        Interaction.direction,
+        Interaction.occurred_at,
+        Interaction.subject,
+        Interaction.content,
+        Interaction.provider_message_id,
+    ).where(Interaction.owner_user_id == user.id)
+    if customer_id is not None:
+        _get_owned_customer(db, customer_id, user)
+        stmt = stmt.where(Interaction.customer_id == customer_id)
+    if start is not None:
+        stmt = stmt.where(Interaction.occurred_at >= start)
+    if end is not None:
+        stmt = stmt.where(Interaction.occurred_at < end)
+    stmt = stmt.order_by(Interaction.occurred_at.asc(), Interaction.id.asc())
+    return StreamingResponse(
+        iter_export(db.get_bind(), stmt, fmt=format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=export_headers("interactions", format),
+    )
@@ -9,6 +9,7 @@ from app.auth.deps import get_current_user
 from app.db.models import Customer, OutboundMessage, User
 from app.db.session import get_db
 from app.schemas.outbound_message import OutboundMessageCreate, OutboundMessageOut
+from app.services.outbound_lanes import LANE_INTERACTIVE, resolve_lane
 
 
 router = APIRouter(prefix="/outbound-messages", tags=["outbound-messages"])
@@ -47,6 +48,7 @@ def create_outbound_message(
         customer_id=payload.customer_id,
         channel=payload.channel,
         status="queued",
+        lane=payload.lane or resolve_lane(db, default=LANE_INTERACTIVE, template_id=payload.template_id),
         template_id=payload.template_id,
         body=payload.body,
         variables=payload.variables,
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Literal
 from uuid import UUID
 
+import sqlalchemy as sa
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.auth.deps import get_current_user
 from app.db.models import Customer, OutcomeEvent, OutcomeType, User
 from app.db.session import get_db
 from app.schemas.outcome import OutcomeEventCreate, OutcomeEventOut
+from app.services.exports import EXPORT_MEDIA_TYPES, export_headers, iter_export
 
 
 router = APIRouter(prefix="/outcomes", tags=["outcomes"])
@@ -27,6 +31,41 @@ def list_outcomes(
     return q.order_by(OutcomeEvent.occurred_at.desc()).limit(500).all()
 
 
+@router.get("/export")
+def export_outcomes(
+    format: Literal["csv", "ndjson"] = "csv",
+    customer_id: UUID | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """Every outcome for the user (no 500-row cap), oldest first."""
+    stmt = sa.select(
+        OutcomeEvent.id,
+        OutcomeEvent.customer_id,
+        OutcomeEvent.deal_id,
+        OutcomeEvent.type.label("type"),
+        OutcomeEvent.amount,
+        OutcomeEvent.notes,
+        OutcomeEvent.meta.label("metadata"),
+        OutcomeEvent.occurred_at,
+        OutcomeEvent.created_at,
+    ).where(OutcomeEvent.owner_user_id == user.id)
+    if customer_id is not None:
+        stmt = stmt.where(OutcomeEvent.customer_id == customer_id)
+    if start is not None:
+        stmt = stmt.where(OutcomeEvent.occurred_at >= start)
+    if end is not None:
+        stmt = stmt.where(OutcomeEvent.occurred_at < end)
+    stmt = stmt.order_by(OutcomeEvent.occurred_at.asc(), OutcomeEvent.id.asc())
+    return StreamingResponse(
+        iter_export(db.get_bind(), stmt, fmt=format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=export_headers("outcomes", format),
+    )
+
+
 @router.post("", response_model=OutcomeEventOut, status_code=status.HTTP_201_CREATED)
 def create_outcome(
     payload: OutcomeEventCreate,
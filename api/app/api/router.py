@@ -5,6 +5,7 @@ from fastapi import APIRouter
 from app.api import (
     auth,
     customers,
+    customer_imports,
     deals,
     followups,
     interactions,
@@ -17,11 +18,13 @@ from app.api import (
     inbox,
     outcomes,
     analytics,
+    campaigns,
 )
 
 api_router = APIRouter()
 api_router.include_router(auth.router)
 api_router.include_router(customers.router)
+api_router.include_router(customer_imports.router)
 api_router.include_router(deals.router)
 api_router.include_router(interactions.router)
 api_router.include_router(followups.router)
@@ -39,3 +42,4 @@ api_router.include_router(tags.router)
 api_router.include_router(inbox.router)
 api_router.include_router(outcomes.router)
 api_router.include_router(analytics.router)
+api_router.include_router(campaigns.router)
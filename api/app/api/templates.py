@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
+
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
 from uuid import UUID
@@ -118,6 +120,9 @@ def update_template(
     if payload.body is not None:
         tpl.body = payload.body
 
+    # Compiled-template caches (API and worker) are keyed by updated_at.
+    tpl.updated_at = datetime.now(tz=timezone.utc)
+
     # Enforce unique (channel, name, language)
     existing = (
         db.query(Template)
@@ -174,5 +179,7 @@ def preview_template(
         "customer_name": customer.name,
         "company": customer.company,
     }
-    rendered = render_template(subject=tpl.subject, body=tpl.body, context=context)
+    rendered = render_template(
+        subject=tpl.subject, body=tpl.body, context=context, template_id=tpl.id, updated_at=tpl.updated_at
+    )
     return TemplatePreviewOut(subject=rendered.subject, body=rendered.body)
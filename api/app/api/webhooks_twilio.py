@@ -11,33 +11,13 @@ from app.core.config import settings
 from app.db.models import Customer, Interaction, OutboundMessage, User
 from app.db.session import get_db
 from app.services.automation import handle_event
+from app.services.phone import normalise_phone
 from app.services.tags import add_tag_to_customer
 
 
 router = APIRouter(prefix="/webhooks/twilio", tags=["webhooks"])
 
 
-def _normalise_phone_for_storage(s: str) -> str:
-    """Normalise to E.164-like string for storage.
-
-    Twilio WhatsApp inbound uses 'whatsapp:+447...' in the From field.
-    We store '+447...' (no 'whatsapp:' prefix) so outbound code can add it later.
-    """
-    v = (s or "").strip()
-    if v.lower().startswith("whatsapp:"):
-        v = v.split(":", 1)[1].strip()
-    v = v.replace(" ", "")
-
-    if v.startswith("+"):
-        return v
-
-    # crude fallback for local numbers: strip non-digits and prefix default country code
-    digits = "".join(ch for ch in v if ch.isdigit())
-    if digits.startswith("0"):
-        digits = digits[1:]
-    return f"{settings.default_country_code}{digits}"
-
-
 def _get_default_owner(db: Session) -> User:
     # Pick a deterministic owner for unauthenticated inbound webhooks.
     # We prefer the most recently created user so that in fresh/self-hosted
@@ -93,7 +73,9 @@ async def twilio_whatsapp_inbound(
     if not from_raw:
         raise HTTPException(status_code=400, detail="Missing From")
 
-    phone = _normalise_phone_for_storage(from_raw)
+    phone = normalise_phone(from_raw)
+    if phone is None:
+        raise HTTPException(status_code=400, detail="Invalid From")
     owner = _get_default_owner(db)
 
     customer = db.query(Customer).filter(Customer.phone == phone).first()
@@ -59,6 +59,11 @@ class Settings:
     smtp_from_name: str = os.getenv("SMTP_FROM_NAME", "")
     smtp_use_starttls: bool = os.getenv("SMTP_USE_STARTTLS", "true").lower() in ("1","true","yes","y","on")
 
+    # SMTP connection pooling: sessions are kept open and reused across sends.
+    smtp_pool_size: int = int(os.getenv("SMTP_POOL_SIZE", "4"))
+    smtp_idle_timeout_seconds: float = float(os.getenv("SMTP_IDLE_TIMEOUT_SECONDS", "60"))
+    smtp_max_messages_per_connection: int = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+
 
     # Phase 4: WhatsApp (Twilio) + automation
     default_country_code: str = os.getenv("DEFAULT_COUNTRY_CODE", "+44")
@@ -87,6 +87,13 @@ class Customer(Base):
     # Phase 4B tags
     tags = relationship("CustomerTag", back_populates="customer", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        sa.Index("ix_customers_owner_follow_up", "owner_user_id", "next_follow_up_at"),
+        # GET /customers keyset pages (migration 0021).
+        sa.Index("ix_customers_owner_created", "owner_user_id", "created_at", "id"),
+        sa.Index("ix_customers_owner_updated", "owner_user_id", "updated_at", "id"),
+    )
+
     @property
     def tag_names(self) -> list[str]:
         # Convenience for API schemas.
@@ -182,6 +189,14 @@ class Interaction(Base):
 
     customer = relationship("Customer", back_populates="interactions")
 
+    __table_args__ = (
+        sa.Index("ix_interactions_owner_occurred", "owner_user_id", "occurred_at", "id"),
+        sa.Index("ix_interactions_customer_direction_occurred", "customer_id", "direction", "occurred_at"),
+        # Inbox thread keyset pages (migration 0020).
+        sa.Index("ix_interactions_customer_occurred", "customer_id", "occurred_at", "id"),
+    )
+
+
 class Template(Base):
     __tablename__ = "templates"
 
@@ -249,8 +264,13 @@ class OutboundMessage(Base):
     channel = sa.Column(sa.String(20), nullable=False)  # e.g. 'whatsapp', 'email', 'sms'
 
     # queue status: queued -> sending -> sent | failed
+    # Transient send errors go back to queued (with a backoff not_before_at);
+    # failed is the dead-letter state (permanent error or retries exhausted).
     status = sa.Column(sa.String(20), nullable=False, server_default="queued")
 
+    # Claim priority lane: interactive | automation | marketing (weighted by the worker).
+    lane = sa.Column(sa.String(20), nullable=False, server_default="interactive")
+
     # If set, the worker can send using provider templates (e.g. Twilio WhatsApp Content SID)
     template_id = sa.Column(sa.UUID(as_uuid=True), sa.ForeignKey("templates.id"))
 
@@ -271,6 +291,13 @@ class OutboundMessage(Base):
     last_error = sa.Column(sa.Text())
     retry_count = sa.Column(sa.Integer(), nullable=False, server_default="0")
 
+    # Set for messages created by a campaign (bulk send).
+    campaign_id = sa.Column(sa.UUID(as_uuid=True), sa.ForeignKey("campaigns.id"))
+
+    # Worker claim lease: set on claim, extended while sending, reaped when expired.
+    claimed_by = sa.Column(sa.String(120))
+    lease_expires_at = sa.Column(sa.DateTime(timezone=True))
+
     created_at = sa.Column(
         sa.DateTime(timezone=True),
         server_default=sa.text("now()"),
@@ -282,6 +309,166 @@ class OutboundMessage(Base):
         nullable=False,
     )
 
+    __table_args__ = (
+        # Worker batch claim scans queued rows in FIFO order (see migration 0009).
+        sa.Index(
+            "ix_outbound_messages_queued_created",
+            "created_at",
+            postgresql_where=sa.text("status = 'queued'"),
+        ),
+        # Per-lane fair-share claims (migration 0013).
+        sa.Index(
+            "ix_outbound_messages_queued_lane_created",
+            "lane",
+            "created_at",
+            postgresql_where=sa.text("status = 'queued'"),
+        ),
+        # Round-robin claims across owners + per-owner in-flight caps (migration 0014).
+        sa.Index(
+            "ix_outbound_messages_queued_owner",
+            "owner_user_id",
+            "lane",
+            "created_at",
+            postgresql_where=sa.text("status = 'queued'"),
+        ),
+        sa.Index(
+            "ix_outbound_messages_sending_owner",
+            "owner_user_id",
+            postgresql_where=sa.text("status = 'sending'"),
+        ),
+        # Idle workers size their LISTEN wait from the next due message (migration 0010).
+        sa.Index(
+            "ix_outbound_messages_queued_not_before",
+            "not_before_at",
+            postgresql_where=sa.text("status = 'queued'"),
+        ),
+        # Inbox thread keyset pages (migration 0020).
+        sa.Index("ix_outbound_messages_customer_created", "customer_id", "created_at", "id"),
+        # Campaign progress counters (migration 0015).
+        sa.Index(
+            "ix_outbound_messages_campaign_status",
+            "campaign_id",
+            "status",
+            postgresql_where=sa.text("campaign_id IS NOT NULL"),
+        ),
+        # Lease reaper scans in-flight rows by expiry (migration 0011).
+        sa.Index(
+            "ix_outbound_messages_sending_lease",
+            "lease_expires_at",
+            postgresql_where=sa.text("status = 'sending'"),
+        ),
+    )
+
+
+class Campaign(Base):
+    """A template sent to a customer segment in one server-side fan-out.
+
+    Messages are created by a single INSERT ... SELECT from customers and
+    reference the campaign (outbound_messages.campaign_id); progress is
+    counted from their statuses.
+    """
+
+    __tablename__ = "campaigns"
+
+    id = sa.Column(sa.UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
+    owner_user_id = sa.Column(sa.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False)
+
+    name = sa.Column(sa.String(200), nullable=False)
+    channel = sa.Column(sa.String(20), nullable=False)
+    template_id = sa.Column(sa.UUID(as_uuid=True), sa.ForeignKey("templates.id"), nullable=False)
+    variables = sa.Column(sa.JSON())
+    # Segment filter as submitted, e.g. {"tag": "implant_interest", "stage": "contacted"}
+    segment = sa.Column(sa.JSON())
+    not_before_at = sa.Column(sa.DateTime(timezone=True))
+
+    # Customers matching the segment, and messages actually queued (consent + contact details).
+    matched_count = sa.Column(sa.Integer(), nullable=False, server_default="0")
+    queued_count = sa.Column(sa.Integer(), nullable=False, server_default="0")
+
+    created_at = sa.Column(sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False)
+    updated_at = sa.Column(sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False)
+
+    __table_args__ = (sa.Index("ix_campaigns_owner_created", "owner_user_id", "created_at"),)
+
+
+class CustomerImport(Base):
+    """One bulk customer upload (POST /customers/import) and its progress."""
+
+    __tablename__ = "customer_imports"
+
+    id = sa.Column(sa.UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
+    owner_user_id = sa.Column(sa.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False)
+
+    filename = sa.Column(sa.String(255))
+    format = sa.Column(sa.String(10), nullable=False)  # csv | ndjson
+    status = sa.Column(sa.String(20), nullable=False, server_default="processing")  # processing|completed|failed
+
+    # processed_rows is updated while the file is still streaming in.
+    processed_rows = sa.Column(sa.Integer(), nullable=False, server_default="0")
+    inserted_count = sa.Column(sa.Integer(), nullable=False, server_default="0")
+    updated_count = sa.Column(sa.Integer(), nullable=False, server_default="0")
+    duplicate_count = sa.Column(sa.Integer(), nullable=False, server_default="0")
+    rejected_count = sa.Column(sa.Integer(), nullable=False, server_default="0")
+    # First rejected rows only: [{"line": 12, "error": "invalid email"}, ...]
+    rejected_rows = sa.Column(sa.JSON())
+    error = sa.Column(sa.Text())
+
+    created_at = sa.Column(sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False)
+    finished_at = sa.Column(sa.DateTime(timezone=True))
+
+    __table_args__ = (sa.Index("ix_customer_imports_owner_created", "owner_user_id", "created_at"),)
+
+
+class CustomerConversationState(Base):
+    """Denormalised inbox state, one row per customer (see app/services/conversation_state.py)."""
+
+    __tablename__ = "customer_conversation_state"
+
+    customer_id = sa.Column(
+        sa.UUID(as_uuid=True), sa.ForeignKey("customers.id", ondelete="CASCADE"), primary_key=True, nullable=False
+    )
+    owner_user_id = sa.Column(sa.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False)
+
+    last_inbound_at = sa.Column(sa.DateTime(timezone=True))
+    last_outbound_at = sa.Column(sa.DateTime(timezone=True))
+    # Time of the latest message; the epoch until there is one (keeps the sort key NOT NULL).
+    activity_at = sa.Column(
+        sa.DateTime(timezone=True), nullable=False, server_default=sa.text("'1970-01-01 00:00:00+00'")
+    )
+    last_message_direction = sa.Column(sa.String(10))
+    last_message_preview = sa.Column(sa.String(200))
+    # Inbound messages since our last outbound one.
+    unread_count = sa.Column(sa.Integer(), nullable=False, server_default="0")
+    # open | waiting | closed (followup_due is applied at read time)
+    bucket = sa.Column(sa.String(20), nullable=False, server_default="open")
+
+    updated_at = sa.Column(sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False)
+
+    __table_args__ = (
+        sa.Index(
+            "ix_customer_conversation_state_owner_bucket_activity",
+            "owner_user_id",
+            "bucket",
+            "activity_at",
+            "customer_id",
+        ),
+    )
+
+
+class RateLimitBucket(Base):
+    """Token bucket shared by all worker processes (see worker/app/ratelimit.py)."""
+
+    __tablename__ = "rate_limit_buckets"
+
+    # e.g. 'whatsapp' or 'email:sender:<owner user id>'
+    key = sa.Column(sa.String(200), primary_key=True, nullable=False)
+    tokens = sa.Column(sa.Float(), nullable=False, server_default="0")
+    refilled_at = sa.Column(sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False)
+
+    # Daily cap accounting (UTC day).
+    day = sa.Column(sa.Date())
+    day_count = sa.Column(sa.Integer(), nullable=False, server_default="0")
+
 
 class Workflow(Base):
     """Simple automation rules (Phase 4C).
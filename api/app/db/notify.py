@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.db.models import OutboundMessage, Template
+
+
+# Postgres LISTEN/NOTIFY channel the worker blocks on (see worker/app/worker.py).
+OUTBOUND_QUEUE_CHANNEL = "outbound_messages"
+# Template edits/deletes; the payload is the template id (worker cache invalidation).
+TEMPLATES_CHANNEL = "templates"
+
+
+def notify_outbound_queued(db: Session) -> None:
+    """Wake idle workers once the current transaction commits.
+
+    NOTIFY is transactional: nothing is delivered on rollback, and repeated
+    notifications within one transaction are collapsed by Postgres.
+    Use this after Core-level inserts that bypass the ORM flush hook below.
+    """
+    db.execute(sa.text("SELECT pg_notify(:channel, '')"), {"channel": OUTBOUND_QUEUE_CHANNEL})
+
+
+@event.listens_for(Session, "after_flush")
+def _notify_on_outbound_insert(session: Session, flush_context) -> None:
+    # session.new still holds the objects inserted by this flush.
+    if any(isinstance(obj, OutboundMessage) for obj in session.new):
+        notify_outbound_queued(session)
+
+
+@event.listens_for(Session, "after_flush")
+def _notify_on_template_change(session: Session, flush_context) -> None:
+    # session.dirty / session.deleted still hold this flush's updates and deletes.
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, Template):
+            session.execute(
+                sa.text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": TEMPLATES_CHANNEL, "payload": str(obj.id)},
+            )
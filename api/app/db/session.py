@@ -4,6 +4,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db import notify  # noqa: F401  (registers the outbound queue NOTIFY hook)
+from app.services import conversation_state  # noqa: F401  (registers the inbox state hook)
 
 engine = create_engine(settings.database_url, pool_pre_ping=True)
 
@@ -8,6 +8,7 @@ from starlette.responses import Response
 
 from app.api.router import api_router
 from app.core.config import settings
+from app.services.pagination import NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER
 
 app = FastAPI(title="Minimal CRM API", version=os.getenv("APP_VERSION", "0.0.0"))
 
@@ -21,6 +22,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset-paginated list endpoints return the next page cursor in a header.
+    expose_headers=[NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER],
 )
 
 # Some environments (reverse proxies / certain dev setups) can still surface
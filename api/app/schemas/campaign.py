@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+CampaignChannel = Literal["whatsapp", "email"]
+
+
+class CampaignSegment(BaseModel):
+    """Which of the owner's customers receive the campaign (all filters must match)."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    tag: Optional[str] = Field(default=None, max_length=80)
+    stage: Optional[str] = Field(default=None, max_length=40)
+    language: Optional[str] = Field(default=None, max_length=10)
+
+
+class CampaignCreate(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    name: str = Field(min_length=1, max_length=200)
+    channel: CampaignChannel = "whatsapp"
+    template_id: UUID
+    # Same for every recipient; customer_name / company are filled per customer by the worker.
+    variables: Optional[Dict[str, Any]] = None
+    segment: CampaignSegment = Field(default_factory=CampaignSegment)
+
+    # Optional scheduling: worker will only send after this timestamp (UTC).
+    not_before_at: Optional[datetime] = None
+    cancel_on_inbound: bool = False
+
+
+class CampaignProgress(BaseModel):
+    queued: int = 0
+    sending: int = 0
+    sent: int = 0
+    failed: int = 0
+    cancelled: int = 0
+
+
+class CampaignOut(BaseModel):
+    id: UUID
+    name: str
+    channel: CampaignChannel
+    template_id: UUID
+    variables: Optional[dict] = None
+    segment: Optional[dict] = None
+    not_before_at: Optional[datetime] = None
+
+    # Customers in the segment / messages queued (skipped = no consent or no phone/email).
+    matched_count: int
+    queued_count: int
+    skipped_count: int
+    progress: CampaignProgress
+
+    created_at: datetime
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class RejectedRow(BaseModel):
+    line: int
+    error: str
+
+
+class CustomerImportOut(BaseModel):
+    id: UUID
+    filename: Optional[str] = None
+    format: str
+    status: str  # processing | completed | failed
+
+    processed_rows: int
+    inserted_count: int
+    updated_count: int
+    duplicate_count: int
+    rejected_count: int
+    # First rejected rows only; rejected_count is the full total.
+    rejected_rows: list[RejectedRow] = []
+    error: Optional[str] = None
+
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -20,6 +20,9 @@ class InboxCustomerOut(BaseModel):
     last_outbound_at: datetime | None = None
     last_activity_at: datetime | None = None
     last_activity_direction: str | None = None
+    last_message_preview: str | None = None
+    # Inbound messages since our last reply.
+    unread_count: int = 0
     bucket: str
 
 
@@ -9,6 +9,7 @@ from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 OutboundChannel = Literal["whatsapp", "sms", "email"]
 OutboundStatus = Literal["queued", "sending", "sent", "failed", "cancelled"]
+OutboundLane = Literal["interactive", "automation", "marketing"]
 
 
 class OutboundMessageCreate(BaseModel):
@@ -30,6 +31,9 @@ class OutboundMessageCreate(BaseModel):
     # Phase 4C: if true, queued messages will be cancelled when an inbound reply arrives.
     cancel_on_inbound: bool = False
 
+    # Worker priority lane. Default: interactive, or marketing for marketing templates.
+    lane: Optional[OutboundLane] = None
+
     @model_validator(mode="after")
     def validate_payload(self):
         if self.template_id is None and (self.body is None or not self.body.strip()):
@@ -44,6 +48,7 @@ class OutboundMessageOut(BaseModel):
     customer_id: UUID
     channel: OutboundChannel
     status: OutboundStatus
+    lane: OutboundLane = "interactive"
     template_id: Optional[UUID] = None
     body: Optional[str] = None
     variables: Optional[dict] = None
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.db.models import Customer, OutboundMessage, Template, Workflow
+from app.services.outbound_lanes import LANE_AUTOMATION, resolve_lane
 from app.services.tags import add_tag_to_customer
 
 
@@ -102,6 +103,7 @@ def enqueue_outbound_message(
     variables: dict[str, Any] | None = None,
     delay_minutes: int | None = None,
     cancel_on_inbound: bool = False,
+    lane: str | None = None,
 ) -> OutboundMessage:
     not_before = None
     if delay_minutes is not None and delay_minutes > 0:
@@ -112,6 +114,7 @@ def enqueue_outbound_message(
         customer_id=customer_id,
         channel=channel,
         status="queued",
+        lane=lane or resolve_lane(db, default=LANE_AUTOMATION, template_id=template_id),
         template_id=template_id,
         body=body,
         variables=variables,
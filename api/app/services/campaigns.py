@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.db.models import Campaign, Customer, CustomerTag, OutboundMessage, Tag
+from app.db.notify import notify_outbound_queued
+from app.services.outbound_lanes import LANE_MARKETING
+
+
+def _segment_filters(campaign: Campaign) -> list:
+    segment = campaign.segment or {}
+    filters = [Customer.owner_user_id == campaign.owner_user_id]
+    if segment.get("stage"):
+        filters.append(Customer.stage == segment["stage"])
+    if segment.get("language"):
+        filters.append(Customer.language == segment["language"])
+    if segment.get("tag"):
+        filters.append(
+            sa.exists()
+            .where(CustomerTag.customer_id == Customer.id)
+            .where(CustomerTag.tag_id == Tag.id)
+            .where(Tag.owner_user_id == campaign.owner_user_id)
+            .where(Tag.name == segment["tag"].strip())
+        )
+    return filters
+
+
+def _reachable(channel: str):
+    contact = Customer.phone if channel == "whatsapp" else Customer.email
+    return sa.and_(Customer.can_contact.is_(True), sa.func.coalesce(sa.func.trim(contact), "") != "")
+
+
+def enqueue_campaign(db: Session, campaign: Campaign, *, cancel_on_inbound: bool = False) -> None:
+    """Queue one outbound message per reachable customer in the campaign's segment.
+
+    A single INSERT ... SELECT from customers, so the cost doesn't grow with
+    HTTP round trips. Customers without consent (can_contact=false) or without
+    a phone/email for the channel are counted but skipped. Campaign messages
+    go to the marketing lane so they never hold up interactive sends.
+    Caller commits.
+    """
+    filters = _segment_filters(campaign)
+    campaign.matched_count = db.query(sa.func.count(Customer.id)).filter(*filters).scalar() or 0
+
+    uuid_type = sa.UUID(as_uuid=True)
+    select = sa.select(
+        sa.func.gen_random_uuid(),
+        sa.literal(campaign.owner_user_id, uuid_type),
+        Customer.id,
+        sa.literal(campaign.channel),
+        sa.literal("queued"),
+        sa.literal(LANE_MARKETING),
+        sa.literal(campaign.template_id, uuid_type),
+        sa.literal(campaign.variables, sa.JSON()) if campaign.variables is not None else sa.null(),
+        sa.literal(campaign.not_before_at, sa.DateTime(timezone=True)),
+        sa.literal(bool(cancel_on_inbound)),
+        sa.literal(campaign.id, uuid_type),
+    ).where(*filters, _reachable(campaign.channel))
+
+    result = db.execute(
+        sa.insert(OutboundMessage.__table__).from_select(
+            [
+                "id",
+                "owner_user_id",
+                "customer_id",
+                "channel",
+                "status",
+                "lane",
+                "template_id",
+                "variables",
+                "not_before_at",
+                "cancel_on_inbound",
+                "campaign_id",
+            ],
+            select,
+        ),
+        # SQLAlchemy only keeps rowcount for UPDATE/DELETE unless asked.
+        execution_options={"preserve_rowcount": True},
+    )
+    campaign.queued_count = result.rowcount or 0
+    if campaign.queued_count:
+        # Core insert: the ORM flush hook doesn't see these rows.
+        notify_outbound_queued(db)
@@ -0,0 +1,235 @@
+"""Per-customer conversation state for the inbox (customer_conversation_state).
+
+One row per customer with the last inbound/outbound times, a preview of the
+latest message, the number of inbound messages since our last reply and the
+message-derived bucket (open / waiting, or closed from the customer's stage).
+`followup_due` depends on the clock and is applied when the inbox is read.
+
+Rows are kept up to date by the after_flush hook below (customers created or
+re-staged and interactions recorded through the ORM: webhook,
+create_interaction, email sends), by the worker's write-back
+(worker/app/conversation_state.py) and by the bulk import. If they ever drift,
+rebuild them:
+
+    python -m app.services.conversation_state [--owner USER_ID]
+"""
+
+from __future__ import annotations
+
+import argparse
+from typing import Any, Iterable
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db.models import Customer, Interaction
+
+
+PREVIEW_LENGTH = 200
+
+
+def bucket_sql(stage: str, last_in: str, last_out: str) -> str:
+    """SQL CASE for the stored bucket, given column expressions."""
+    return (
+        f"CASE WHEN {stage} LIKE 'closed%' THEN 'closed' "
+        f"WHEN {last_out} IS NOT NULL AND ({last_in} IS NULL OR {last_out} >= {last_in}) THEN 'waiting' "
+        "ELSE 'open' END"
+    )
+
+
+# Apply new messages. `e` has at most one row per customer (the latest message
+# in the batch); out-of-order messages only move the timestamps they exceed.
+# Kept in sync with worker/app/conversation_state.py.
+_RECORD_MESSAGES_SQL = """
+INSERT INTO customer_conversation_state AS s
+    (customer_id, owner_user_id, last_inbound_at, last_outbound_at, activity_at,
+     last_message_direction, last_message_preview, unread_count, bucket, updated_at)
+SELECT c.id, c.owner_user_id,
+       CASE WHEN e.direction = 'inbound' THEN e.occurred_at END,
+       CASE WHEN e.direction = 'outbound' THEN e.occurred_at END,
+       e.occurred_at, e.direction, left(e.preview, {preview_length}),
+       CASE WHEN e.direction = 'inbound' THEN 1 ELSE 0 END,
+       CASE WHEN c.stage LIKE 'closed%' THEN 'closed' WHEN e.direction = 'outbound' THEN 'waiting' ELSE 'open' END,
+       now()
+FROM ({source}) AS e
+JOIN customers c ON c.id = e.customer_id
+ON CONFLICT (customer_id) DO UPDATE SET
+    last_inbound_at = GREATEST(s.last_inbound_at, EXCLUDED.last_inbound_at),
+    last_outbound_at = GREATEST(s.last_outbound_at, EXCLUDED.last_outbound_at),
+    activity_at = GREATEST(s.activity_at, EXCLUDED.activity_at),
+    last_message_direction = CASE WHEN EXCLUDED.activity_at >= s.activity_at
+        THEN EXCLUDED.last_message_direction ELSE s.last_message_direction END,
+    last_message_preview = CASE WHEN EXCLUDED.activity_at >= s.activity_at
+        THEN EXCLUDED.last_message_preview ELSE s.last_message_preview END,
+    unread_count = CASE
+        WHEN EXCLUDED.last_inbound_at IS NOT NULL THEN s.unread_count
+            + CASE WHEN s.last_outbound_at IS NULL OR EXCLUDED.last_inbound_at > s.last_outbound_at THEN 1 ELSE 0 END
+        WHEN EXCLUDED.last_outbound_at >= COALESCE(s.last_inbound_at, EXCLUDED.last_outbound_at) THEN 0
+        ELSE s.unread_count
+    END,
+    bucket = CASE
+        WHEN EXCLUDED.bucket = 'closed' THEN 'closed'
+        WHEN GREATEST(s.last_outbound_at, EXCLUDED.last_outbound_at)
+             >= COALESCE(GREATEST(s.last_inbound_at, EXCLUDED.last_inbound_at), CAST('-infinity' AS timestamptz))
+            THEN 'waiting'
+        ELSE 'open'
+    END,
+    updated_at = now()
+"""
+
+_REBUILD_SQL = f"""
+INSERT INTO customer_conversation_state
+    (customer_id, owner_user_id, last_inbound_at, last_outbound_at, activity_at,
+     last_message_direction, last_message_preview, unread_count, bucket, updated_at)
+SELECT c.id, c.owner_user_id, li.at, lo.at,
+       COALESCE(last.occurred_at, CAST('1970-01-01 00:00:00+00' AS timestamptz)),
+       last.direction, left(COALESCE(last.content, last.subject), {PREVIEW_LENGTH}),
+       unread.n,
+       {bucket_sql("c.stage", "li.at", "lo.at")},
+       now()
+FROM customers c
+CROSS JOIN LATERAL (
+    SELECT max(occurred_at) AS at FROM interactions WHERE customer_id = c.id AND direction = 'inbound'
+) li
+CROSS JOIN LATERAL (
+    SELECT max(occurred_at) AS at FROM interactions WHERE customer_id = c.id AND direction = 'outbound'
+) lo
+LEFT JOIN LATERAL (
+    SELECT occurred_at, CAST(direction AS varchar) AS direction, content, subject
+    FROM interactions
+    WHERE customer_id = c.id
+    ORDER BY occurred_at DESC, id DESC
+    LIMIT 1
+) last ON true
+CROSS JOIN LATERAL (
+    SELECT count(*) AS n
+    FROM interactions
+    WHERE customer_id = c.id AND direction = 'inbound' AND (lo.at IS NULL OR occurred_at > lo.at)
+) unread
+WHERE CAST(:owner AS uuid) IS NULL OR c.owner_user_id = CAST(:owner AS uuid)
+"""
+
+
+def ensure_states(db: Session | Connection, customer_ids: Iterable[Any]) -> None:
+    """Create the (empty) state row for new customers."""
+    ids = [str(i) for i in customer_ids]
+    if not ids:
+        return
+    db.execute(
+        text(
+            f"""
+            INSERT INTO customer_conversation_state (customer_id, owner_user_id, bucket)
+            SELECT id, owner_user_id, {bucket_sql("stage", "NULL", "NULL")}
+            FROM customers
+            WHERE id = ANY(CAST(:ids AS uuid[]))
+            ON CONFLICT (customer_id) DO NOTHING
+            """
+        ),
+        {"ids": ids},
+    )
+
+
+def refresh_buckets(db: Session | Connection, customer_ids: Iterable[Any]) -> None:
+    """Recompute the bucket after a stage change (closed or reopened)."""
+    ids = [str(i) for i in customer_ids]
+    if not ids:
+        return
+    db.execute(
+        text(
+            f"""
+            UPDATE customer_conversation_state AS s
+            SET bucket = {bucket_sql("c.stage", "s.last_inbound_at", "s.last_outbound_at")},
+                updated_at = now()
+            FROM customers c
+            WHERE c.id = s.customer_id AND s.customer_id = ANY(CAST(:ids AS uuid[]))
+            """
+        ),
+        {"ids": ids},
+    )
+
+
+def record_message(
+    db: Session | Connection,
+    *,
+    customer_id: Any,
+    direction: str,
+    occurred_at: Any = None,
+    preview: str | None = None,
+) -> None:
+    """Apply one inbound/outbound message (occurred_at None means now())."""
+    source = (
+        "SELECT CAST(:customer_id AS uuid) AS customer_id, CAST(:direction AS varchar) AS direction, "
+        "COALESCE(CAST(:occurred_at AS timestamptz), now()) AS occurred_at, CAST(:preview AS text) AS preview"
+    )
+    db.execute(
+        text(_RECORD_MESSAGES_SQL.format(source=source, preview_length=PREVIEW_LENGTH)),
+        {"customer_id": str(customer_id), "direction": direction, "occurred_at": occurred_at, "preview": preview},
+    )
+
+
+def rebuild(db: Session | Connection, *, owner_user_id: UUID | None = None) -> int:
+    """Recompute every state row (or one owner's) from customers and interactions.
+
+    Takes a lock that blocks concurrent state updates until the caller
+    commits, so no message recorded meanwhile is lost.
+    """
+    db.execute(text("LOCK TABLE customer_conversation_state IN SHARE ROW EXCLUSIVE MODE"))
+    params = {"owner": str(owner_user_id) if owner_user_id else None}
+    db.execute(
+        text(
+            "DELETE FROM customer_conversation_state "
+            "WHERE CAST(:owner AS uuid) IS NULL OR owner_user_id = CAST(:owner AS uuid)"
+        ),
+        params,
+    )
+    return db.execute(text(_REBUILD_SQL), params, execution_options={"preserve_rowcount": True}).rowcount
+
+
+@event.listens_for(Session, "after_flush")
+def _track_conversation_state(session: Session, flush_context) -> None:
+    # session.new / session.dirty still hold this flush's objects and history.
+    new_customers = [obj.id for obj in session.new if isinstance(obj, Customer)]
+    ensure_states(session, new_customers)
+
+    restaged = [
+        obj.id
+        for obj in session.dirty
+        if isinstance(obj, Customer) and sa.inspect(obj).attrs.stage.history.has_changes()
+    ]
+    refresh_buckets(session, restaged)
+
+    messages: list[dict[str, Any]] = []
+    for obj in session.new:
+        if isinstance(obj, Interaction):
+            # Server-default columns aren't loaded after the flush; read what was set.
+            values = sa.inspect(obj).dict
+            messages.append(
+                {
+                    "customer_id": values.get("customer_id"),
+                    "direction": values.get("direction"),
+                    "occurred_at": values.get("occurred_at"),
+                    "preview": values.get("content") or values.get("subject"),
+                }
+            )
+    for message in messages:
+        record_message(session, **message)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild customer_conversation_state from interactions.")
+    parser.add_argument("--owner", type=UUID, default=None, help="only rebuild this user's customers")
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        n = rebuild(db, owner_user_id=args.owner)
+        db.commit()
+    print(f"rebuilt conversation state for {n} customers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import re
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Iterator, Mapping
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import CustomerImport
+from app.services.conversation_state import bucket_sql
+from app.services.phone import normalise_phone, phone_sql
+
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Only this many rejected rows are kept on the import record (the count is exact).
+REJECTED_SAMPLE_SIZE = 100
+# How often processed_rows is committed while the upload is still streaming.
+PROGRESS_EVERY_ROWS = 5000
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# Column limits from the customers table.
+_MAX_LENGTHS = {"name": 200, "email": 320, "phone": 50, "company": 200, "language": 10, "stage": 40}
+_TRUE = {"true", "t", "yes", "y", "1"}
+_FALSE = {"false", "f", "no", "n", "0"}
+
+# SQL forms of normalise_phone / normalise_email, applied to existing customers.
+_PHONE_NORM_SQL = phone_sql("phone")
+_EMAIL_NORM_SQL = "NULLIF(lower(btrim(email)), '')"
+
+
+class CustomerImportError(ValueError):
+    """The upload can't be read at all (encoding, broken CSV, missing columns)."""
+
+
+def normalise_email(value: str | None) -> str | None:
+    cleaned = (value or "").strip().lower()
+    return cleaned or None
+
+
+def detect_format(filename: str | None, content_type: str | None) -> str | None:
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in ctype or "jsonl" in ctype:
+        return "ndjson"
+    if name.endswith(".csv") or "csv" in ctype:
+        return "csv"
+    return None
+
+
+def _iter_records(fileobj: BinaryIO, fmt: str) -> Iterator[tuple[int, Mapping[str, Any] | None, str | None]]:
+    """Yield (line number, record, parse error) one row at a time."""
+    stream = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(stream)
+            header = [(f or "").strip().lower() for f in (reader.fieldnames or [])]
+            if "phone" not in header and "email" not in header:
+                raise CustomerImportError("CSV header must include a phone or email column")
+            reader.fieldnames = header
+            for record in reader:
+                yield reader.line_num, record, None
+        else:
+            for line_no, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield line_no, None, "invalid JSON"
+                    continue
+                if not isinstance(record, dict):
+                    yield line_no, None, "expected a JSON object"
+                    continue
+                yield line_no, record, None
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise CustomerImportError(f"Could not read file: {e}") from e
+    finally:
+        # Leave the upload itself open for the caller.
+        stream.detach()
+
+
+def _clean_record(record: Mapping[str, Any]) -> tuple[tuple | None, str | None]:
+    """Validate one record; returns (staging row without line number, error)."""
+    values: dict[str, Any] = {}
+    for field in ("name", "email", "phone", "company", "language", "stage"):
+        raw = record.get(field)
+        value = str(raw).strip() if raw is not None else ""
+        values[field] = value or None
+
+    values["email"] = normalise_email(values["email"])
+    values["phone"] = normalise_phone(values["phone"])
+    if values["email"] is None and values["phone"] is None:
+        return None, "missing phone and email"
+    if values["email"] is not None and not _EMAIL_RE.match(values["email"]):
+        return None, "invalid email"
+    if values["phone"] is not None and sum(ch.isdigit() for ch in values["phone"]) < 6:
+        return None, "invalid phone"
+    for field, limit in _MAX_LENGTHS.items():
+        if values[field] is not None and len(values[field]) > limit:
+            return None, f"{field} longer than {limit} characters"
+
+    raw_consent = record.get("can_contact")
+    can_contact: bool | None
+    if raw_consent is None or isinstance(raw_consent, bool):
+        can_contact = raw_consent
+    elif str(raw_consent).strip().lower() in _TRUE:
+        can_contact = True
+    elif str(raw_consent).strip().lower() in _FALSE:
+        can_contact = False
+    elif not str(raw_consent).strip():
+        can_contact = None
+    else:
+        return None, "invalid can_contact"
+
+    return (
+        values["name"],
+        values["email"],
+        values["phone"],
+        values["company"],
+        values["language"],
+        values["stage"],
+        can_contact,
+    ), None
+
+
+def _report_progress(engine: Engine, import_id, *, processed: int, rejected: int) -> None:
+    # Separate short transaction so GET /customers/imports/{id} sees it mid-upload.
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE customer_imports SET processed_rows = :p, rejected_count = :r WHERE id = :id"),
+            {"p": processed, "r": rejected, "id": import_id},
+        )
+
+
+def _copy_to_staging(db: Session, imp: CustomerImport, fileobj: BinaryIO) -> tuple[int, int, list[dict]]:
+    # Read before COPY starts: the connection can't run other queries (e.g. an
+    # expired-attribute refresh) until the COPY is finished.
+    import_id, fmt, engine = imp.id, imp.format, db.get_bind()
+    conn = db.connection()
+    conn.execute(
+        text(
+            """
+            CREATE TEMP TABLE customer_import_rows (
+                line_no integer NOT NULL,
+                name text,
+                email text,
+                phone text,
+                company text,
+                language text,
+                stage text,
+                can_contact boolean,
+                customer_id uuid
+            ) ON COMMIT DROP
+            """
+        )
+    )
+
+    processed = rejected = 0
+    sample: list[dict] = []
+    raw = conn.connection.driver_connection
+    with raw.cursor() as cur, cur.copy(
+        "COPY customer_import_rows (line_no, name, email, phone, company, language, stage, can_contact) FROM STDIN"
+    ) as copy:
+        for line_no, record, error in _iter_records(fileobj, fmt):
+            processed += 1
+            row = None
+            if error is None:
+                row, error = _clean_record(record)
+            if error is not None:
+                rejected += 1
+                if len(sample) < REJECTED_SAMPLE_SIZE:
+                    sample.append({"line": line_no, "error": error})
+            else:
+                copy.write_row((line_no, *row))
+            if processed % PROGRESS_EVERY_ROWS == 0:
+                _report_progress(engine, import_id, processed=processed, rejected=rejected)
+    return processed, rejected, sample
+
+
+def _merge_staging(db: Session, owner_user_id) -> tuple[int, int, int]:
+    """Dedupe and upsert the staged rows; returns (inserted, updated, duplicates)."""
+    params = {"owner": owner_user_id, "country_code": settings.default_country_code}
+
+    def run(sql: str) -> int:
+        # SQLAlchemy only keeps rowcount for UPDATE/DELETE unless asked.
+        return db.execute(text(sql), params, execution_options={"preserve_rowcount": True}).rowcount
+
+    # Temp tables are never auto-analyzed; the joins below need real row counts.
+    db.execute(text("ANALYZE customer_import_rows"))
+    # One import at a time per owner, so two uploads can't both insert the same lead.
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext('customer_import:' || CAST(:owner AS text)))"), params)
+
+    # Same phone, then same email, twice in the file: the last row wins.
+    duplicates = 0
+    for key in ("phone", "email"):
+        duplicates += run(
+            f"""
+            DELETE FROM customer_import_rows s
+            USING (
+                SELECT line_no, row_number() OVER (PARTITION BY {key} ORDER BY line_no DESC) AS rn
+                FROM customer_import_rows
+                WHERE {key} IS NOT NULL
+            ) d
+            WHERE s.line_no = d.line_no AND d.rn > 1
+            """
+        )
+
+    # Match existing customers on phone first, then email (oldest customer wins).
+    run(
+        f"""
+        UPDATE customer_import_rows s
+        SET customer_id = COALESCE(p.id, e.id)
+        FROM customer_import_rows s2
+        LEFT JOIN (
+            SELECT DISTINCT ON (norm) norm, id
+            FROM (SELECT {_PHONE_NORM_SQL} AS norm, id, created_at FROM customers WHERE owner_user_id = :owner) c
+            WHERE norm IS NOT NULL
+            ORDER BY norm, created_at
+        ) p ON p.norm = s2.phone
+        LEFT JOIN (
+            SELECT DISTINCT ON (norm) norm, id
+            FROM (SELECT {_EMAIL_NORM_SQL} AS norm, id, created_at FROM customers WHERE owner_user_id = :owner) c
+            WHERE norm IS NOT NULL
+            ORDER BY norm, created_at
+        ) e ON e.norm = s2.email
+        WHERE s.line_no = s2.line_no AND COALESCE(p.id, e.id) IS NOT NULL
+        """
+    )
+
+    # Different rows that resolved to the same customer (one by phone, one by email).
+    duplicates += run(
+        """
+        DELETE FROM customer_import_rows s
+        USING (
+            SELECT line_no, row_number() OVER (PARTITION BY customer_id ORDER BY line_no DESC) AS rn
+            FROM customer_import_rows
+            WHERE customer_id IS NOT NULL
+        ) d
+        WHERE s.line_no = d.line_no AND d.rn > 1
+        """
+    )
+
+    # Blank cells never overwrite existing values, and an import can opt a
+    # customer out but never back in.
+    updated = run(
+        """
+        UPDATE customers c
+        SET name = COALESCE(s.name, c.name),
+            email = COALESCE(s.email, c.email),
+            phone = COALESCE(s.phone, c.phone),
+            company = COALESCE(s.company, c.company),
+            language = COALESCE(s.language, c.language),
+            stage = COALESCE(s.stage, c.stage),
+            can_contact = c.can_contact AND COALESCE(s.can_contact, true),
+            updated_at = now()
+        FROM customer_import_rows s
+        WHERE c.id = s.customer_id AND c.owner_user_id = :owner
+        """
+    )
+
+    # Stage changes can close or reopen an existing conversation.
+    run(
+        f"""
+        UPDATE customer_conversation_state AS st
+        SET bucket = {bucket_sql("c.stage", "st.last_inbound_at", "st.last_outbound_at")}, updated_at = now()
+        FROM customer_import_rows s
+        JOIN customers c ON c.id = s.customer_id
+        WHERE st.customer_id = s.customer_id AND s.stage IS NOT NULL
+        """
+    )
+
+    # New customers get their (empty) inbox state row in the same statement.
+    inserted = run(
+        f"""
+        WITH inserted AS (
+            INSERT INTO customers (id, owner_user_id, name, email, phone, company, language, stage, can_contact)
+            SELECT gen_random_uuid(), :owner, COALESCE(name, email, phone), email, phone, company, language,
+                   COALESCE(stage, 'new'), COALESCE(can_contact, true)
+            FROM customer_import_rows
+            WHERE customer_id IS NULL
+            ORDER BY line_no
+            RETURNING id, owner_user_id, stage
+        )
+        INSERT INTO customer_conversation_state (customer_id, owner_user_id, bucket)
+        SELECT id, owner_user_id, {bucket_sql("stage", "NULL", "NULL")}
+        FROM inserted
+        """
+    )
+    return inserted, updated, duplicates
+
+
+def run_import(db: Session, imp: CustomerImport, fileobj: BinaryIO) -> None:
+    """Stream an uploaded CSV/NDJSON file into the owner's customers.
+
+    Rows are validated one at a time and streamed with COPY into a temp
+    staging table, so memory use doesn't depend on the file size. Staged rows
+    are then deduped on normalised phone/email and upserted against existing
+    customers in a few set-based statements. Raises CustomerImportError if
+    the file can't be read. Caller commits.
+    """
+    processed, rejected, sample = _copy_to_staging(db, imp, fileobj)
+    inserted, updated, duplicates = _merge_staging(db, imp.owner_user_id)
+
+    imp.processed_rows = processed
+    imp.rejected_count = rejected
+    imp.rejected_rows = sample
+    imp.inserted_count = inserted
+    imp.updated_count = updated
+    imp.duplicate_count = duplicates
+    imp.status = "completed"
+    imp.finished_at = datetime.now(tz=timezone.utc)
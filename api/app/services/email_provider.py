@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-import smtplib
+import threading
 import uuid
 from dataclasses import dataclass
 from email.message import EmailMessage
 from typing import Protocol
 
+from app.services.smtp_pool import SmtpConnectionPool, smtp_connect_factory
+
 
 class EmailProvider(Protocol):
     def send_email(self, *, to_email: str, subject: str, body: str) -> str:
@@ -29,6 +31,9 @@ class SmtpEmailProvider:
     from_email: str
     from_name: str | None = None
     use_starttls: bool = True
+    pool_size: int = 4
+    idle_timeout_seconds: float = 60.0
+    max_messages_per_connection: int = 100
 
     def send_email(self, *, to_email: str, subject: str, body: str) -> str:
         if not self.host:
@@ -52,19 +57,40 @@ class SmtpEmailProvider:
         msg.set_content(_strip_html_fallback(body))
         msg.add_alternative(body, subtype="html")
 
-        # Gmail SMTP: typically port 587 + STARTTLS.
-        with smtplib.SMTP(self.host, self.port, timeout=30) as server:
-            server.ehlo()
-            if self.use_starttls:
-                server.starttls()
-                server.ehlo()
-            server.login(self.username, self.password)
-            server.send_message(msg)
+        # Gmail SMTP: typically port 587 + STARTTLS. Sessions are pooled per
+        # account so consecutive sends skip the connect/TLS/AUTH handshake.
+        _get_pool(self).send_message(msg)
 
         # SMTP doesn't reliably return a provider message id.
         return f"smtp-{uuid.uuid4()}"
 
 
+_POOLS: dict[tuple, SmtpConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _get_pool(provider: SmtpEmailProvider) -> SmtpConnectionPool:
+    # Providers are cheap per-request objects; the pool outlives them.
+    key = (provider.host, provider.port, provider.username, provider.password, provider.use_starttls)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = SmtpConnectionPool(
+                smtp_connect_factory(
+                    host=provider.host,
+                    port=provider.port,
+                    username=provider.username,
+                    password=provider.password,
+                    use_starttls=provider.use_starttls,
+                ),
+                max_size=provider.pool_size,
+                idle_timeout=provider.idle_timeout_seconds,
+                max_messages_per_connection=provider.max_messages_per_connection,
+            )
+            _POOLS[key] = pool
+        return pool
+
+
 def _strip_html_fallback(html: str) -> str:
     # Very small fallback for clients that only show plain text.
     # Keeps this dependency-free (no BeautifulSoup).
@@ -78,7 +104,9 @@ def _strip_html_fallback(html: str) -> str:
 
 
 def get_email_provider(*, provider: str, smtp_host: str, smtp_port: int, smtp_username: str, smtp_password: str,
-                       smtp_from_email: str, smtp_from_name: str, smtp_use_starttls: bool) -> EmailProvider:
+                       smtp_from_email: str, smtp_from_name: str, smtp_use_starttls: bool,
+                       smtp_pool_size: int = 4, smtp_idle_timeout_seconds: float = 60.0,
+                       smtp_max_messages_per_connection: int = 100) -> EmailProvider:
     provider = (provider or "fake").lower()
     if provider == "smtp":
         return SmtpEmailProvider(
@@ -89,6 +117,9 @@ def get_email_provider(*, provider: str, smtp_host: str, smtp_port: int, smtp_us
             from_email=smtp_from_email,
             from_name=smtp_from_name or None,
             use_starttls=smtp_use_starttls,
+            pool_size=smtp_pool_size,
+            idle_timeout_seconds=smtp_idle_timeout_seconds,
+            max_messages_per_connection=smtp_max_messages_per_connection,
         )
     if provider == "fake":
         return FakeEmailProvider()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterator
+from uuid import UUID
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
+
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+# Rows fetched per server-side cursor round trip, and written per chunk.
+EXPORT_BATCH_ROWS = 1000
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        # Lower case, as accepted by POST /customers/import.
+        return "true" if value else "false"
+    if isinstance(value, (list, tuple)):
+        return ";".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value, default=str)
+    return _json_value(value)
+
+
+def export_headers(name: str, fmt: str) -> dict[str, str]:
+    return {"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+
+
+def iter_export(engine: Engine, stmt: Select, *, fmt: str) -> Iterator[str]:
+    """Yield `stmt`'s rows as CSV (with a header) or NDJSON, one chunk per batch.
+
+    Runs on its own connection with a server-side cursor, so only one batch
+    is held in memory and the first bytes go out as soon as Postgres returns
+    the first rows. Meant to be wrapped in a StreamingResponse (the request's
+    session is already closed by the time the body is sent).
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_ROWS).execute(stmt)
+        columns = list(result.keys())
+
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(columns)
+            yield buf.getvalue()
+            for batch in result.partitions():
+                buf.seek(0)
+                buf.truncate()
+                writer.writerows([_csv_value(v) for v in row] for row in batch)
+                yield buf.getvalue()
+        else:
+            for batch in result.partitions():
+                yield "".join(
+                    json.dumps({c: _json_value(v) for c, v in zip(columns, row)}, default=str) + "\n"
+                    for row in batch
+                )
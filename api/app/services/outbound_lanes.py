@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.db.models import Template
+
+
+# Worker claim lanes (see WORKER_LANE_WEIGHTS in worker/app/worker.py).
+LANE_INTERACTIVE = "interactive"  # coordinator sends from the inbox / API
+LANE_AUTOMATION = "automation"  # workflow actions
+LANE_MARKETING = "marketing"  # bulk / marketing-category templates
+
+
+def resolve_lane(db: Session, *, default: str, template_id: UUID | None = None) -> str:
+    """Lane for a new outbound message.
+
+    Marketing-category templates always go to the marketing lane; anything
+    else stays in the caller's lane.
+    """
+    if template_id is None:
+        return default
+    category = db.query(Template.category).filter(Template.id == template_id).scalar()
+    return LANE_MARKETING if category == "marketing" else default
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Sequence
+from uuid import UUID
+
+
+# List endpoints keep returning plain JSON lists; the cursor for the next page
+# (when there may be one) is sent in this response header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Endpoints that page both ways (the inbox thread) also send a cursor for the
+# other end of the page.
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+_PARSERS = {datetime: datetime.fromisoformat, UUID: UUID, int: int, str: str}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque keyset cursor for the sort key of the last row on a page."""
+    plain = [v.isoformat() if isinstance(v, datetime) else (str(v) if isinstance(v, UUID) else v) for v in values]
+    raw = json.dumps(plain, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> list[Any]:
+    """Inverse of encode_cursor; `types` gives the expected type of each value (None is allowed)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong length")
+        return [None if v is None else _PARSERS[t](v) for t, v in zip(types, values)]
+    except Exception as e:
+        raise InvalidCursor("Invalid cursor") from e
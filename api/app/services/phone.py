@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import re
+
+from app.core.config import settings
+
+
+_WHATSAPP_PREFIX_RE = re.compile(r"^\s*whatsapp:", re.IGNORECASE)
+_NON_DIGIT_RE = re.compile(r"[^0-9]")
+
+
+def normalise_phone(value: str | None, *, country_code: str | None = None) -> str | None:
+    """Normalise a phone number to the E.164-like form customers are stored with.
+
+    'whatsapp:+44 7700-900123' -> '+447700900123'; local numbers lose one
+    leading 0 and get DEFAULT_COUNTRY_CODE: '07700 900123' -> '+447700900123'.
+    The Twilio webhook stores inbound senders this way and the bulk import
+    matches on it, so one number is one customer. phone_sql() is the same
+    rule in SQL.
+    """
+    v = _WHATSAPP_PREFIX_RE.sub("", value or "").strip()
+    digits = _NON_DIGIT_RE.sub("", v)
+    if v.startswith("+"):
+        return f"+{digits}" if digits else None
+    if digits.startswith("0"):
+        digits = digits[1:]
+    if not digits:
+        return None
+    return f"{country_code or settings.default_country_code}{digits}"
+
+
+def phone_sql(column: str, country_code_param: str = "country_code") -> str:
+    """SQL expression applying normalise_phone to `column`.
+
+    The country code comes from the bind parameter `country_code_param`
+    (pass settings.default_country_code).
+    """
+    v = f"btrim(regexp_replace({column}, '^\\s*whatsapp:', '', 'i'))"
+    digits = f"regexp_replace({v}, '[^0-9]', '', 'g')"
+    return (
+        f"CASE WHEN left({v}, 1) = '+' THEN '+' || NULLIF({digits}, '') "
+        f"ELSE CAST(:{country_code_param} AS text) || NULLIF(regexp_replace({digits}, '^0', ''), '') END"
+    )
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import smtplib
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from typing import Callable
+
+
+# Errors that mean the connection itself is gone (as opposed to the server
+# rejecting this particular message).
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def smtp_connect_factory(
+    *,
+    host: str,
+    port: int,
+    username: str | None,
+    password: str | None,
+    use_starttls: bool = True,
+    timeout: float = 30,
+) -> Callable[[], smtplib.SMTP]:
+    """Return a callable that opens an authenticated SMTP session."""
+
+    def _connect() -> smtplib.SMTP:
+        server = smtplib.SMTP(host, port, timeout=timeout)
+        try:
+            server.ehlo()
+            if use_starttls:
+                server.starttls()
+                server.ehlo()
+            if username:
+                server.login(username, password or "")
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    return _connect
+
+
+@dataclass
+class _PooledConnection:
+    server: smtplib.SMTP
+    last_used: float = field(default_factory=time.monotonic)
+    sent: int = 0
+
+
+class SmtpConnectionPool:
+    """Thread-safe pool of persistent SMTP sessions.
+
+    Sessions are reused across messages so bulk sends pay the TCP + STARTTLS
+    + AUTH handshake once per connection instead of once per email.
+
+    - at most `max_size` sessions are open (callers block for a free slot)
+    - sessions idle for longer than `idle_timeout` seconds are closed
+    - a session is retired after `max_messages_per_connection` messages
+    - a reused session that turns out to be dead is replaced and the send
+      retried once on a fresh connection
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], smtplib.SMTP],
+        *,
+        max_size: int = 4,
+        idle_timeout: float = 60.0,
+        max_messages_per_connection: int = 100,
+    ) -> None:
+        self._connect = connect
+        self.max_size = max(1, int(max_size))
+        self.idle_timeout = float(idle_timeout)
+        self.max_messages_per_connection = max(1, int(max_messages_per_connection))
+        self._idle: deque[_PooledConnection] = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+
+    def send_message(self, msg: EmailMessage) -> None:
+        self._slots.acquire()
+        try:
+            conn, reused = self._checkout()
+            try:
+                conn.server.send_message(msg)
+            except _CONNECTION_ERRORS:
+                _quit(conn.server)
+                if not reused:
+                    raise
+                # Stale keep-alive session (server timed it out): reconnect once.
+                conn = _PooledConnection(server=self._connect())
+                try:
+                    conn.server.send_message(msg)
+                except Exception:
+                    _quit(conn.server)
+                    raise
+            except Exception:
+                # Message-level rejection; don't trust the session state.
+                _quit(conn.server)
+                raise
+            conn.sent += 1
+            self._checkin(conn)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            _quit(conn.server)
+
+    def _checkout(self) -> tuple[_PooledConnection, bool]:
+        now = time.monotonic()
+        expired: list[_PooledConnection] = []
+        conn: _PooledConnection | None = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()  # most recently used first
+                if now - candidate.last_used > self.idle_timeout:
+                    expired.append(candidate)
+                    continue
+                conn = candidate
+                break
+        for old in expired:
+            _quit(old.server)
+        if conn is not None:
+            return conn, True
+        return _PooledConnection(server=self._connect()), False
+
+    def _checkin(self, conn: _PooledConnection) -> None:
+        if conn.sent >= self.max_messages_per_connection:
+            _quit(conn.server)
+            return
+        conn.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(conn)
+
+
+def _quit(server: smtplib.SMTP) -> None:
+    try:
+        server.quit()
+    except Exception:
+        try:
+            server.close()
+        except Exception:
+            pass
@@ -1,11 +1,34 @@
 from __future__ import annotations
 
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
 
 from app.db.models import Customer, CustomerTag, Tag
 
 
+def load_tag_names() -> LoaderOption:
+    """Query option for lists that render Customer.tag_names.
+
+    Loads every customer's links and tags in two batched queries instead of
+    two lazy loads per customer.
+    """
+    return selectinload(Customer.tags).selectinload(CustomerTag.tag)
+
+
+def tag_names_subquery(customer_id) -> sa.ScalarSelect:
+    """Correlated array_agg of a customer's tag names (sorted), for Core selects."""
+    return (
+        sa.select(sa.func.array_agg(aggregate_order_by(Tag.name, Tag.name.asc())))
+        .select_from(CustomerTag)
+        .join(Tag, Tag.id == CustomerTag.tag_id)
+        .where(CustomerTag.customer_id == customer_id)
+        .scalar_subquery()
+    )
+
+
 def get_or_create_tag(db: Session, *, owner_user_id, name: str, color: str | None = None) -> Tag:
     """Get a tag by name or create it.
 
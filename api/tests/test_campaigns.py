@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+
+def _customer(client: TestClient, headers: dict, **payload) -> str:
+    r = client.post("/customers", json=payload, headers=headers)
+    assert r.status_code == 201, r.text
+    return r.json()["id"]
+
+
+def test_campaign_fans_out_to_reachable_segment(client: TestClient, auth_headers: dict, admin_headers: dict):
+    r = client.post(
+        "/templates",
+        json={"channel": "whatsapp", "name": "VIPOffer", "body": "Hi {{customer_name}}, {{offer}}", "category": "marketing"},
+        headers=admin_headers,
+    )
+    assert r.status_code == 201, r.text
+    template_id = r.json()["id"]
+
+    reachable = [
+        _customer(client, auth_headers, name=f"VIP {i}", phone=f"+44770090070{i}", can_contact=True) for i in range(3)
+    ]
+    no_consent = _customer(client, auth_headers, name="VIP optout", phone="+447700900710", can_contact=False)
+    no_phone = _customer(client, auth_headers, name="VIP nophone", email="vip@example.com", can_contact=True)
+    _customer(client, auth_headers, name="Not tagged", phone="+447700900720", can_contact=True)
+
+    for customer_id in [*reachable, no_consent, no_phone]:
+        r = client.post(f"/tags/customers/{customer_id}", json={"name": "vip"}, headers=auth_headers)
+        assert r.status_code == 204, r.text
+
+    r = client.post(
+        "/campaigns",
+        json={
+            "name": "VIP spring",
+            "channel": "whatsapp",
+            "template_id": template_id,
+            "variables": {"offer": "10% off"},
+            "segment": {"tag": "vip"},
+        },
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    campaign = r.json()
+    assert campaign["matched_count"] == 5
+    assert campaign["queued_count"] == 3
+    assert campaign["skipped_count"] == 2
+    assert campaign["progress"]["queued"] == 3
+
+    r = client.get("/outbound-messages", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    queued = [m for m in r.json() if m["template_id"] == template_id]
+    assert sorted(m["customer_id"] for m in queued) == sorted(reachable)
+    assert {m["lane"] for m in queued} == {"marketing"}
+    assert all(m["variables"] == {"offer": "10% off"} for m in queued)
+
+    r = client.get(f"/campaigns/{campaign['id']}", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["progress"]["queued"] == 3
+
+    # Channel must match the template
+    r = client.post(
+        "/campaigns",
+        json={"name": "Wrong", "channel": "email", "template_id": template_id},
+        headers=auth_headers,
+    )
+    assert r.status_code == 400
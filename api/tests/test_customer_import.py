@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+
+def test_csv_import_dedupes_and_upserts(client: TestClient, auth_headers: dict):
+    r = client.post(
+        "/customers",
+        json={"name": "Existing", "phone": "+447700900801", "company": "Old Co", "can_contact": True},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    existing_id = r.json()["id"]
+    # Stored the way the Twilio webhook stores a WhatsApp sender.
+    r = client.post("/customers", json={"name": "From WhatsApp", "phone": "+447700900803"}, headers=auth_headers)
+    assert r.status_code == 201, r.text
+    whatsapp_id = r.json()["id"]
+
+    csv_body = (
+        "Name,Phone,Email,Company,can_contact\n"
+        "Existing Updated,+44 7700 900801,,,\n"  # matches existing on normalised phone
+        "New One,07700-900802,new1@example.com,Clinic A,yes\n"
+        "New One Again,07700 900802,,,\n"  # same phone as the row above -> duplicate
+        "No Contact,,,,\n"  # rejected
+        "Bad Email,,not-an-email,,\n"  # rejected
+        "Opted Out,,optout@example.com,,no\n"
+        "WhatsApp Lead,07700 900803,,Clinic B,\n"  # local form of the WhatsApp sender above
+    )
+    r = client.post(
+        "/customers/import",
+        files={"file": ("leads.csv", csv_body.encode(), "text/csv")},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    result = r.json()
+    assert result["status"] == "completed"
+    assert result["processed_rows"] == 7
+    assert result["inserted_count"] == 2
+    assert result["updated_count"] == 2
+    assert result["duplicate_count"] == 1
+    assert result["rejected_count"] == 2
+    assert result["rejected_rows"] == [
+        {"line": 5, "error": "missing phone and email"},
+        {"line": 6, "error": "invalid email"},
+    ]
+
+    r = client.get(f"/customers/imports/{result['id']}", headers=auth_headers)
+    assert r.status_code == 200
+    assert r.json()["inserted_count"] == 2
+
+    customers = {c["name"]: c for c in client.get("/customers", headers=auth_headers).json()}
+    updated = customers["Existing Updated"]
+    assert updated["id"] == existing_id
+    assert updated["company"] == "Old Co"  # blank cells don't overwrite
+    assert customers["New One Again"]["phone"] == "+447700900802"  # E.164 with DEFAULT_COUNTRY_CODE
+    assert customers["New One Again"]["email"] is None
+    assert customers["Opted Out"]["can_contact"] is False
+    assert customers["WhatsApp Lead"]["id"] == whatsapp_id
+    assert customers["WhatsApp Lead"]["company"] == "Clinic B"
+
+
+def test_import_never_opts_a_customer_back_in(client: TestClient, auth_headers: dict):
+    for name, phone, consent in (("Opted Out", "+447700900811", False), ("Opted In", "+447700900812", True)):
+        r = client.post(
+            "/customers", json={"name": name, "phone": phone, "can_contact": consent}, headers=auth_headers
+        )
+        assert r.status_code == 201, r.text
+
+    csv_body = (
+        "name,phone,can_contact\n"
+        "Opted Out,07700 900811,yes\n"
+        "Opted In,07700 900812,no\n"
+    )
+    r = client.post(
+        "/customers/import",
+        files={"file": ("leads.csv", csv_body.encode(), "text/csv")},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    assert r.json()["updated_count"] == 2
+
+    customers = {c["name"]: c for c in client.get("/customers", headers=auth_headers).json()}
+    assert customers["Opted Out"]["can_contact"] is False
+    assert customers["Opted In"]["can_contact"] is False
+
+
+def test_import_dedupes_rows_sharing_an_email(client: TestClient, auth_headers: dict):
+    r = client.post(
+        "/customers", json={"name": "Existing", "email": "same@example.com"}, headers=auth_headers
+    )
+    assert r.status_code == 201, r.text
+
+    csv_body = (
+        "name,phone,email\n"
+        "First,07700 900821,same@example.com\n"
+        "Second,07700 900822,Same@Example.com\n"
+        "Third,,same@example.com\n"
+        "New,07700 900823,new@example.com\n"
+        "New Again,,new@example.com\n"
+    )
+    r = client.post(
+        "/customers/import",
+        files={"file": ("leads.csv", csv_body.encode(), "text/csv")},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    result = r.json()
+    assert result["duplicate_count"] == 3
+    assert result["updated_count"] == 1
+    assert result["inserted_count"] == 1
+
+    customers = client.get("/customers", headers=auth_headers).json()
+    assert sorted(c["name"] for c in customers) == ["New Again", "Third"]
+    assert {c["email"] for c in customers} == {"same@example.com", "new@example.com"}
+
+
+def test_ndjson_import_reports_bad_lines(client: TestClient, auth_headers: dict):
+    body = b'{"name": "Json Lead", "email": "JSON.Lead@Example.com"}\nnot json\n[1, 2]\n'
+    r = client.post(
+        "/customers/import",
+        files={"file": ("leads.ndjson", body, "application/x-ndjson")},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    result = r.json()
+    assert result["inserted_count"] == 1
+    assert result["rejected_rows"] == [
+        {"line": 2, "error": "invalid JSON"},
+        {"line": 3, "error": "expected a JSON object"},
+    ]
+
+    r = client.post(
+        "/customers/import",
+        files={"file": ("leads.txt", b"name\nx\n", "text/plain")},
+        headers=auth_headers,
+    )
+    assert r.status_code == 400
+
+
+def test_phone_normaliser_matches_its_sql_form(db):
+    from sqlalchemy import text
+
+    from app.services.phone import normalise_phone, phone_sql
+
+    samples = [
+        "whatsapp:+44 7700-900123",
+        "WhatsApp:07700 900123",
+        "07700 900123",
+        "(020) 7946 0018",
+        "+90 555 000 0000",
+        "7700900123",
+        "0",
+        "+",
+        "",
+    ]
+    for raw in samples:
+        in_sql = db.execute(text(f"SELECT {phone_sql(':raw')}"), {"raw": raw, "country_code": "+44"}).scalar()
+        assert in_sql == normalise_phone(raw, country_code="+44"), raw
+    assert normalise_phone("07700 900123", country_code="+44") == "+447700900123"
@@ -64,3 +64,81 @@ def test_customer_ownership_enforced(client):
     # B should not access A's customer
     r = client.get(f"/customers/{customer_id}", headers=headers_b)
     assert r.status_code in (403, 404), r.text
+
+
+def test_customer_list_loads_tags_in_constant_queries(client, auth_headers, engine):
+    from sqlalchemy import event
+
+    for i in range(6):
+        r = client.post("/customers", json={"name": f"Tagged {i}"}, headers=auth_headers)
+        assert r.status_code == 201, r.text
+        for tag in ("vip", f"t{i}"):
+            t = client.post(f"/inbox/customers/{r.json()['id']}/tags/add", json={"tag": tag}, headers=auth_headers)
+            assert t.status_code == 204, t.text
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        r = client.get("/customers", headers=auth_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert r.status_code == 200, r.text
+    tagged = [c for c in r.json() if c["name"].startswith("Tagged ")]
+    assert len(tagged) == 6
+    assert all(sorted(c["tag_names"]) == sorted(["vip", f"t{c['name'][-1]}"]) for c in tagged)
+    # no lazy tag loads per customer
+    assert len(statements) <= 4, statements
+
+
+def test_customer_list_pages_filters_and_projects(client, auth_headers):
+    ids = []
+    for i in range(5):
+        r = client.post(
+            "/customers",
+            json={"name": f"Page {i}", "language": "tr" if i % 2 else "en", "next_follow_up_at": f"2026-05-0{i + 1}T09:00:00Z"},
+            headers=auth_headers,
+        )
+        assert r.status_code == 201, r.text
+        ids.append(r.json()["id"])
+    client.post(f"/inbox/customers/{ids[1]}/tags/add", json={"tag": "vip"}, headers=auth_headers)
+    client.post(f"/inbox/customers/{ids[3]}/tags/add", json={"tag": "vip"}, headers=auth_headers)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/customers", params=params, headers=auth_headers)
+        assert r.status_code == 200, r.text
+        assert len(r.json()) <= 2
+        seen += [c["id"] for c in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == ids[::-1]
+
+    r = client.get("/customers", params={"tag": "vip", "language": "tr"}, headers=auth_headers)
+    assert [c["id"] for c in r.json()] == [ids[3], ids[1]]
+    assert r.json()[0]["tag_names"] == ["vip"]
+
+    r = client.get(
+        "/customers",
+        params={"follow_up_after": "2026-05-02T00:00:00Z", "follow_up_before": "2026-05-03T23:59:59Z"},
+        headers=auth_headers,
+    )
+    assert [c["id"] for c in r.json()] == [ids[2], ids[1]]
+
+    r = client.get("/customers", params={"fields": "name,stage", "limit": 1}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    assert r.json() == [{"id": ids[4], "name": "Page 4", "stage": "new"}]
+    created_cursor = r.headers["X-Next-Cursor"]
+
+    r = client.get("/customers", params={"fields": "name,password"}, headers=auth_headers)
+    assert r.status_code == 400
+    # A cursor only continues the sort it was issued for.
+    r = client.get("/customers", params={"cursor": created_cursor, "sort": "updated_at"}, headers=auth_headers)
+    assert r.status_code == 400
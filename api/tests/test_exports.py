@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+
+def test_exports_stream_csv_and_ndjson(client: TestClient, auth_headers: dict):
+    r = client.post(
+        "/customers",
+        json={"name": "Export Me", "phone": "+447700900901", "can_contact": False},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    customer_id = r.json()["id"]
+    client.post(f"/tags/customers/{customer_id}", json={"name": "vip"}, headers=auth_headers)
+    client.post(f"/tags/customers/{customer_id}", json={"name": "implant"}, headers=auth_headers)
+
+    for i in range(3):
+        r = client.post(
+            f"/customers/{customer_id}/interactions",
+            json={"channel": "whatsapp", "direction": "inbound", "content": f"msg {i}", "occurred_at": f"2026-01-0{i + 1}T10:00:00Z"},
+            headers=auth_headers,
+        )
+        assert r.status_code == 201, r.text
+
+    r = client.post(
+        "/outcomes",
+        json={"customer_id": customer_id, "type": "deposit_paid", "amount": "250.00", "metadata": {"ref": "A1"}},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+
+    r = client.get("/customers/export", headers=auth_headers)
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"].startswith("text/csv")
+    assert "customers.csv" in r.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert len(rows) == 1
+    assert rows[0]["id"] == customer_id
+    assert rows[0]["tags"] == "implant;vip"
+    assert rows[0]["can_contact"] == "false"
+
+    r = client.get(
+        "/interactions/export",
+        params={"format": "ndjson", "customer_id": customer_id, "start": "2026-01-02T00:00:00Z"},
+        headers=auth_headers,
+    )
+    assert r.status_code == 200, r.text
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [line["content"] for line in lines] == ["msg 1", "msg 2"]
+    assert lines[0]["channel"] == "whatsapp"
+
+    r = client.get("/outcomes/export", params={"format": "ndjson"}, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    (outcome,) = [json.loads(line) for line in r.text.splitlines()]
+    assert outcome["type"] == "deposit_paid"
+    assert outcome["amount"] == "250.00"
+    assert outcome["metadata"] == {"ref": "A1"}
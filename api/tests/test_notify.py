@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import uuid
+
+import psycopg
+import pytest
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.db.models import Customer, OutboundMessage, Template, User
+from app.db.notify import OUTBOUND_QUEUE_CHANNEL, TEMPLATES_CHANNEL
+
+
+@pytest.fixture()
+def listen():
+    """A separate connection LISTENing like the worker; returns received() -> [(channel, payload)]."""
+    dsn = make_url(str(settings.database_url)).set(drivername="postgresql").render_as_string(hide_password=False)
+    conn = psycopg.connect(dsn, autocommit=True)
+    conn.execute(f'LISTEN "{OUTBOUND_QUEUE_CHANNEL}"')
+    conn.execute(f'LISTEN "{TEMPLATES_CHANNEL}"')
+
+    def received(timeout: float = 0.5) -> list[tuple[str, str]]:
+        return [(n.channel, n.payload) for n in conn.notifies(timeout=timeout)]
+
+    yield received
+    conn.close()
+
+
+def test_outbound_insert_and_template_update_notify_after_commit(db, listen):
+    user = User(email=f"notify_{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    customer = Customer(owner_user_id=user.id, name="Notify", phone="+447700900901")
+    template = Template(channel="whatsapp", name=f"notify-{uuid.uuid4().hex[:8]}", body="Hi")
+    db.add_all([customer, template])
+    db.commit()
+    listen(0.2)  # nothing of interest yet; drop anything left from setup
+
+    db.add(OutboundMessage(owner_user_id=user.id, customer_id=customer.id, channel="whatsapp", body="hi"))
+    db.flush()
+    assert listen(0.2) == []  # NOTIFY is only delivered on commit
+    db.commit()
+    assert listen() == [(OUTBOUND_QUEUE_CHANNEL, "")]
+
+    template.body = "Hello"
+    db.commit()
+    assert listen() == [(TEMPLATES_CHANNEL, str(template.id))]
+
+    template.body = "Rolled back"
+    db.flush()
+    db.rollback()
+    assert listen(0.2) == []
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+
+def test_outbound_messages_get_priority_lanes(client: TestClient, auth_headers: dict, admin_headers: dict):
+    r = client.post(
+        "/templates",
+        json={
+            "channel": "whatsapp",
+            "name": "SpringPromo",
+            "body": "Hi {{customer_name}}, spring offers are live.",
+            "category": "marketing",
+        },
+        headers=admin_headers,
+    )
+    assert r.status_code == 201, r.text
+    promo_id = r.json()["id"]
+
+    r = client.post(
+        "/customers",
+        json={"name": "Lane Test", "phone": "+447700900555", "can_contact": True},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    customer_id = r.json()["id"]
+
+    # Coordinator reply from the inbox -> interactive lane
+    r = client.post(
+        f"/inbox/customers/{customer_id}/send-text",
+        json={"channel": "whatsapp", "body": "Thanks, see you Monday"},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    reply_id = r.json()["id"]
+    r = client.get(f"/outbound-messages/{reply_id}", headers=auth_headers)
+    assert r.json()["lane"] == "interactive"
+
+    # Marketing templates always go to the marketing lane
+    r = client.post(
+        "/outbound-messages",
+        json={"customer_id": customer_id, "channel": "whatsapp", "template_id": promo_id},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    assert r.json()["lane"] == "marketing"
+
+    # Explicit lane wins
+    r = client.post(
+        "/outbound-messages",
+        json={"customer_id": customer_id, "channel": "whatsapp", "body": "Reminder", "lane": "automation"},
+        headers=auth_headers,
+    )
+    assert r.status_code == 201, r.text
+    assert r.json()["lane"] == "automation"
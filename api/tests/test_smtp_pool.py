@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import socket
+from email.message import EmailMessage
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.services.smtp_pool import SmtpConnectionPool, smtp_connect_factory
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+
+    async def handle_DATA(self, server, session, envelope):  # noqa: N802 (aiosmtpd hook name)
+        self.messages.append(envelope.content.decode("utf8", errors="replace"))
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture()
+def smtp_server():
+    handler = _Recorder()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    try:
+        yield controller, handler
+    finally:
+        controller.stop()
+
+
+def _counting_factory(controller):
+    connect = smtp_connect_factory(
+        host=controller.hostname, port=controller.port, username=None, password=None, use_starttls=False
+    )
+    opened: list = []
+
+    def _connect():
+        server = connect()
+        opened.append(server)
+        return server
+
+    return _connect, opened
+
+
+def _msg(i: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "clinic@example.com"
+    msg["To"] = f"patient{i}@example.com"
+    msg["Subject"] = f"Hello {i}"
+    msg.set_content("hi")
+    return msg
+
+
+def test_pool_reuses_one_session_for_sequential_sends(smtp_server):
+    controller, handler = smtp_server
+    connect, opened = _counting_factory(controller)
+    pool = SmtpConnectionPool(connect, max_size=2)
+
+    for i in range(5):
+        pool.send_message(_msg(i))
+    pool.close()
+
+    assert len(handler.messages) == 5
+    assert len(opened) == 1
+
+
+def test_pool_retires_sessions_after_message_cap(smtp_server):
+    controller, handler = smtp_server
+    connect, opened = _counting_factory(controller)
+    pool = SmtpConnectionPool(connect, max_messages_per_connection=2)
+
+    for i in range(5):
+        pool.send_message(_msg(i))
+    pool.close()
+
+    assert len(handler.messages) == 5
+    assert len(opened) == 3
+
+
+def test_pool_drops_idle_sessions(smtp_server):
+    controller, handler = smtp_server
+    connect, opened = _counting_factory(controller)
+    pool = SmtpConnectionPool(connect, idle_timeout=0)
+
+    pool.send_message(_msg(1))
+    pool.send_message(_msg(2))
+    pool.close()
+
+    assert len(handler.messages) == 2
+    assert len(opened) == 2
+
+
+def test_pool_reconnects_when_reused_session_is_dead(smtp_server):
+    controller, handler = smtp_server
+    connect, opened = _counting_factory(controller)
+    pool = SmtpConnectionPool(connect)
+
+    pool.send_message(_msg(1))
+    # Simulate the server closing the keep-alive session.
+    opened[0].close()
+    pool.send_message(_msg(2))
+    pool.close()
+
+    assert len(handler.messages) == 2
+    assert len(opened) == 2
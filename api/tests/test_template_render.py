@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app.services.template_render import TemplateCache, compiled_template, render_template, render_text
+
+
+def test_render_text_handles_whitespace_and_missing_keys():
+    out = render_text("Hi {{customer_name}} / {{ customer_name }} from {{ company }}{{unknown}}!", {
+        "customer_name": "Alice",
+        "company": None,
+    })
+    assert out == "Hi Alice / Alice from !"
+
+
+def test_compiled_template_is_cached_until_updated_at_changes():
+    template_id = uuid4()
+    t0 = datetime.now(timezone.utc)
+
+    first = compiled_template(template_id, t0, subject="Hi {{ customer_name }}", body="v1")
+    again = compiled_template(template_id, t0, subject="ignored", body="ignored")
+    assert again is first
+
+    edited = compiled_template(template_id, t0 + timedelta(seconds=1), subject="Hello {{customer_name}}", body="v2")
+    assert edited is not first
+    assert edited.render({"customer_name": "Bob"}).subject == "Hello Bob"
+
+    rendered = render_template(
+        subject="x", body="y", context={"customer_name": "Bob"}, template_id=template_id, updated_at=t0
+    )
+    assert (rendered.subject, rendered.body) == ("Hi Bob", "v1")
+
+
+def test_template_cache_evicts_least_recently_used():
+    cache = TemplateCache(maxsize=2)
+    a = cache.get("a", subject=None, body="a")
+    cache.get("b", subject=None, body="b")
+    assert cache.get("a", subject=None, body="a") is a  # refresh "a"
+    cache.get("c", subject=None, body="c")  # evicts "b"
+
+    assert len(cache) == 2
+    assert cache.get("a", subject=None, body="a") is a
+    assert cache.get("b", subject=None, body="B").body.render({}) == "B"
@@ -3,7 +3,7 @@
 import { useEffect, useMemo, useState } from "react";
 import { useParams } from "next/navigation";
 import { Topbar } from "@/components/Topbar";
-import { apiFetch } from "@/lib/api";
+import { apiFetch, apiFetchPage } from "@/lib/api";
 import type { CustomerOut, DealOut, ThreadItem, TemplateOut } from "@/lib/types";
 import { fmtDateTime } from "@/lib/dates";
 import { PIPELINE_STAGES, SERVICE_TAGS, stageLabel } from "@/lib/constants";
@@ -17,6 +17,7 @@ export default function ContactDetailPage() {
   const [c, setC] = useState<CustomerOut | null>(null);
   const [deals, setDeals] = useState<DealOut[]>([]);
   const [thread, setThread] = useState<ThreadItem[]>([]);
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
   const [templates, setTemplates] = useState<TemplateOut[]>([]);
   const [busy, setBusy] = useState(true);
   const [note, setNote] = useState("");
@@ -36,12 +37,13 @@ export default function ContactDetailPage() {
       const [cc, dd, tt, tpl] = await Promise.all([
         apiFetch<CustomerOut>(`/customers/${id}`),
         apiFetch<DealOut[]>(`/customers/${id}/deals`),
-        apiFetch<ThreadItem[]>(`/inbox/customers/${id}/thread`),
+        apiFetchPage<ThreadItem>(`/inbox/customers/${id}/thread`),
         apiFetch<TemplateOut[]>(`/templates`).catch(() => [] as TemplateOut[]),
       ]);
       setC(cc);
       setDeals(dd);
-      setThread(tt);
+      setThread(tt.items);
+      setOlderCursor(tt.nextCursor);
       setTemplates(tpl);
     } catch (err: any) {
       toast.push(err?.message || "Failed to load contact", "error");
@@ -50,6 +52,19 @@ export default function ContactDetailPage() {
     }
   }
 
+  async function loadOlder() {
+    if (!olderCursor) return;
+    try {
+      const page = await apiFetchPage<ThreadItem>(
+        `/inbox/customers/${id}/thread?before=${encodeURIComponent(olderCursor)}`
+      );
+      setThread((prev) => [...page.items, ...prev]);
+      setOlderCursor(page.nextCursor);
+    } catch (err: any) {
+      toast.push(err?.message || "Failed to load older messages", "error");
+    }
+  }
+
   useEffect(() => {
     load();
     // eslint-disable-next-line react-hooks/exhaustive-deps
@@ -293,6 +308,11 @@ export default function ContactDetailPage() {
                 ) : (
                   <div className="muted">No messages yet.</div>
                 )}
+                {olderCursor && (
+                  <button className="btn" onClick={loadOlder}>
+                    Load older
+                  </button>
+                )}
               </div>
             </div>
           </section>
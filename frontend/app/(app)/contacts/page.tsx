@@ -3,7 +3,7 @@
 import { FormEvent, useEffect, useState } from "react";
 import Link from "next/link";
 import { Topbar } from "@/components/Topbar";
-import { apiFetch } from "@/lib/api";
+import { apiFetch, apiFetchPage } from "@/lib/api";
 import type { CustomerOut } from "@/lib/types";
 import { fmtDateTime } from "@/lib/dates";
 import { useToast } from "@/components/Toast";
@@ -11,6 +11,7 @@ import { useToast } from "@/components/Toast";
 export default function ContactsPage() {
   const toast = useToast();
   const [items, setItems] = useState<CustomerOut[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [busy, setBusy] = useState(true);
 
   const [name, setName] = useState("");
@@ -21,8 +22,23 @@ export default function ContactsPage() {
   async function load() {
     setBusy(true);
     try {
-      const data = await apiFetch<CustomerOut[]>("/customers");
-      setItems(data);
+      const page = await apiFetchPage<CustomerOut>("/customers");
+      setItems(page.items);
+      setNextCursor(page.nextCursor);
+    } catch (err: any) {
+      toast.push(err?.message || "Failed to load contacts", "error");
+    } finally {
+      setBusy(false);
+    }
+  }
+
+  async function loadMore() {
+    if (!nextCursor) return;
+    setBusy(true);
+    try {
+      const page = await apiFetchPage<CustomerOut>(`/customers?cursor=${encodeURIComponent(nextCursor)}`);
+      setItems((prev) => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
     } catch (err: any) {
       toast.push(err?.message || "Failed to load contacts", "error");
     } finally {
@@ -94,6 +110,11 @@ export default function ContactsPage() {
                 )}
               </tbody>
             </table>
+            {nextCursor && (
+              <button className="btn" onClick={loadMore} disabled={busy} style={{ marginTop: 10 }}>
+                Load more
+              </button>
+            )}
           </div>
         </section>
 
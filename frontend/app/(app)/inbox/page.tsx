@@ -3,7 +3,7 @@
 import { useEffect, useMemo, useState } from "react";
 import Link from "next/link";
 import { Topbar } from "@/components/Topbar";
-import { apiFetch } from "@/lib/api";
+import { apiFetch, apiFetchPage } from "@/lib/api";
 import type { InboxCustomerOut, ThreadItem, TemplateOut } from "@/lib/types";
 import { fmtDateTime } from "@/lib/dates";
 import { useToast } from "@/components/Toast";
@@ -13,6 +13,7 @@ export default function InboxPage() {
   const [customers, setCustomers] = useState<InboxCustomerOut[]>([]);
   const [selected, setSelected] = useState<InboxCustomerOut | null>(null);
   const [thread, setThread] = useState<ThreadItem[]>([]);
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
   const [templates, setTemplates] = useState<TemplateOut[]>([]);
 
   const [busy, setBusy] = useState(true);
@@ -49,13 +50,27 @@ export default function InboxPage() {
 
   async function loadThread(id: string) {
     try {
-      const items = await apiFetch<ThreadItem[]>(`/inbox/customers/${id}/thread`);
-      setThread(items);
+      const page = await apiFetchPage<ThreadItem>(`/inbox/customers/${id}/thread`);
+      setThread(page.items);
+      setOlderCursor(page.nextCursor);
     } catch (err: any) {
       toast.push(err?.message || "Failed to load thread", "error");
     }
   }
 
+  async function loadOlder() {
+    if (!selected || !olderCursor) return;
+    try {
+      const page = await apiFetchPage<ThreadItem>(
+        `/inbox/customers/${selected.id}/thread?before=${encodeURIComponent(olderCursor)}`
+      );
+      setThread((prev) => [...page.items, ...prev]);
+      setOlderCursor(page.nextCursor);
+    } catch (err: any) {
+      toast.push(err?.message || "Failed to load older messages", "error");
+    }
+  }
+
   async function loadTemplates() {
     try {
       const t = await apiFetch<TemplateOut[]>("/templates");
@@ -261,6 +276,11 @@ export default function InboxPage() {
               ) : (
                 <div className="muted">Select a lead to view messages.</div>
               )}
+              {olderCursor && (
+                <button className="btn" onClick={loadOlder}>
+                  Load older
+                </button>
+              )}
             </div>
           </div>
         </section>
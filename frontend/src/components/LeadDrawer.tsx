@@ -2,7 +2,7 @@
 
 import { useEffect, useMemo, useState } from "react";
 import Link from "next/link";
-import { apiFetch } from "@/lib/api";
+import { apiFetch, apiFetchPage } from "@/lib/api";
 import type { InboxCustomerOut, ThreadItem } from "@/lib/types";
 import { fmtDateTime } from "@/lib/dates";
 import { PIPELINE_STAGES, SERVICE_TAGS, stageLabel } from "@/lib/constants";
@@ -19,6 +19,7 @@ export function LeadDrawer({
 }) {
   const toast = useToast();
   const [thread, setThread] = useState<ThreadItem[]>([]);
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
   const [busy, setBusy] = useState(false);
   const [note, setNote] = useState("");
 
@@ -30,9 +31,10 @@ export function LeadDrawer({
     let mounted = true;
     (async () => {
       try {
-        const items = await apiFetch<ThreadItem[]>(`/inbox/customers/${lead.id}/thread`);
+        const page = await apiFetchPage<ThreadItem>(`/inbox/customers/${lead.id}/thread`);
         if (!mounted) return;
-        setThread(items);
+        setThread(page.items);
+        setOlderCursor(page.nextCursor);
       } catch (err: any) {
         toast.push(err?.message || "Failed to load thread", "error");
       }
@@ -118,8 +120,9 @@ export function LeadDrawer({
       });
       setNote("");
       toast.push("Note added");
-      const items = await apiFetch<ThreadItem[]>(`/inbox/customers/${lead.id}/thread`);
-      setThread(items);
+      const page = await apiFetchPage<ThreadItem>(`/inbox/customers/${lead.id}/thread`);
+      setThread(page.items);
+      setOlderCursor(page.nextCursor);
       onUpdated();
     } catch (err: any) {
       toast.push(err?.message || "Failed to add note", "error");
@@ -128,6 +131,22 @@ export function LeadDrawer({
     }
   }
 
+  async function loadOlder() {
+    if (!olderCursor) return;
+    setBusy(true);
+    try {
+      const page = await apiFetchPage<ThreadItem>(
+        `/inbox/customers/${lead.id}/thread?before=${encodeURIComponent(olderCursor)}`
+      );
+      setThread((prev) => [...page.items, ...prev]);
+      setOlderCursor(page.nextCursor);
+    } catch (err: any) {
+      toast.push(err?.message || "Failed to load older messages", "error");
+    } finally {
+      setBusy(false);
+    }
+  }
+
   return (
     <>
       <div className="drawerOverlay" onClick={onClose} />
@@ -205,6 +224,11 @@ export function LeadDrawer({
               ) : (
                 <div className="muted">No messages yet.</div>
               )}
+              {olderCursor && (
+                <button className="btn" onClick={loadOlder} disabled={busy}>
+                  Load older
+                </button>
+              )}
             </div>
           </div>
         </div>
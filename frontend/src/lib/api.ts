@@ -32,7 +32,7 @@ export class ApiError extends Error {
   }
 }
 
-export async function apiFetch<T>(path: string, init: RequestInit = {}): Promise<T> {
+async function apiRequest(path: string, init: RequestInit): Promise<Response> {
   const token = getToken();
   const headers = new Headers(init.headers || {});
   if (!headers.has("Content-Type") && init.body) headers.set("Content-Type", "application/json");
@@ -44,7 +44,28 @@ export async function apiFetch<T>(path: string, init: RequestInit = {}): Promise
     const text = await res.text().catch(() => "");
     throw new ApiError(text || `HTTP ${res.status}`, res.status, text);
   }
+  return res;
+}
 
+export async function apiFetch<T>(path: string, init: RequestInit = {}): Promise<T> {
+  const res = await apiRequest(path, init);
   if (res.status === 204) return undefined as unknown as T;
   return (await res.json()) as T;
 }
+
+export type Page<T> = {
+  items: T[];
+  nextCursor: string | null;
+  prevCursor: string | null;
+};
+
+// For cursor-paginated list endpoints: the cursors come back in the
+// X-Next-Cursor / X-Prev-Cursor response headers.
+export async function apiFetchPage<T>(path: string, init: RequestInit = {}): Promise<Page<T>> {
+  const res = await apiRequest(path, init);
+  return {
+    items: (await res.json()) as T[],
+    nextCursor: res.headers.get("X-Next-Cursor"),
+    prevCursor: res.headers.get("X-Prev-Cursor"),
+  };
+}
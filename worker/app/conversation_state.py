@@ -0,0 +1,69 @@
+# Mirrors the message upsert in api/app/services/conversation_state.py (the worker image only ships worker/app).
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+PREVIEW_LENGTH = 200
+
+# `e` has at most one row per customer (the latest message in the batch);
+# out-of-order messages only move the timestamps they exceed.
+_RECORD_MESSAGES_SQL = """
+INSERT INTO customer_conversation_state AS s
+    (customer_id, owner_user_id, last_inbound_at, last_outbound_at, activity_at,
+     last_message_direction, last_message_preview, unread_count, bucket, updated_at)
+SELECT c.id, c.owner_user_id,
+       CASE WHEN e.direction = 'inbound' THEN e.occurred_at END,
+       CASE WHEN e.direction = 'outbound' THEN e.occurred_at END,
+       e.occurred_at, e.direction, left(e.preview, {preview_length}),
+       CASE WHEN e.direction = 'inbound' THEN 1 ELSE 0 END,
+       CASE WHEN c.stage LIKE 'closed%' THEN 'closed' WHEN e.direction = 'outbound' THEN 'waiting' ELSE 'open' END,
+       now()
+FROM ({source}) AS e
+JOIN customers c ON c.id = e.customer_id
+ON CONFLICT (customer_id) DO UPDATE SET
+    last_inbound_at = GREATEST(s.last_inbound_at, EXCLUDED.last_inbound_at),
+    last_outbound_at = GREATEST(s.last_outbound_at, EXCLUDED.last_outbound_at),
+    activity_at = GREATEST(s.activity_at, EXCLUDED.activity_at),
+    last_message_direction = CASE WHEN EXCLUDED.activity_at >= s.activity_at
+        THEN EXCLUDED.last_message_direction ELSE s.last_message_direction END,
+    last_message_preview = CASE WHEN EXCLUDED.activity_at >= s.activity_at
+        THEN EXCLUDED.last_message_preview ELSE s.last_message_preview END,
+    unread_count = CASE
+        WHEN EXCLUDED.last_inbound_at IS NOT NULL THEN s.unread_count
+            + CASE WHEN s.last_outbound_at IS NULL OR EXCLUDED.last_inbound_at > s.last_outbound_at THEN 1 ELSE 0 END
+        WHEN EXCLUDED.last_outbound_at >= COALESCE(s.last_inbound_at, EXCLUDED.last_outbound_at) THEN 0
+        ELSE s.unread_count
+    END,
+    bucket = CASE
+        WHEN EXCLUDED.bucket = 'closed' THEN 'closed'
+        WHEN GREATEST(s.last_outbound_at, EXCLUDED.last_outbound_at)
+             >= COALESCE(GREATEST(s.last_inbound_at, EXCLUDED.last_inbound_at), CAST('-infinity' AS timestamptz))
+            THEN 'waiting'
+        ELSE 'open'
+    END,
+    updated_at = now()
+"""
+
+
+def record_outbound(conn: Connection, messages: Sequence[tuple[Any, datetime, str | None]]) -> None:
+    """Apply a batch of sent messages, given as (customer_id, occurred_at, preview)."""
+    if not messages:
+        return
+    values = []
+    params: dict[str, Any] = {}
+    for i, (customer_id, occurred_at, preview) in enumerate(messages):
+        values.append(f"(CAST(:cid_{i} AS uuid), CAST(:at_{i} AS timestamptz), CAST(:preview_{i} AS text))")
+        params.update({f"cid_{i}": str(customer_id), f"at_{i}": occurred_at, f"preview_{i}": preview})
+    # One row per customer: the latest message of the batch.
+    source = (
+        "SELECT DISTINCT ON (v.customer_id) v.customer_id, CAST('outbound' AS varchar) AS direction, "
+        "v.occurred_at, v.preview FROM (VALUES "
+        + ", ".join(values)
+        + ") AS v(customer_id, occurred_at, preview) ORDER BY v.customer_id, v.occurred_at DESC"
+    )
+    conn.execute(text(_RECORD_MESSAGES_SQL.format(source=source, preview_length=PREVIEW_LENGTH)), params)
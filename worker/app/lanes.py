@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import Mapping
+
+
+def parse_lane_weights(raw: str) -> dict[str, int]:
+    """Parse WORKER_LANE_WEIGHTS, e.g. "interactive=6,automation=3,marketing=1"."""
+    weights: dict[str, int] = {}
+    for part in (raw or "").split(","):
+        lane, _, weight = part.partition("=")
+        lane = lane.strip()
+        if not lane:
+            continue
+        try:
+            weights[lane] = max(0, int(weight))
+        except ValueError:
+            print(f"[worker] ignoring invalid WORKER_LANE_WEIGHTS entry: {part!r}")
+    return weights
+
+
+def lane_quotas(limit: int, weights: Mapping[str, int]) -> dict[str, int]:
+    """Split a batch of `limit` claims across lanes in proportion to their weights.
+
+    Every weighted lane gets at least one slot while the batch has room, so
+    interactive sends always ride the next batch even behind a large blast.
+    """
+    lanes = sorted(((lane, w) for lane, w in weights.items() if w > 0), key=lambda x: -x[1])
+    total = sum(w for _, w in lanes)
+    if not lanes or limit <= 0:
+        return {}
+    quotas = {lane: (limit * w) // total for lane, w in lanes}
+    for lane, _ in lanes:
+        if quotas[lane] == 0 and sum(quotas.values()) < limit:
+            quotas[lane] = 1
+    # rounding leftovers go to the highest-weight lane
+    quotas[lanes[0][0]] += max(0, limit - sum(quotas.values()))
+    return quotas
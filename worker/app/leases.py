@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+import socket
+import threading
+from typing import Any, Iterable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+
+def worker_id() -> str:
+    """Identity recorded in outbound_messages.claimed_by (host:pid unless WORKER_ID is set)."""
+    return os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaseKeeper:
+    """Heartbeat thread that extends the lease of every message this worker holds.
+
+    A message is tracked from claim until its result is written back (or it is
+    released), so long SMTP/Twilio calls and buffered results never look
+    abandoned to the reaper.
+    """
+
+    def __init__(self, engine: Engine, *, owner: str, lease_seconds: float) -> None:
+        self._engine = engine
+        self.owner = owner
+        self.lease_seconds = float(lease_seconds)
+        self._held: set[Any] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def track(self, ids: Iterable[Any]) -> None:
+        with self._lock:
+            self._held.update(ids)
+
+    def untrack(self, ids: Iterable[Any]) -> None:
+        with self._lock:
+            self._held.difference_update(ids)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        # Renew well before expiry so one slow heartbeat doesn't lose the lease.
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            try:
+                self.extend()
+            except Exception as e:
+                print(f"[worker] lease heartbeat error: {e}")
+
+    def extend(self) -> int:
+        with self._lock:
+            ids = list(self._held)
+        if not ids:
+            return 0
+        with self._engine.begin() as conn:
+            return conn.execute(
+                text(
+                    """
+                    UPDATE outbound_messages
+                    SET lease_expires_at = now() + :lease * interval '1 second'
+                    WHERE id = ANY(:ids) AND status = 'sending' AND claimed_by = :owner
+                    """
+                ),
+                {"ids": ids, "owner": self.owner, "lease": self.lease_seconds},
+            ).rowcount
+
+
+def reap_expired_leases(engine: Engine, *, lease_seconds: float, max_retries: int) -> int:
+    """Return messages whose claim lease expired to the queue.
+
+    The crashed attempt counts as a retry so a message that kills its worker
+    every time is eventually dead-lettered. Rows claimed before leases existed
+    (lease_expires_at NULL) expire `lease_seconds` after their last update.
+    """
+    with engine.begin() as conn:
+        return conn.execute(
+            text(
+                """
+                UPDATE outbound_messages
+                SET status = CASE WHEN retry_count + 1 >= :max_retries THEN 'failed' ELSE 'queued' END,
+                    retry_count = retry_count + 1,
+                    last_error = 'lease expired (claimed by ' || COALESCE(claimed_by, 'unknown') || ')',
+                    claimed_by = NULL,
+                    lease_expires_at = NULL,
+                    updated_at = now()
+                WHERE status = 'sending'
+                  AND COALESCE(lease_expires_at, updated_at + :lease * interval '1 second') < now()
+                """
+            ),
+            {"lease": lease_seconds, "max_retries": max_retries},
+        ).rowcount
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Mapping, Sequence
+
+# Minimal Prometheus text-format metrics (no client library in the worker
+# image). Each worker process serves its own /metrics.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUEUE_AGE_BUCKETS = (0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600, 4 * 3600, 24 * 3600)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Mapping[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket..., +Inf count], sum
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[idx] += 1
+            total[0] += value
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._values.items())
+        out: list[str] = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                cumulative += n
+                le = f'le="{_num(bound)}"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(total)}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return out
+
+
+class CallbackGauge(_Metric):
+    """Gauge computed at scrape time (e.g. queue depth from the database)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._fn: Callable[[], Mapping[tuple[str, ...], float]] | None = None
+
+    def set_function(self, fn: Callable[[], Mapping[tuple[str, ...], float]]) -> None:
+        self._fn = fn
+
+    def _samples(self) -> list[str]:
+        if self._fn is None:
+            return []
+        try:
+            values = self._fn()
+        except Exception as e:
+            print(f"[worker] metrics: {self.name} failed: {e}")
+            return []
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in sorted(values.items())]
+
+
+REGISTRY: list[_Metric] = []
+
+
+QUEUE_MESSAGES = CallbackGauge(
+    "worker_queue_messages", "Outbound messages waiting or in flight, by status and lane.", ("status", "lane")
+)
+QUEUE_OLDEST_DUE_SECONDS = CallbackGauge(
+    "worker_queue_oldest_due_seconds", "Age of the oldest due queued message, by lane.", ("lane",)
+)
+CLAIM_SECONDS = Histogram("worker_claim_duration_seconds", "Time to claim and hydrate one batch.")
+CLAIMED = Counter("worker_claimed_messages_total", "Messages claimed from the queue.")
+SEND_SECONDS = Histogram(
+    "worker_send_duration_seconds",
+    "Time to process one message (render, rate-limit wait, provider call), by channel.",
+    ("channel",),
+)
+MESSAGES = Counter(
+    "worker_messages_total",
+    "Processed messages by channel and outcome (sent, retry, deferred, failed).",
+    ("channel", "outcome"),
+)
+ERRORS = Counter("worker_send_errors_total", "Send errors by channel and exception class.", ("channel", "error"))
+TIME_IN_QUEUE = Histogram(
+    "worker_time_in_queue_seconds",
+    "now - created_at when a message is sent, by channel and lane.",
+    ("channel", "lane"),
+    buckets=QUEUE_AGE_BUCKETS,
+)
+WRITEBACK_SECONDS = Histogram("worker_writeback_duration_seconds", "Time to write back one result batch.")
+WRITEBACK_ROWS = Counter("worker_writeback_results_total", "Send results written back.")
+WRITEBACK_STALE = Counter(
+    "worker_writeback_stale_results_total",
+    "Results not written back because the message's lease was lost (reaped or re-claimed).",
+)
+LEASES_REAPED = Counter("worker_leases_reaped_total", "Messages requeued because their claim lease expired.")
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802 (http.server hook name)
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # scrapes are too frequent to log
+
+
+def start_http_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
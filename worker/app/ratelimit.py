@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Mapping
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+
+# Tokens taken from Postgres in one round trip are spent locally for at most
+# this long; unused ones are dropped so an idle process can't hoard a burst.
+_LOCAL_TOKEN_TTL_SECONDS = 1.0
+# Messages are requeued this far out when the bucket table can't be reached.
+_UNAVAILABLE_RETRY_SECONDS = 5.0
+
+
+class RateLimited(Exception):
+    """Sending now would exceed a provider limit; try again after `retry_after` seconds."""
+
+    def __init__(self, key: str, retry_after: float) -> None:
+        super().__init__(f"rate limited ({key}); retry in {retry_after:.1f}s")
+        self.key = key
+        self.retry_after = retry_after
+
+
+class RateLimiterUnavailable(RateLimited):
+    """The shared buckets couldn't be read (database error): defer, don't fail the send."""
+
+    def __init__(self, key: str, error: Exception) -> None:
+        Exception.__init__(self, f"rate limiter unavailable ({key}): {error}")
+        self.key = key
+        self.retry_after = _UNAVAILABLE_RETRY_SECONDS
+
+
+@dataclass(frozen=True)
+class Limit:
+    per_second: float
+    burst: float
+    per_day: int | None = None
+
+
+@dataclass(frozen=True)
+class ChannelLimits:
+    channel: Limit | None = None
+    # Applied separately to each sender (the message's owner_user_id).
+    per_sender: Limit | None = None
+
+
+def _parse_limit(raw: Mapping[str, Any]) -> Limit:
+    per_second = raw.get("per_second")
+    # daily-only caps: no per-second pacing
+    rate = float(per_second) if per_second else 1e6
+    burst = float(raw.get("burst") or max(1.0, rate))
+    per_day = raw.get("per_day")
+    return Limit(per_second=rate, burst=burst, per_day=int(per_day) if per_day else None)
+
+
+def parse_rate_limits(raw: str) -> dict[str, ChannelLimits]:
+    """Parse WORKER_RATE_LIMITS_JSON.
+
+    Example: {"whatsapp": {"per_second": 10, "burst": 20, "per_day": 10000,
+                           "per_sender": {"per_second": 1}},
+              "email": {"per_day": 2000}}
+    """
+    try:
+        data = json.loads(raw) if raw else {}
+    except Exception as e:
+        print(f"[worker] ignoring invalid WORKER_RATE_LIMITS_JSON: {e}")
+        return {}
+
+    limits: dict[str, ChannelLimits] = {}
+    for channel, spec in (data or {}).items():
+        if not isinstance(spec, dict):
+            continue
+        sender_spec = spec.get("per_sender")
+        own = {k: v for k, v in spec.items() if k != "per_sender"}
+        limits[str(channel).lower()] = ChannelLimits(
+            channel=_parse_limit(own) if own else None,
+            per_sender=_parse_limit(sender_spec) if isinstance(sender_spec, dict) else None,
+        )
+    return limits
+
+
+def _seconds_until_next_utc_day() -> float:
+    now = datetime.now(timezone.utc)
+    tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (tomorrow - now).total_seconds()
+
+
+class _Bucket:
+    """Local view of one shared token bucket row in rate_limit_buckets."""
+
+    def __init__(self, engine: Engine, key: str, limit: Limit) -> None:
+        self._engine = engine
+        self.key = key
+        self.limit = limit
+        # Take ~200ms of budget per round trip so busy workers don't hit the
+        # row for every single message. Daily caps are counted exactly.
+        self._chunk = 1 if limit.per_day else max(1, min(int(limit.burst), int(limit.per_second / 5)))
+        self._local = 0
+        self._local_expires = 0.0
+        self._created = False
+        self._lock = threading.Lock()
+
+    def take(self, deadline: float) -> None:
+        while True:
+            with self._lock:
+                if self._local > 0 and time.monotonic() < self._local_expires:
+                    self._local -= 1
+                    return
+                try:
+                    granted, wait = self._take_shared(self._chunk)
+                except SQLAlchemyError as e:
+                    raise RateLimiterUnavailable(self.key, e) from e
+                if granted:
+                    self._local = granted - 1
+                    self._local_expires = time.monotonic() + _LOCAL_TOKEN_TTL_SECONDS
+                    return
+            if time.monotonic() + wait > deadline:
+                raise RateLimited(self.key, wait)
+            # Sleep without the lock: other threads can still spend local
+            # tokens or give up early on a shorter deadline.
+            time.sleep(wait)
+
+    def give_back(self) -> None:
+        """Return one token from `take` that wasn't spent (best effort)."""
+        with self._lock:
+            if time.monotonic() < self._local_expires:
+                self._local += 1
+                return
+        try:
+            with self._engine.begin() as conn:
+                conn.execute(
+                    text(
+                        """
+                        UPDATE rate_limit_buckets
+                        SET tokens = LEAST(CAST(:burst AS double precision), tokens + 1),
+                            day_count = CASE WHEN day = CAST(now() AT TIME ZONE 'UTC' AS date)
+                                             THEN GREATEST(0, day_count - 1) ELSE day_count END
+                        WHERE key = :key
+                        """
+                    ),
+                    {"key": self.key, "burst": self.limit.burst},
+                )
+        except SQLAlchemyError as e:
+            print(f"[worker] could not return a {self.key} token: {e}")
+
+    def _take_shared(self, want: int) -> tuple[int, float]:
+        """Refill and take up to `want` tokens atomically; returns (granted, seconds to wait)."""
+        with self._engine.begin() as conn:
+            if not self._created:
+                conn.execute(
+                    text(
+                        """
+                        INSERT INTO rate_limit_buckets (key, tokens, refilled_at, day_count)
+                        VALUES (:key, :burst, now(), 0)
+                        ON CONFLICT (key) DO NOTHING
+                        """
+                    ),
+                    {"key": self.key, "burst": self.limit.burst},
+                )
+            row = conn.execute(
+                text(
+                    """
+                    WITH b AS (
+                        SELECT key,
+                               LEAST(
+                                   CAST(:burst AS double precision),
+                                   tokens + CAST(:rate AS double precision)
+                                       * CAST(EXTRACT(EPOCH FROM (now() - refilled_at)) AS double precision)
+                               ) AS available,
+                               CASE WHEN day = CAST(now() AT TIME ZONE 'UTC' AS date) THEN day_count ELSE 0 END AS used_today
+                        FROM rate_limit_buckets
+                        WHERE key = :key
+                        FOR UPDATE
+                    ), g AS (
+                        SELECT key, available, used_today,
+                               GREATEST(0, LEAST(
+                                   CAST(:want AS integer),
+                                   CAST(floor(available) AS integer),
+                                   COALESCE(CAST(:per_day AS integer) - used_today, CAST(:want AS integer))
+                               )) AS granted
+                        FROM b
+                    )
+                    UPDATE rate_limit_buckets AS r
+                    SET tokens = g.available - g.granted,
+                        refilled_at = now(),
+                        day = CAST(now() AT TIME ZONE 'UTC' AS date),
+                        day_count = g.used_today + g.granted
+                    FROM g
+                    WHERE r.key = g.key
+                    RETURNING g.granted, g.available, g.used_today
+                    """
+                ),
+                {
+                    "key": self.key,
+                    "want": want,
+                    "burst": self.limit.burst,
+                    "rate": self.limit.per_second,
+                    "per_day": self.limit.per_day,
+                },
+            ).one()
+        # Only once committed: a rolled-back first take never created the row.
+        self._created = True
+
+        granted, available, used_today = int(row[0]), float(row[1]), int(row[2])
+        if granted:
+            return granted, 0.0
+        if self.limit.per_day is not None and used_today >= self.limit.per_day:
+            return 0, _seconds_until_next_utc_day()
+        return 0, max(0.01, (1.0 - available) / self.limit.per_second)
+
+
+class RateLimiter:
+    """Paces sends per channel (and optionally per sender) across all worker processes.
+
+    Budgets live in the rate_limit_buckets table, so every process and
+    replica draws from the same buckets. `acquire` blocks for up to
+    `max_wait` seconds; beyond that it raises RateLimited so the caller can
+    requeue the message instead of holding it.
+    """
+
+    def __init__(self, engine: Engine, limits: Mapping[str, ChannelLimits], *, max_wait: float = 10.0) -> None:
+        self._engine = engine
+        self._limits = dict(limits)
+        self.max_wait = float(max_wait)
+        self._buckets: dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self._limits)
+
+    def _bucket(self, key: str, limit: Limit) -> _Bucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket(self._engine, key, limit)
+            return bucket
+
+    def acquire(self, channel: str, *, sender: str | None = None) -> None:
+        limits = self._limits.get(channel)
+        if limits is None:
+            return
+        deadline = time.monotonic() + self.max_wait
+        # Narrowest bucket first, so a blocked sender doesn't burn channel budget.
+        sender_bucket = None
+        if limits.per_sender is not None and sender:
+            sender_bucket = self._bucket(f"{channel}:sender:{sender}", limits.per_sender)
+            sender_bucket.take(deadline)
+        if limits.channel is not None:
+            try:
+                self._bucket(channel, limits.channel).take(deadline)
+            except RateLimited:
+                # Not sending after all: the sender's token goes back.
+                if sender_bucket is not None:
+                    sender_bucket.give_back()
+                raise
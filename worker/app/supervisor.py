@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import signal
+import time
+from typing import Any
+
+
+# Worker processes to run (each with its own thread pool / DB pool).
+PROCESSES = int(os.getenv("WORKER_PROCESSES") or os.cpu_count() or 1)
+# How long children get to drain after SIGTERM before they are killed.
+SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv("WORKER_SHUTDOWN_TIMEOUT_SECONDS", "50"))
+# A child that dies sooner than this after starting is restarted with backoff.
+MIN_UPTIME_SECONDS = 10.0
+MAX_RESTART_DELAY_SECONDS = 60.0
+
+
+def _run_child(index: int) -> None:
+    # Lets per-process settings (e.g. metrics port) differ between children.
+    os.environ["WORKER_PROCESS_INDEX"] = str(index)
+    # don't run the supervisor's handlers in the child before worker.main installs its own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    from app import worker
+
+    worker.main()
+
+
+class Supervisor:
+    """Forks worker processes, restarts crashed ones and drains them on SIGTERM.
+
+    Children run app.worker.main unchanged; they already stop claiming,
+    finish in-flight sends and flush write-backs when they get SIGTERM.
+    """
+
+    def __init__(self, processes: int, *, shutdown_timeout: float = SHUTDOWN_TIMEOUT_SECONDS) -> None:
+        self.processes = max(1, processes)
+        self.shutdown_timeout = shutdown_timeout
+        self._ctx = multiprocessing.get_context("fork")
+        self._children: dict[int, Any] = {}
+        self._started: dict[int, float] = {}
+        self._failures: dict[int, int] = {}
+        self._restart_at: dict[int, float] = {}
+        self._stopping = False
+
+    def _spawn(self, index: int) -> None:
+        proc = self._ctx.Process(target=_run_child, args=(index,), name=f"worker-{index}")
+        proc.start()
+        self._children[index] = proc
+        self._started[index] = time.monotonic()
+        print(f"[supervisor] started worker {index} (pid={proc.pid})")
+
+    def _on_signal(self, signum: int, frame: Any) -> None:
+        if self._stopping:
+            return
+        self._stopping = True
+        print(f"[supervisor] received signal {signum}; draining {len(self._children)} worker(s)")
+        for proc in self._children.values():
+            if proc.is_alive():
+                os.kill(proc.pid, signal.SIGTERM)
+
+    def _check_children(self) -> None:
+        now = time.monotonic()
+        for index, proc in list(self._children.items()):
+            if proc.is_alive():
+                continue
+            proc.join()
+            del self._children[index]
+            uptime = now - self._started.pop(index, now)
+            if uptime < MIN_UPTIME_SECONDS:
+                self._failures[index] = self._failures.get(index, 0) + 1
+            else:
+                self._failures[index] = 0
+            delay = min(MAX_RESTART_DELAY_SECONDS, 2 ** self._failures[index] - 1)
+            print(f"[supervisor] worker {index} exited (code={proc.exitcode}); restarting in {delay:.0f}s")
+            self._restart_at[index] = now + delay
+
+        for index, at in list(self._restart_at.items()):
+            if at <= now:
+                del self._restart_at[index]
+                self._spawn(index)
+
+    def _drain(self) -> None:
+        deadline = time.monotonic() + self.shutdown_timeout
+        for proc in self._children.values():
+            proc.join(max(0.0, deadline - time.monotonic()))
+        for index, proc in self._children.items():
+            if proc.is_alive():
+                # its claims keep their leases and are requeued by the reaper
+                print(f"[supervisor] worker {index} did not stop in time; killing")
+                proc.kill()
+                proc.join()
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        print(f"[supervisor] starting {self.processes} worker process(es)")
+        for index in range(self.processes):
+            self._spawn(index)
+        while not self._stopping:
+            self._check_children()
+            time.sleep(0.5)
+        self._drain()
+        print("[supervisor] stopped")
+
+
+def main() -> None:
+    Supervisor(PROCESSES).run()
+
+
+if __name__ == "__main__":
+    main()
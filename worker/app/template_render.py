@@ -0,0 +1,128 @@
+# Mirrors api/app/services/template_render.py (the worker image only ships worker/app).
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Hashable, Mapping
+
+
+# {{ key }} with optional whitespace inside the braces.
+_TOKEN_RE = re.compile(r"\{\{\s*([a-zA-Z0-9_]+)\s*\}\}")
+
+# Compiled templates kept per process (keyed by template id + updated_at).
+TEMPLATE_CACHE_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class RenderResult:
+    subject: str | None
+    body: str
+
+
+class TemplateRenderError(ValueError):
+    pass
+
+
+class CompiledText:
+    """A template string parsed once into literal / placeholder parts.
+
+    `parts` alternates literal text and context keys (even indexes are
+    literals, odd indexes keys), so rendering is a single pass with no regex.
+    Unknown or None values render as an empty string.
+    """
+
+    __slots__ = ("parts",)
+
+    def __init__(self, text: str) -> None:
+        self.parts: tuple[str, ...] = tuple(_TOKEN_RE.split(text))
+
+    def render(self, context: Mapping[str, Any]) -> str:
+        parts = self.parts
+        out = [parts[0]]
+        for i in range(1, len(parts), 2):
+            val = context.get(parts[i])
+            if val is not None:
+                out.append(str(val))
+            out.append(parts[i + 1])
+        return "".join(out)
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    subject: CompiledText | None
+    body: CompiledText
+
+    def render(self, context: Mapping[str, Any]) -> RenderResult:
+        return RenderResult(
+            subject=self.subject.render(context) if self.subject is not None else None,
+            body=self.body.render(context),
+        )
+
+
+class TemplateCache:
+    """Thread-safe LRU of compiled templates.
+
+    Keys include the template's updated_at, so an edited template is simply
+    compiled again under its new key and the stale entry ages out.
+    """
+
+    def __init__(self, maxsize: int = TEMPLATE_CACHE_SIZE) -> None:
+        self.maxsize = max(1, int(maxsize))
+        self._entries: OrderedDict[Hashable, CompiledTemplate] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: Hashable, *, subject: str | None, body: str) -> CompiledTemplate:
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                return compiled
+        compiled = CompiledTemplate(
+            subject=CompiledText(subject) if subject is not None else None,
+            body=CompiledText(body),
+        )
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_CACHE = TemplateCache()
+
+
+def compiled_template(template_id: Any, updated_at: datetime | None, *, subject: str | None, body: str) -> CompiledTemplate:
+    """Compiled form of a stored template, cached by (template_id, updated_at)."""
+    return _CACHE.get((template_id, updated_at), subject=subject, body=body)
+
+
+def render_text(text: str, context: Mapping[str, Any]) -> str:
+    """Render an ad-hoc (uncached) template string."""
+    return CompiledText(text).render(context)
+
+
+def render_template(
+    *,
+    subject: str | None,
+    body: str,
+    context: Mapping[str, Any],
+    template_id: Any = None,
+    updated_at: datetime | None = None,
+) -> RenderResult:
+    if template_id is not None:
+        return compiled_template(template_id, updated_at, subject=subject, body=body).render(context)
+    rendered_subject = render_text(subject, context) if subject is not None else None
+    rendered_body = render_text(body, context)
+    return RenderResult(subject=rendered_subject, body=rendered_body)
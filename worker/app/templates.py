@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Mapping, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+@dataclass(frozen=True)
+class CachedTemplate:
+    id: Any
+    name: str
+    subject: str | None
+    body: str
+    provider_template_id: str | None
+    updated_at: datetime
+
+
+class TemplateStore:
+    """Worker-side LRU of template rows, keyed by id and validated by updated_at.
+
+    The claim query only returns each message's template updated_at; rows
+    whose template is cached at that version need no template data from
+    the database at all. Misses and stale entries are fetched for the whole
+    batch in one query. The API also NOTIFYs on template edits/deletes so
+    entries can be dropped early (see invalidate).
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = max(1, int(maxsize))
+        self._entries: OrderedDict[str, CachedTemplate] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def invalidate(self, template_id: Any) -> None:
+        with self._lock:
+            self._entries.pop(str(template_id), None)
+
+    def _lookup(self, template_id: Any, updated_at: datetime | None) -> CachedTemplate | None:
+        with self._lock:
+            entry = self._entries.get(str(template_id))
+            if entry is None or entry.updated_at != updated_at:
+                return None
+            self._entries.move_to_end(str(template_id))
+            return entry
+
+    def _store(self, entries: Sequence[CachedTemplate]) -> None:
+        with self._lock:
+            for entry in entries:
+                self._entries[str(entry.id)] = entry
+                self._entries.move_to_end(str(entry.id))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def hydrate(self, conn: Connection, rows: Sequence[Mapping[str, Any]]) -> list[dict[str, Any]]:
+        """Add template_name/subject/body/provider_template_id to claimed rows."""
+        wanted = {
+            str(row["template_found_id"]): row["template_updated_at"]
+            for row in rows
+            if row["template_found_id"] is not None
+        }
+        found = {tid: self._lookup(tid, at) for tid, at in wanted.items()}
+        missing = [tid for tid, entry in found.items() if entry is None]
+        if missing:
+            fetched = [
+                CachedTemplate(
+                    id=r.id,
+                    name=r.name,
+                    subject=r.subject,
+                    body=r.body,
+                    provider_template_id=r.provider_template_id,
+                    updated_at=r.updated_at,
+                )
+                for r in conn.execute(
+                    text(
+                        """
+                        SELECT id, name, subject, body, provider_template_id, updated_at
+                        FROM templates
+                        WHERE id = ANY(CAST(:ids AS uuid[]))
+                        """
+                    ),
+                    {"ids": missing},
+                )
+            ]
+            self._store(fetched)
+            found.update((str(t.id), t) for t in fetched)
+
+        out: list[dict[str, Any]] = []
+        for row in rows:
+            entry = found.get(str(row["template_found_id"])) if row["template_found_id"] is not None else None
+            out.append(
+                {
+                    **row,
+                    "template_name": entry.name if entry else None,
+                    "template_subject": entry.subject if entry else None,
+                    "template_body": entry.body if entry else None,
+                    "template_provider_template_id": entry.provider_template_id if entry else None,
+                    # the version actually hydrated (may be newer than the claim saw)
+                    "template_updated_at": entry.updated_at if entry else row["template_updated_at"],
+                }
+            )
+        return out
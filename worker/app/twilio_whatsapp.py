@@ -2,9 +2,12 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 from dataclasses import dataclass
 from typing import Any, Mapping, Optional
 
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 
 
@@ -17,6 +20,16 @@ class TwilioConfigError(RuntimeError):
     pass
 
 
+@dataclass(frozen=True)
+class _TwilioSender:
+    client: Client
+    from_: str
+
+
+_SENDER: _TwilioSender | None = None
+_SENDER_LOCK = threading.Lock()
+
+
 def _get_env(name: str) -> str:
     val = os.getenv(name)
     if not val:
@@ -24,16 +37,54 @@ def _get_env(name: str) -> str:
     return val
 
 
-def _client() -> Client:
+def _http_client() -> TwilioHttpClient:
+    # One keep-alive requests.Session for the whole process, with enough
+    # pooled connections for every send thread (WORKER_CONCURRENCY).
+    pool_size = int(os.getenv("TWILIO_HTTP_POOL_SIZE") or os.getenv("WORKER_CONCURRENCY") or "1")
+    timeout = float(os.getenv("TWILIO_HTTP_TIMEOUT_SECONDS", "30"))
+    http = TwilioHttpClient(pool_connections=True, timeout=timeout)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    http.session.mount("https://", adapter)
+    http.session.mount("http://", adapter)
+    return http
+
+
+def _build_sender() -> _TwilioSender:
     account_sid = _get_env("TWILIO_ACCOUNT_SID")
     auth_token = _get_env("TWILIO_AUTH_TOKEN")
-    return Client(account_sid, auth_token)
+    from_ = _get_env("TWILIO_WHATSAPP_FROM")
+    client = Client(account_sid, auth_token, http_client=_http_client())
+
+    # Local/test override: point the REST API at a fake HTTP server.
+    base_url = os.getenv("TWILIO_API_BASE_URL")
+    if base_url:
+        client.api.base_url = base_url.rstrip("/")
+    return _TwilioSender(client=client, from_=from_)
+
+
+def _sender() -> _TwilioSender:
+    """Return the process-wide Twilio client (built on first use)."""
+    global _SENDER
+    with _SENDER_LOCK:
+        if _SENDER is None:
+            _SENDER = _build_sender()
+        return _SENDER
+
+
+def set_client(client: Client | None, *, from_: str | None = None) -> None:
+    """Swap the cached client (e.g. for a fake in tests). None resets it."""
+    global _SENDER
+    with _SENDER_LOCK:
+        if client is None:
+            _SENDER = None
+        else:
+            _SENDER = _TwilioSender(client=client, from_=from_ or _get_env("TWILIO_WHATSAPP_FROM"))
 
 
 def send_whatsapp_text(*, to: str, body: str) -> TwilioSendResult:
-    from_ = _get_env("TWILIO_WHATSAPP_FROM")
-    msg = _client().messages.create(
-        from_=from_,
+    sender = _sender()
+    msg = sender.client.messages.create(
+        from_=sender.from_,
         to=to,
         body=body,
     )
@@ -41,10 +92,10 @@ def send_whatsapp_text(*, to: str, body: str) -> TwilioSendResult:
 
 
 def send_whatsapp_template(*, to: str, content_sid: str, variables: Optional[Mapping[str, Any]] = None) -> TwilioSendResult:
-    from_ = _get_env("TWILIO_WHATSAPP_FROM")
+    sender = _sender()
     content_variables = json.dumps(variables or {})
-    msg = _client().messages.create(
-        from_=from_,
+    msg = sender.client.messages.create(
+        from_=sender.from_,
         to=to,
         content_sid=content_sid,
         content_variables=content_variables,
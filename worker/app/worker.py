@@ -2,21 +2,77 @@ from __future__ import annotations
 
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from typing import Any, Mapping
 
+import random
+import signal
 import smtplib
+import threading
 import uuid
 from email.message import EmailMessage
 
+import psycopg
 from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
-
+from sqlalchemy.engine import Connection, Engine, make_url
+from twilio.base.exceptions import TwilioRestException
+
+from app import metrics
+from app.lanes import lane_quotas, parse_lane_weights
+from app.leases import LeaseKeeper, reap_expired_leases, worker_id
+from app.ratelimit import RateLimited, RateLimiter, parse_rate_limits
+from app.smtp_pool import SmtpConnectionPool, smtp_connect_factory
+from app.template_render import CompiledTemplate, compiled_template
+from app.templates import TemplateStore
 from app.twilio_whatsapp import TwilioConfigError, send_whatsapp_template, send_whatsapp_text
+from app.writeback import ResultBuffer, SendResult
 
 
 POLL_INTERVAL_SECONDS = int(os.getenv("WORKER_POLL_INTERVAL_SECONDS", "5"))
 MAX_RETRIES = int(os.getenv("WORKER_MAX_RETRIES", "3"))
+# Transient failures are requeued after base * 2**retry_count seconds (+ jitter), capped.
+RETRY_BACKOFF_SECONDS = float(os.getenv("WORKER_RETRY_BACKOFF_SECONDS", "30"))
+RETRY_BACKOFF_MAX_SECONDS = float(os.getenv("WORKER_RETRY_BACKOFF_MAX_SECONDS", "3600"))
+# Number of queued messages claimed per poll (single UPDATE ... RETURNING).
+BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", "10"))
+# An empty claim while due messages remain (other workers held them mid-claim)
+# is retried this many times, after base * 2**attempt seconds (+ jitter).
+CLAIM_CONTENTION_RETRIES = int(os.getenv("WORKER_CLAIM_CONTENTION_RETRIES", "5"))
+CLAIM_CONTENTION_BACKOFF_SECONDS = float(os.getenv("WORKER_CLAIM_CONTENTION_BACKOFF_SECONDS", "0.05"))
+# Parallel sends per batch; 1 keeps the original serial behaviour.
+CONCURRENCY = max(1, int(os.getenv("WORKER_CONCURRENCY", "1")))
+# Block on Postgres LISTEN between polls instead of sleeping a fixed interval.
+LISTEN_ENABLED = os.getenv("WORKER_LISTEN", "true").lower() in ("1", "true", "yes", "y", "on")
+# Upper bound on a LISTEN wait (safety net for missed notifications).
+LISTEN_MAX_WAIT_SECONDS = float(os.getenv("WORKER_LISTEN_MAX_WAIT_SECONDS", "60"))
+# Send results are written back in bulk: every FLUSH_SIZE results or FLUSH_INTERVAL seconds.
+FLUSH_SIZE = int(os.getenv("WORKER_FLUSH_SIZE", "100"))
+FLUSH_INTERVAL_SECONDS = float(os.getenv("WORKER_FLUSH_INTERVAL_SECONDS", "1"))
+# Claimed messages carry a lease renewed by a heartbeat; once it lapses (worker
+# crashed or hung) the reaper puts the message back in the queue.
+LEASE_SECONDS = float(os.getenv("WORKER_LEASE_SECONDS", "120"))
+REAPER_INTERVAL_SECONDS = float(os.getenv("WORKER_REAPER_INTERVAL_SECONDS", "30"))
+# Share of each claim batch per priority lane (outbound_messages.lane); unused
+# slots go to the oldest due messages of any lane.
+LANE_WEIGHTS = parse_lane_weights(os.getenv("WORKER_LANE_WEIGHTS", "interactive=6,automation=3,marketing=1"))
+# Cap on one owner's messages in 'sending' (0 = no cap). Enforced per claim, so
+# workers claiming at the same instant can briefly overshoot it.
+MAX_INFLIGHT_PER_OWNER = int(os.getenv("WORKER_MAX_INFLIGHT_PER_OWNER", "0"))
+# Provider send limits per channel / per sender, shared by all workers via Postgres.
+# Example: {"whatsapp": {"per_second": 10, "burst": 20, "per_day": 10000}, "email": {"per_day": 2000}}
+RATE_LIMITS = parse_rate_limits(os.getenv("WORKER_RATE_LIMITS_JSON", ""))
+# Longest a send thread waits for budget before the message is requeued instead.
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("WORKER_RATE_LIMIT_MAX_WAIT_SECONDS", "10"))
+# Prometheus text metrics on this port (+ WORKER_PROCESS_INDEX under the supervisor); 0 disables.
+METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9108"))
+# Oldest API migration (api/alembic/versions) with every column/table the worker uses.
+REQUIRED_MIGRATION = "0019_conversation_state"
+# Must match OUTBOUND_QUEUE_CHANNEL / TEMPLATES_CHANNEL in api/app/db/notify.py.
+OUTBOUND_QUEUE_CHANNEL = "outbound_messages"
+TEMPLATES_CHANNEL = "templates"
+# Templates cached in each worker process (validated by updated_at on every claim).
+TEMPLATE_CACHE_SIZE = int(os.getenv("WORKER_TEMPLATE_CACHE_SIZE", "1024"))
 DEFAULT_COUNTRY_CODE = os.getenv("DEFAULT_COUNTRY_CODE", "+44")
 
 # Email config (shared with API service)
@@ -28,6 +84,34 @@ SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
 SMTP_FROM_EMAIL = os.getenv("SMTP_FROM_EMAIL", "")
 SMTP_FROM_NAME = os.getenv("SMTP_FROM_NAME", "")
 SMTP_USE_STARTTLS = (os.getenv("SMTP_USE_STARTTLS", "true").lower() == "true")
+# Persistent SMTP sessions (defaults to one per send thread).
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", str(CONCURRENCY)))
+SMTP_IDLE_TIMEOUT_SECONDS = float(os.getenv("SMTP_IDLE_TIMEOUT_SECONDS", "60"))
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+
+
+class PermanentSendError(RuntimeError):
+    """A failure that retrying cannot fix (consent, missing contact details, bad config)."""
+
+
+def _is_permanent(err: Exception) -> bool:
+    if isinstance(err, (PermanentSendError, TwilioConfigError)):
+        return True
+    if isinstance(err, TwilioRestException):
+        # 4xx (invalid number, unapproved template, ...) won't succeed on retry;
+        # 429 throttling and 5xx provider errors will.
+        return err.status is not None and 400 <= err.status < 500 and err.status != 429
+    if isinstance(err, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(err, smtplib.SMTPResponseException):
+        return 500 <= err.smtp_code < 600
+    return False
+
+
+def _retry_delay_seconds(retry_count: int) -> float:
+    """Exponential backoff with up to 20% jitter so retries don't stampede."""
+    delay = min(RETRY_BACKOFF_MAX_SECONDS, RETRY_BACKOFF_SECONDS * (2 ** max(0, retry_count)))
+    return delay * (1 + random.random() * 0.2)
 
 
 def _now() -> datetime:
@@ -39,7 +123,128 @@ def _db_url() -> str:
 
 
 def _engine() -> Engine:
-    return create_engine(_db_url(), pool_pre_ping=True)
+    # Each in-flight send holds a connection while recording its result.
+    return create_engine(_db_url(), pool_pre_ping=True, pool_size=max(5, CONCURRENCY + 1))
+
+
+class _QueueListener:
+    """Dedicated autocommit connection that LISTENs for queue notifications.
+
+    The API issues NOTIFY when it inserts into outbound_messages, so an idle
+    worker wakes immediately instead of waiting out a poll interval.
+    """
+
+    def __init__(self, db_url: str, channels: tuple[str, ...], *, stop: threading.Event | None = None) -> None:
+        # psycopg wants a plain libpq URL, not the SQLAlchemy dialect form.
+        self._dsn = make_url(db_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._channels = channels
+        self._stop = stop or threading.Event()
+        self._conn: psycopg.Connection | None = None
+
+    def _connect(self) -> psycopg.Connection:
+        if self._conn is None or self._conn.closed:
+            self._conn = psycopg.connect(self._dsn, autocommit=True)
+            for channel in self._channels:
+                self._conn.execute(f'LISTEN "{channel}"')
+        return self._conn
+
+    def wait(self, timeout: float) -> list[psycopg.Notify]:
+        """Block until a notification arrives, `timeout` seconds pass or a stop is requested."""
+        deadline = time.monotonic() + timeout
+        try:
+            conn = self._connect()
+            while True:
+                # wait in short slices so a shutdown signal is noticed promptly
+                remaining = deadline - time.monotonic()
+                received = list(conn.notifies(timeout=max(0.0, min(remaining, 1.0)), stop_after=1))
+                if received:
+                    # collect anything else already queued without blocking
+                    received.extend(conn.notifies(timeout=0))
+                    return received
+                if remaining <= 1.0 or self._stop.is_set():
+                    return []
+        except psycopg.Error as e:
+            print(f"[worker] LISTEN connection error: {e}")
+            self.close()
+            self._stop.wait(min(timeout, POLL_INTERVAL_SECONDS))
+            return []
+
+    def close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+def _seconds_until_next_due(engine: Engine) -> float:
+    """How long an idle worker may block before a scheduled message is due."""
+    with engine.begin() as conn:
+        due_in = conn.execute(
+            text(
+                """
+                SELECT EXTRACT(EPOCH FROM (min(not_before_at) - now()))
+                FROM outbound_messages
+                WHERE status = 'queued' AND not_before_at > now()
+                """
+            )
+        ).scalar()
+    if due_in is None:
+        return LISTEN_MAX_WAIT_SECONDS
+    return max(0.0, min(float(due_in), LISTEN_MAX_WAIT_SECONDS))
+
+
+# Set by SIGTERM/SIGINT: stop claiming, finish in-flight sends, flush and exit.
+_STOP = threading.Event()
+
+
+def request_stop(signum: int | None = None, frame: Any = None) -> None:
+    if not _STOP.is_set():
+        print("[worker] stop requested; draining in-flight messages")
+    _STOP.set()
+
+
+_EXECUTOR: ThreadPoolExecutor | None = None
+_RESULTS: ResultBuffer | None = None
+_LEASES: LeaseKeeper | None = None
+_LIMITER: RateLimiter | None = None
+_TEMPLATES = TemplateStore(maxsize=TEMPLATE_CACHE_SIZE)
+
+
+def _rate_limiter(engine: Engine) -> RateLimiter:
+    global _LIMITER
+    if _LIMITER is None:
+        _LIMITER = RateLimiter(engine, RATE_LIMITS, max_wait=RATE_LIMIT_MAX_WAIT_SECONDS)
+    return _LIMITER
+
+
+def _lease_keeper(engine: Engine) -> LeaseKeeper:
+    global _LEASES
+    if _LEASES is None:
+        _LEASES = LeaseKeeper(engine, owner=worker_id(), lease_seconds=LEASE_SECONDS)
+    return _LEASES
+
+
+def _result_buffer(engine: Engine) -> ResultBuffer:
+    global _RESULTS
+    if _RESULTS is None:
+        # Once a result is written back the message no longer needs its lease.
+        _RESULTS = ResultBuffer(
+            engine,
+            owner=_lease_keeper(engine).owner,
+            flush_size=FLUSH_SIZE,
+            flush_interval=FLUSH_INTERVAL_SECONDS,
+            on_flush=_lease_keeper(engine).untrack,
+        )
+    return _RESULTS
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix="send")
+    return _EXECUTOR
 
 
 def _normalise_whatsapp_to(phone: str | None) -> str | None:
@@ -63,12 +268,13 @@ def _normalise_whatsapp_to(phone: str | None) -> str | None:
     return f"whatsapp:{DEFAULT_COUNTRY_CODE}{digits}"
 
 
-def _render_text(text_tpl: str, context: Mapping[str, Any]) -> str:
-    # very small renderer: replaces {{key}} with context[key]
-    out = text_tpl
-    for k, v in context.items():
-        out = out.replace("{{" + str(k) + "}}", "" if v is None else str(v))
-    return out
+def _compiled_template(row: Mapping[str, Any]) -> CompiledTemplate:
+    return compiled_template(
+        row["template_id"],
+        row["template_updated_at"],
+        subject=row["template_subject"],
+        body=str(row["template_body"] or ""),
+    )
 
 
 def _strip_html_fallback(html: str) -> str:
@@ -81,6 +287,29 @@ def _strip_html_fallback(html: str) -> str:
     return text.strip()
 
 
+_SMTP_POOL: SmtpConnectionPool | None = None
+_SMTP_POOL_LOCK = threading.Lock()
+
+
+def _smtp_pool() -> SmtpConnectionPool:
+    global _SMTP_POOL
+    with _SMTP_POOL_LOCK:
+        if _SMTP_POOL is None:
+            _SMTP_POOL = SmtpConnectionPool(
+                smtp_connect_factory(
+                    host=SMTP_HOST,
+                    port=SMTP_PORT,
+                    username=SMTP_USERNAME,
+                    password=SMTP_PASSWORD,
+                    use_starttls=SMTP_USE_STARTTLS,
+                ),
+                max_size=SMTP_POOL_SIZE,
+                idle_timeout=SMTP_IDLE_TIMEOUT_SECONDS,
+                max_messages_per_connection=SMTP_MAX_MESSAGES_PER_CONNECTION,
+            )
+        return _SMTP_POOL
+
+
 def _send_email(*, to_email: str, subject: str, body_html: str) -> str:
     """Send email via SMTP or fake provider (dev).
 
@@ -89,16 +318,16 @@ def _send_email(*, to_email: str, subject: str, body_html: str) -> str:
     if EMAIL_PROVIDER == "fake":
         return f"fake-{uuid.uuid4()}"
     if EMAIL_PROVIDER != "smtp":
-        raise RuntimeError(f"Unsupported EMAIL_PROVIDER: {EMAIL_PROVIDER}")
+        raise PermanentSendError(f"Unsupported EMAIL_PROVIDER: {EMAIL_PROVIDER}")
 
     if not SMTP_HOST:
-        raise RuntimeError("SMTP_HOST is not set")
+        raise PermanentSendError("SMTP_HOST is not set")
     if not SMTP_FROM_EMAIL:
-        raise RuntimeError("SMTP_FROM_EMAIL is not set")
+        raise PermanentSendError("SMTP_FROM_EMAIL is not set")
     if not SMTP_USERNAME:
-        raise RuntimeError("SMTP_USERNAME is not set")
+        raise PermanentSendError("SMTP_USERNAME is not set")
     if not SMTP_PASSWORD:
-        raise RuntimeError("SMTP_PASSWORD is not set")
+        raise PermanentSendError("SMTP_PASSWORD is not set")
 
     msg = EmailMessage()
     if SMTP_FROM_NAME:
@@ -110,249 +339,564 @@ def _send_email(*, to_email: str, subject: str, body_html: str) -> str:
     msg.set_content(_strip_html_fallback(body_html))
     msg.add_alternative(body_html, subtype="html")
 
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30) as server:
-        server.ehlo()
-        if SMTP_USE_STARTTLS:
-            server.starttls()
-            server.ehlo()
-        server.login(SMTP_USERNAME, SMTP_PASSWORD)
-        server.send_message(msg)
+    _smtp_pool().send_message(msg)
 
     return f"smtp-{uuid.uuid4()}"
 
 
-def process_once(engine: Engine) -> int:
-    processed = 0
+# Rows a worker may claim right now.
+_DUE_SQL = """
+    status = 'queued'
+    AND (not_before_at IS NULL OR not_before_at <= now())
+    AND retry_count < :max_retries
+"""
+
+
+def _fair_pick_sql(*, by_lane: bool) -> str:
+    """Select up to :pick due message ids, round-robin across owners.
+
+    Each owner's oldest due messages are ranked 1, 2, 3, ... and the batch
+    takes every owner's rank 1 before anyone's rank 2, so one coordinator's
+    bulk send can't starve everyone else. Owners already holding
+    :max_inflight messages in 'sending' are skipped, and only the :pick
+    owners with the oldest due messages are considered.
+
+    Rows are locked (FOR UPDATE SKIP LOCKED) inside each owner's pick, so
+    ranking only sees rows no other worker is claiming; concurrent claims
+    get disjoint batches instead of ranking the same ids and coming back
+    empty.
+    """
+    lane_sql = "AND lane = :lane" if by_lane else ""
+    return f"""
+        SELECT ranked.id
+        FROM (
+            SELECT c.id, c.created_at,
+                   row_number() OVER (PARTITION BY o.owner_user_id ORDER BY c.created_at) AS rn
+            FROM (
+                -- A batch of :pick can't serve more than :pick owners, so only
+                -- the :pick owners waiting longest take row locks.
+                SELECT due.owner_user_id, inflight.n
+                FROM (
+                    SELECT owner_user_id, min(created_at) AS first_at FROM outbound_messages
+                    WHERE {_DUE_SQL} {lane_sql}
+                    GROUP BY owner_user_id
+                ) AS due
+                CROSS JOIN LATERAL (
+                    SELECT COUNT(*) AS n FROM outbound_messages AS s
+                    WHERE s.owner_user_id = due.owner_user_id AND s.status = 'sending'
+                ) AS inflight
+                WHERE inflight.n < :max_inflight
+                ORDER BY due.first_at
+                LIMIT :pick
+            ) AS o
+            CROSS JOIN LATERAL (
+                SELECT q.id, q.created_at
+                FROM outbound_messages AS q
+                WHERE q.owner_user_id = o.owner_user_id AND {_DUE_SQL} {lane_sql}
+                ORDER BY q.created_at ASC
+                LIMIT LEAST(CAST(:pick AS bigint), CAST(:max_inflight AS bigint) - o.n)
+                FOR UPDATE SKIP LOCKED
+            ) AS c
+        ) AS ranked
+        ORDER BY ranked.rn, ranked.created_at
+        LIMIT :pick
+    """
+
+
+def _claim_rows(conn: Connection, pick_sql: str, params: Mapping[str, Any]) -> list[Mapping[str, Any]]:
+    """Move the rows selected by `pick_sql` (a list of ids) to sending and hydrate them."""
+    return list(
+        conn.execute(
+            text(
+                f"""
+                WITH claimed AS (
+                    UPDATE outbound_messages AS m
+                    SET status = 'sending',
+                        claimed_by = :owner,
+                        lease_expires_at = now() + :lease * interval '1 second',
+                        updated_at = now()
+                    WHERE m.id IN ({pick_sql})
+                    RETURNING m.id, m.owner_user_id, m.customer_id, m.channel, m.lane, m.template_id,
+                              m.body, m.variables, m.retry_count, m.created_at
+                )
+                SELECT claimed.*,
+                       c.id AS customer_found_id,
+                       c.name AS customer_name,
+                       c.email AS customer_email,
+                       c.phone AS customer_phone,
+                       c.company AS customer_company,
+                       c.can_contact AS customer_can_contact,
+                       t.id AS template_found_id,
+                       t.updated_at AS template_updated_at
+                FROM claimed
+                LEFT JOIN customers AS c ON c.id = claimed.customer_id
+                LEFT JOIN templates AS t ON t.id = claimed.template_id
+                ORDER BY claimed.created_at ASC
+                """
+            ),
+            params,
+        ).mappings().all()
+    )
+
+
+def _claim_batch(engine: Engine, limit: int) -> list[Mapping[str, Any]]:
+    """Atomically claim up to `limit` queued messages, hydrated for sending.
+
+    `FOR UPDATE SKIP LOCKED` lets several workers claim concurrently without
+    blocking on (or double-claiming) each other's rows. The claimed rows are
+    joined to their customer (and their template's updated_at) in the same
+    round trip; template content comes from the worker's TemplateStore, which
+    only queries templates that aren't cached at that version.
+
+    Claims are split across priority lanes by WORKER_LANE_WEIGHTS; slots a
+    lane can't use are then filled from any lane, all in one transaction.
+    Within each pick owners are served round-robin (see _fair_pick_sql).
+
+    Each claimed row is stamped with this worker's id and a lease that the
+    LeaseKeeper heartbeat renews until the result is written back.
+    """
+    leases = _lease_keeper(engine)
+    params: dict[str, Any] = {
+        "max_retries": MAX_RETRIES,
+        "max_inflight": MAX_INFLIGHT_PER_OWNER if MAX_INFLIGHT_PER_OWNER > 0 else 2**31 - 1,
+        "owner": leases.owner,
+        "lease": leases.lease_seconds,
+    }
+    rows: list[Mapping[str, Any]] = []
     with engine.begin() as conn:
-        # Wait for DB migrations to create required tables.
-        exists = conn.execute(text("SELECT to_regclass('public.outbound_messages')")).scalar()
-        if not exists:
-            print("[worker] waiting for migrations (outbound_messages missing)")
-            time.sleep(2)
-            return 0
-        rows = conn.execute(
+        # One statement per lane, then the fill: each sees the rows claimed
+        # before it (now 'sending'), so per-owner in-flight caps hold.
+        for lane, quota in lane_quotas(limit, LANE_WEIGHTS).items():
+            rows += _claim_rows(conn, _fair_pick_sql(by_lane=True), {**params, "lane": lane, "pick": quota})
+        if len(rows) < limit:
+            rows += _claim_rows(conn, _fair_pick_sql(by_lane=False), {**params, "pick": limit - len(rows)})
+        rows = _TEMPLATES.hydrate(conn, rows)
+    leases.track(r["id"] for r in rows)
+    return rows
+
+
+def _due_backlog(engine: Engine) -> int:
+    """Due messages a claim could take now (owners at MAX_INFLIGHT_PER_OWNER excluded).
+
+    Locked rows are counted too: an empty claim while this is non-zero only
+    means other workers were claiming at the same moment, not an idle queue.
+    """
+    with engine.connect() as conn:
+        return conn.execute(
             text(
+                f"""
+                SELECT COUNT(*)
+                FROM outbound_messages AS q
+                WHERE {_DUE_SQL}
+                  AND (
+                      SELECT COUNT(*) FROM outbound_messages AS s
+                      WHERE s.owner_user_id = q.owner_user_id AND s.status = 'sending'
+                  ) < :max_inflight
                 """
-                SELECT id, owner_user_id, customer_id, channel, template_id, body, variables, retry_count
-                FROM outbound_messages
-                WHERE status = 'queued'
-                  AND (not_before_at IS NULL OR not_before_at <= now())
-                  AND retry_count < :max_retries
-                ORDER BY created_at ASC
-                LIMIT 10
+            ),
+            {
+                "max_retries": MAX_RETRIES,
+                "max_inflight": MAX_INFLIGHT_PER_OWNER if MAX_INFLIGHT_PER_OWNER > 0 else 2**31 - 1,
+            },
+        ).scalar_one()
+
+
+def _release_claims(engine: Engine, ids: list[Any]) -> None:
+    """Return claimed-but-unprocessed messages to the queue."""
+    if not ids:
+        return
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                UPDATE outbound_messages
+                SET status = 'queued', claimed_by = NULL, lease_expires_at = NULL, updated_at = now()
+                WHERE id = ANY(:ids) AND status = 'sending' AND claimed_by = :owner
                 """
             ),
-            {"max_retries": MAX_RETRIES},
-        ).mappings().all()
+            {"ids": ids, "owner": _lease_keeper(engine).owner},
+        )
+    _lease_keeper(engine).untrack(ids)
 
-    for row in rows:
-        msg_id = row["id"]
-        processed += 1
-
-        # claim the job
-        with engine.begin() as conn:
-            updated = conn.execute(
-                text(
-                    """
-                    UPDATE outbound_messages
-                    SET status = 'sending', updated_at = now()
-                    WHERE id = :id AND status = 'queued'
-                    """
-                ),
-                {"id": msg_id},
-            ).rowcount
-        if updated != 1:
-            continue  # someone else took it
 
-        try:
-            # fetch customer contact fields
-            with engine.begin() as conn:
-                customer = conn.execute(
-                    text(
-                        """
-                        SELECT name, email, phone, company, can_contact
-                        FROM customers
-                        WHERE id = :cid
-                        """
-                    ),
-                    {"cid": row["customer_id"]},
-                ).mappings().first()
-
-            if not customer:
-                raise RuntimeError("Customer not found")
-            if customer["can_contact"] is False:
-                raise RuntimeError("Customer consent is disabled (can_contact=false)")
-            channel = (row["channel"] or "").lower()
-
-            provider_sid = None
-            interaction_content = None
-            interaction_subject = None
-
-            # Shared template variables (always available)
-            base_ctx: dict[str, Any] = {
-                "customer_name": customer.get("name"),
-                "company": customer.get("company"),
-            }
-
-            if channel == "whatsapp":
-                to = _normalise_whatsapp_to(customer["phone"])
-                if not to:
-                    raise RuntimeError("Customer has no phone number to send WhatsApp to")
-
-                if row["template_id"] is not None:
-                    with engine.begin() as conn:
-                        tpl = conn.execute(
-                            text(
-                                """
-                                SELECT name, body, provider_template_id
-                                FROM templates
-                                WHERE id = :tid
-                                """
-                            ),
-                            {"tid": row["template_id"]},
-                        ).mappings().first()
-                    if not tpl:
-                        raise RuntimeError("Template not found")
-
-                    variables = row["variables"] or {}
-                    if tpl["provider_template_id"]:
-                        res = send_whatsapp_template(
-                            to=to,
-                            content_sid=tpl["provider_template_id"],
-                            variables=variables,
-                        )
-                        provider_sid = res.sid
-                        interaction_content = f"[template:{tpl['name']}] {variables}"
-                    else:
-                        body = _render_text(tpl["body"], {**base_ctx, **variables})
-                        res = send_whatsapp_text(to=to, body=body)
-                        provider_sid = res.sid
-                        interaction_content = body
+def _process_message(row: Mapping[str, Any], limiter: RateLimiter | None = None) -> SendResult:
+    """Send one claimed message and return its (not yet persisted) outcome.
+
+    Errors are captured on the result rather than raised; a TwilioConfigError
+    result tells the caller to stop the rest of the batch. With a `limiter`,
+    the provider call waits for channel/sender budget first.
+    """
+    started = time.monotonic()
+    result = SendResult(
+        msg_id=row["id"],
+        customer_id=row["customer_id"],
+        owner_user_id=row["owner_user_id"],
+        channel=(row["channel"] or "").lower(),
+    )
+
+    try:
+        if row["customer_found_id"] is None:
+            raise PermanentSendError("Customer not found")
+        if row["customer_can_contact"] is False:
+            raise PermanentSendError("Customer consent is disabled (can_contact=false)")
+        if row["template_id"] is not None and row["template_found_id"] is None:
+            raise PermanentSendError("Template not found")
+        channel = result.channel
+
+        provider_sid = None
+        interaction_content = None
+        interaction_subject = None
+
+        # Shared template variables (always available)
+        base_ctx: dict[str, Any] = {
+            "customer_name": row["customer_name"],
+            "company": row["customer_company"],
+        }
+
+        if channel == "whatsapp":
+            to = _normalise_whatsapp_to(row["customer_phone"])
+            if not to:
+                raise PermanentSendError("Customer has no phone number to send WhatsApp to")
+            if limiter:
+                limiter.acquire(channel, sender=str(row["owner_user_id"]))
+
+            if row["template_id"] is not None:
+                variables = row["variables"] or {}
+                if row["template_provider_template_id"]:
+                    res = send_whatsapp_template(
+                        to=to,
+                        content_sid=row["template_provider_template_id"],
+                        variables=variables,
+                    )
+                    provider_sid = res.sid
+                    interaction_content = f"[template:{row['template_name']}] {variables}"
                 else:
-                    if not row["body"]:
-                        raise RuntimeError("No template_id or body provided")
-                    body = str(row["body"])
+                    body = _compiled_template(row).body.render({**base_ctx, **variables})
                     res = send_whatsapp_text(to=to, body=body)
                     provider_sid = res.sid
                     interaction_content = body
+            else:
+                if not row["body"]:
+                    raise PermanentSendError("No template_id or body provided")
+                body = str(row["body"])
+                res = send_whatsapp_text(to=to, body=body)
+                provider_sid = res.sid
+                interaction_content = body
+
+        elif channel == "email":
+            to_email = (row["customer_email"] or "").strip()
+            if not to_email:
+                raise PermanentSendError("Customer has no email address")
+
+            if row["template_id"] is None:
+                raise PermanentSendError("Email channel requires template_id")
+
+            variables = row["variables"] or {}
+            rendered = _compiled_template(row).render({**base_ctx, **variables})
+            subject = (rendered.subject or "").strip()
+            body_html = rendered.body.strip()
+            if not subject:
+                raise PermanentSendError("Rendered subject is empty")
+            if not body_html:
+                raise PermanentSendError("Rendered body is empty")
+
+            if limiter:
+                limiter.acquire(channel, sender=str(row["owner_user_id"]))
+            provider_sid = _send_email(to_email=to_email, subject=subject, body_html=body_html)
+            interaction_subject = subject
+            interaction_content = body_html
+
+        else:
+            raise PermanentSendError(f"Unsupported channel: {channel}")
+
+        result.provider_message_id = provider_sid
+        result.occurred_at = _now()
+        result.content = interaction_content
+        result.subject = interaction_subject
+    except RateLimited as e:
+        # Out of provider budget (or the limiter itself is unreachable): send
+        # later without spending a retry.
+        result.error = e
+        result.status = "queued"
+        result.retry_after_seconds = e.retry_after
+        result.counts_as_attempt = False
+    except Exception as e:
+        result.error = e
+        # retry_count is the number of failed attempts before this one
+        attempts = int(row["retry_count"] or 0) + 1
+        if _is_permanent(e) or attempts >= MAX_RETRIES:
+            result.status = "failed"  # dead letter
+        else:
+            result.status = "queued"
+            result.retry_after_seconds = _retry_delay_seconds(attempts - 1)
+    _record_send(row, result, time.monotonic() - started)
+    return result
+
+
+def _record_send(row: Mapping[str, Any], result: SendResult, seconds: float) -> None:
+    channel = result.channel or "unknown"
+    metrics.SEND_SECONDS.observe(seconds, channel=channel)
+    if result.ok:
+        metrics.MESSAGES.inc(channel=channel, outcome="sent")
+        if row["created_at"] is not None:
+            waited = (result.occurred_at - row["created_at"]).total_seconds()
+            metrics.TIME_IN_QUEUE.observe(max(0.0, waited), channel=channel, lane=row["lane"] or "")
+        return
+    if not result.counts_as_attempt:
+        outcome = "deferred"
+    else:
+        outcome = "retry" if result.status == "queued" else "failed"
+    metrics.MESSAGES.inc(channel=channel, outcome=outcome)
+    metrics.ERRORS.inc(channel=channel, error=type(result.error).__name__)
 
-            elif channel == "email":
-                to_email = (customer.get("email") or "").strip()
-                if not to_email:
-                    raise RuntimeError("Customer has no email address")
-
-                if row["template_id"] is None:
-                    raise RuntimeError("Email channel requires template_id")
-
-                with engine.begin() as conn:
-                    tpl = conn.execute(
-                        text(
-                            """
-                            SELECT name, subject, body
-                            FROM templates
-                            WHERE id = :tid
-                            """
-                        ),
-                        {"tid": row["template_id"]},
-                    ).mappings().first()
-                if not tpl:
-                    raise RuntimeError("Template not found")
 
-                variables = row["variables"] or {}
-                subject = _render_text(str(tpl.get("subject") or ""), {**base_ctx, **variables}).strip()
-                body_html = _render_text(str(tpl.get("body") or ""), {**base_ctx, **variables}).strip()
-                if not subject:
-                    raise RuntimeError("Rendered subject is empty")
-                if not body_html:
-                    raise RuntimeError("Rendered body is empty")
+def _schema_ready(engine: Engine) -> bool:
+    """True once the database is migrated to at least REQUIRED_MIGRATION.
+
+    Revision ids are numbered (0001_..., 0002_...), so the applied head is
+    compared by its numeric prefix.
+    """
+    required = int(REQUIRED_MIGRATION.split("_", 1)[0])
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT to_regclass('public.alembic_version')")).scalar() is None:
+            return False
+        versions = conn.execute(text("SELECT version_num FROM alembic_version")).scalars().all()
+    for version in versions:
+        prefix = version.split("_", 1)[0]
+        if prefix.isdigit() and int(prefix) >= required:
+            return True
+    return False
+
+
+def _wait_until_ready(engine: Engine) -> bool:
+    """Block until migrations are applied (or a stop is requested)."""
+    while not _STOP.is_set():
+        try:
+            if _schema_ready(engine):
+                return True
+            print(f"[worker] waiting for migrations (need {REQUIRED_MIGRATION})")
+        except Exception as e:
+            print(f"[worker] waiting for database: {e}")
+        _STOP.wait(2)
+    return False
 
-                provider_sid = _send_email(to_email=to_email, subject=subject, body_html=body_html)
-                interaction_subject = subject
-                interaction_content = body_html
 
-            else:
-                raise RuntimeError(f"Unsupported channel: {channel}")
-
-            # record interaction + mark sent
-            with engine.begin() as conn:
-                conn.execute(
-                    text(
-                        """
-                        INSERT INTO interactions
-                            (id, customer_id, owner_user_id, channel, direction, occurred_at, content, subject, provider_message_id, created_at, updated_at)
-                        VALUES
-                            (:interaction_id, :customer_id, :owner_user_id, :channel, 'outbound', :occurred_at, :content, :subject, :provider_message_id, now(), now())
-                        """
-                    ),
-                    {
-                        "customer_id": row["customer_id"],
-                        "owner_user_id": row["owner_user_id"],
-                        "occurred_at": _now(),
-                        "content": interaction_content,
-                        "subject": interaction_subject,
-                        "provider_message_id": provider_sid,
-                        "interaction_id": str(__import__("uuid").uuid4()),
-                        "channel": channel,
-                    },
-                )
+def process_once(engine: Engine) -> int:
+    started = time.monotonic()
+    rows = _claim_batch(engine, BATCH_SIZE)
+    metrics.CLAIM_SECONDS.observe(time.monotonic() - started)
+    if not rows:
+        return 0
+    metrics.CLAIMED.inc(len(rows))
+    buffer = _result_buffer(engine)
+    limiter = _rate_limiter(engine)
+
+    if CONCURRENCY <= 1:
+        for i, row in enumerate(rows):
+            if _STOP.is_set():
+                # shutting down: hand back what we haven't started
+                _release_claims(engine, [r["id"] for r in rows[i:]])
+                break
+            result = _process_message(row, limiter)
+            buffer.add(result)
+            if isinstance(result.error, TwilioConfigError):
+                # configuration issue: stop fast, hand the rest of the batch back
+                _release_claims(engine, [r["id"] for r in rows[i + 1:]])
+                buffer.flush()
+                raise result.error
+        buffer.flush_if_due()
+        return len(rows)
+
+    # Concurrent mode: provider calls (SMTP/Twilio HTTP) are I/O bound, so a
+    # thread pool lets one slow handshake overlap with the rest of the batch.
+    pool = _executor()
+    futures = {pool.submit(_process_message, row, limiter): row for row in rows}
+    config_error: TwilioConfigError | None = None
+    not_started: list[Any] = []
+    cancelled_rest = False
+    for fut in as_completed(futures):
+        if fut.cancelled():
+            continue
+        result = fut.result()
+        buffer.add(result)
+        if isinstance(result.error, TwilioConfigError) and config_error is None:
+            config_error = result.error
+        if (config_error is not None or _STOP.is_set()) and not cancelled_rest:
+            # config error or shutdown: let running sends finish, hand back the rest
+            cancelled_rest = True
+            for other, row in futures.items():
+                if other.cancel():
+                    not_started.append(row["id"])
+
+    _release_claims(engine, not_started)
+    if config_error is not None:
+        buffer.flush()
+        raise config_error
+    buffer.flush_if_due()
+    return len(rows)
+
+
+_NEXT_REAP = 0.0
+
+
+def _reap_if_due(engine: Engine) -> None:
+    global _NEXT_REAP
+    if time.monotonic() < _NEXT_REAP:
+        return
+    _NEXT_REAP = time.monotonic() + REAPER_INTERVAL_SECONDS
+    try:
+        reaped = reap_expired_leases(engine, lease_seconds=LEASE_SECONDS, max_retries=MAX_RETRIES)
+        if reaped:
+            metrics.LEASES_REAPED.inc(reaped)
+            print(f"[worker] requeued {reaped} message(s) with expired leases")
+    except Exception as e:
+        print(f"[worker] reaper error: {e}")
+
+
+def drain(engine: Engine) -> int:
+    """Claim and send until nothing is claimable; returns the number processed.
+
+    An empty claim doesn't always mean an idle queue:
+    - the owners with due messages may all be at MAX_INFLIGHT_PER_OWNER
+      because of this worker's own sends, which stay 'sending' until their
+      buffered results are written back, so flush and claim again;
+    - other workers may have held the rows mid-claim (SKIP LOCKED), so back
+      off briefly and retry, up to CLAIM_CONTENTION_RETRIES times.
+    Buffered results are always flushed before returning.
+    """
+    total = 0
+    contended = 0
+    while not _STOP.is_set():
+        _reap_if_due(engine)
+        n = process_once(engine)
+        if n:
+            print(f"[worker] processed {n} outbound message(s)")
+            total += n
+            contended = 0
+            continue
+        if _result_buffer(engine).flush():
+            continue
+        if contended < CLAIM_CONTENTION_RETRIES and _due_backlog(engine):
+            delay = CLAIM_CONTENTION_BACKOFF_SECONDS * (2**contended)
+            _STOP.wait(delay * (1 + random.random()))
+            contended += 1
+            continue
+        break
+    return total
+
+
+def _queue_depth(engine: Engine) -> dict[tuple[str, ...], float]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                """
+                SELECT status, lane, COUNT(*)
+                FROM outbound_messages
+                WHERE status IN ('queued', 'sending')
+                GROUP BY status, lane
+                """
+            )
+        ).all()
+    return {(status, lane): n for status, lane, n in rows}
 
-                conn.execute(
-                    text(
-                        """
-                        UPDATE outbound_messages
-                        SET status = 'sent',
-                            provider_message_id = :sid,
-                            last_error = NULL,
-                            updated_at = now()
-                        WHERE id = :id
-                        """
-                    ),
-                    {"id": msg_id, "sid": provider_sid},
-                )
 
-        except TwilioConfigError as e:
-            # configuration issue: fail and stop fast (no point retrying)
-            with engine.begin() as conn:
-                conn.execute(
-                    text(
-                        """
-                        UPDATE outbound_messages
-                        SET status='failed', last_error=:err, retry_count = retry_count + 1, updated_at=now()
-                        WHERE id=:id
-                        """
-                    ),
-                    {"id": msg_id, "err": str(e)},
-                )
-            raise
+def _oldest_due_age(engine: Engine) -> dict[tuple[str, ...], float]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                """
+                SELECT lane, EXTRACT(EPOCH FROM (now() - min(COALESCE(not_before_at, created_at))))
+                FROM outbound_messages
+                WHERE status = 'queued' AND (not_before_at IS NULL OR not_before_at <= now())
+                GROUP BY lane
+                """
+            )
+        ).all()
+    return {(lane,): float(age) for lane, age in rows}
+
+
+def _start_metrics(engine: Engine) -> None:
+    if METRICS_PORT <= 0:
+        return
+    port = METRICS_PORT + int(os.getenv("WORKER_PROCESS_INDEX", "0"))
+    metrics.QUEUE_MESSAGES.set_function(lambda: _queue_depth(engine))
+    metrics.QUEUE_OLDEST_DUE_SECONDS.set_function(lambda: _oldest_due_age(engine))
+    try:
+        metrics.start_http_server(port)
+        print(f"[worker] metrics on :{port}/metrics")
+    except OSError as e:
+        print(f"[worker] metrics disabled (port {port}): {e}")
+
+
+def _handle_notifications(notifies: list[psycopg.Notify]) -> None:
+    # Queue notifications only wake the loop; template ones evict the cache entry.
+    for notify in notifies:
+        if notify.channel == TEMPLATES_CHANNEL and notify.payload:
+            _TEMPLATES.invalidate(notify.payload)
+
+
+def _shutdown(engine: Engine, listener: _QueueListener | None) -> None:
+    """Persist buffered results, then release everything this process holds."""
+    for _ in range(3):
+        try:
+            _result_buffer(engine).flush()
+            break
         except Exception as e:
-            with engine.begin() as conn:
-                conn.execute(
-                    text(
-                        """
-                        UPDATE outbound_messages
-                        SET status='failed', last_error=:err, retry_count = retry_count + 1, updated_at=now()
-                        WHERE id=:id
-                        """
-                    ),
-                    {"id": msg_id, "err": str(e)},
-                )
-
-    return processed
+            # unflushed rows stay 'sending' and are requeued by the lease reaper
+            print(f"[worker] write-back error during shutdown: {e}")
+            time.sleep(1)
+    _lease_keeper(engine).stop()
+    if listener is not None:
+        listener.close()
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(wait=True)
+    if _SMTP_POOL is not None:
+        _SMTP_POOL.close()
+    engine.dispose()
 
 
 def main() -> None:
     version = os.getenv("APP_VERSION", "0.0.0")
-    print(f"[worker] starting (version={version})")
+    print(f"[worker] starting (version={version}, pid={os.getpid()}, listen={LISTEN_ENABLED})")
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
     engine = _engine()
+    listener = (
+        _QueueListener(_db_url(), (OUTBOUND_QUEUE_CHANNEL, TEMPLATES_CHANNEL), stop=_STOP)
+        if LISTEN_ENABLED
+        else None
+    )
+    _lease_keeper(engine).start()
+    _start_metrics(engine)
+    ready = False
+
+    while not _STOP.is_set():
+        if not ready:
+            # once at startup, and again after any error in the loop
+            ready = _wait_until_ready(engine)
+            continue
+
+        try:
+            drain(engine)
+        except Exception as e:
+            print(f"[worker] error: {e}")
+            ready = False
+            _STOP.wait(POLL_INTERVAL_SECONDS)
+            continue
 
-    while True:
+        if listener is None:
+            _STOP.wait(POLL_INTERVAL_SECONDS)
+            continue
         try:
-            n = process_once(engine)
-            if n:
-                print(f"[worker] processed {n} outbound message(s)")
+            timeout = _seconds_until_next_due(engine)
         except Exception as e:
             print(f"[worker] error: {e}")
-        time.sleep(POLL_INTERVAL_SECONDS)
+            timeout = POLL_INTERVAL_SECONDS
+        # wake up in time for the next reaper pass
+        _handle_notifications(listener.wait(min(timeout, max(0.0, _NEXT_REAP - time.monotonic()))))
+
+    _shutdown(engine, listener)
+    print("[worker] stopped")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app import metrics
+from app.conversation_state import record_outbound
+
+
+@dataclass
+class SendResult:
+    """Outcome of one send attempt, waiting to be written back."""
+
+    msg_id: Any
+    customer_id: Any
+    owner_user_id: Any
+    channel: str
+    provider_message_id: str | None = None
+    content: str | None = None
+    subject: str | None = None
+    error: Exception | None = None
+    # Failure handling: "queued" (retry after retry_after_seconds) or "failed" (dead letter).
+    status: str | None = None
+    retry_after_seconds: float | None = None
+    # False for deferrals (e.g. rate limited) that shouldn't use up a retry.
+    counts_as_attempt: bool = True
+    occurred_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ResultBuffer:
+    """Buffers send results and writes them back in bulk.
+
+    One flush is one transaction: a multi-row INSERT into interactions for
+    the sent messages, one upsert of their customers' inbox state
+    (customer_conversation_state) and a single UPDATE ... FROM (VALUES ...)
+    for every message status. Flushes happen when `flush_size` results are
+    pending or `flush_interval` seconds have passed since the last flush. `on_flush` is
+    called with the message ids of every batch that was committed.
+
+    Status updates are fenced on the claim (still 'sending', claimed_by =
+    `owner`): if this worker stalled past its lease and the reaper requeued
+    the message (or another worker re-claimed it), the late result is
+    dropped and counted instead of overwriting the newer state. A sent
+    message's interaction is still recorded: it did go out.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        owner: str,
+        flush_size: int = 100,
+        flush_interval: float = 1.0,
+        on_flush: Callable[[Iterable[Any]], None] | None = None,
+    ) -> None:
+        self._engine = engine
+        self.owner = owner
+        self._on_flush = on_flush
+        self.flush_size = max(1, int(flush_size))
+        self.flush_interval = float(flush_interval)
+        self._pending: list[SendResult] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def add(self, result: SendResult) -> None:
+        with self._lock:
+            self._pending.append(result)
+            full = len(self._pending) >= self.flush_size
+        if full:
+            self.flush()
+
+    def flush_if_due(self) -> None:
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            if not batch:
+                return 0
+            started = time.monotonic()
+            try:
+                with self._engine.begin() as conn:
+                    stale = _write_results(conn, batch, owner=self.owner)
+            except Exception:
+                # Messages were already sent; keep their results for the next flush.
+                with self._lock:
+                    self._pending[:0] = batch
+                raise
+            metrics.WRITEBACK_SECONDS.observe(time.monotonic() - started)
+            metrics.WRITEBACK_ROWS.inc(len(batch) - len(stale))
+            if stale:
+                metrics.WRITEBACK_STALE.inc(len(stale))
+                print(
+                    f"[worker] dropped {len(stale)} stale result(s) (lease lost): "
+                    + ", ".join(f"{r.msg_id}={'sent' if r.ok else r.status}" for r in stale)
+                )
+            if self._on_flush is not None:
+                self._on_flush(r.msg_id for r in batch)
+            return len(batch)
+
+
+def _write_results(conn: Connection, results: list[SendResult], *, owner: str) -> list[SendResult]:
+    """Write one batch back; returns the results dropped because their claim was lost."""
+    sent = [r for r in results if r.ok]
+    if sent:
+        values = []
+        params: dict[str, Any] = {}
+        for i, r in enumerate(sent):
+            values.append(
+                f"(CAST(:id_{i} AS uuid), CAST(:cid_{i} AS uuid), CAST(:oid_{i} AS uuid), "
+                f"CAST(:ch_{i} AS interaction_channel), 'outbound', :at_{i}, :content_{i}, :subject_{i}, "
+                f":pmid_{i}, now(), now())"
+            )
+            params.update(
+                {
+                    f"id_{i}": str(uuid.uuid4()),
+                    f"cid_{i}": r.customer_id,
+                    f"oid_{i}": r.owner_user_id,
+                    f"ch_{i}": r.channel,
+                    f"at_{i}": r.occurred_at,
+                    f"content_{i}": r.content,
+                    f"subject_{i}": r.subject,
+                    f"pmid_{i}": r.provider_message_id,
+                }
+            )
+        conn.execute(
+            text(
+                """
+                INSERT INTO interactions
+                    (id, customer_id, owner_user_id, channel, direction, occurred_at, content, subject, provider_message_id, created_at, updated_at)
+                VALUES
+                """
+                + ",\n".join(values)
+            ),
+            params,
+        )
+        record_outbound(conn, [(r.customer_id, r.occurred_at, r.content or r.subject) for r in sent])
+
+    values = []
+    params = {}
+    for i, r in enumerate(results):
+        values.append(
+            f"(CAST(:id_{i} AS uuid), CAST(:status_{i} AS varchar), CAST(:pmid_{i} AS varchar), "
+            f"CAST(:err_{i} AS text), CAST(:inc_{i} AS integer), CAST(:delay_{i} AS double precision))"
+        )
+        params.update(
+            {
+                f"id_{i}": r.msg_id,
+                f"status_{i}": "sent" if r.ok else (r.status or "failed"),
+                f"pmid_{i}": r.provider_message_id,
+                f"err_{i}": None if r.ok else str(r.error),
+                f"inc_{i}": 1 if not r.ok and r.counts_as_attempt else 0,
+                f"delay_{i}": r.retry_after_seconds,
+            }
+        )
+    updated = conn.execute(
+        text(
+            """
+            UPDATE outbound_messages AS m
+            SET status = v.status,
+                provider_message_id = COALESCE(v.provider_message_id, m.provider_message_id),
+                last_error = v.last_error,
+                retry_count = m.retry_count + v.retry_inc,
+                not_before_at = CASE
+                    WHEN v.retry_delay IS NOT NULL THEN now() + v.retry_delay * interval '1 second'
+                    ELSE m.not_before_at
+                END,
+                claimed_by = NULL,
+                lease_expires_at = NULL,
+                updated_at = now()
+            FROM (VALUES
+            """
+            + ",\n".join(values)
+            + """
+            ) AS v(id, status, provider_message_id, last_error, retry_inc, retry_delay)
+            WHERE m.id = v.id AND m.status = 'sending' AND m.claimed_by = :owner
+            RETURNING m.id
+            """
+        ),
+        {**params, "owner": owner},
+    ).scalars().all()
+    written = {str(i) for i in updated}
+    return [r for r in results if str(r.msg_id) not in written]
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+
+from app import worker
+from app.writeback import ResultBuffer
+
+
+def test_claim_batch_marks_rows_sending_with_a_lease(engine, queue, statuses):
+    ids = queue(3)
+
+    rows = worker._claim_batch(engine, 10)
+
+    assert [r["id"] for r in rows] == ids
+    assert all(r["customer_found_id"] is not None for r in rows)
+    owner = worker._lease_keeper(engine).owner
+    for row in statuses(ids).values():
+        assert row.status == "sending"
+        assert row.claimed_by == owner
+        assert row.lease_expires_at is not None
+
+
+def test_claim_batch_skips_messages_not_yet_due(engine, queue):
+    queue(2, not_before_at="2999-01-01T00:00:00+00:00")
+    due = queue(1)
+
+    assert [r["id"] for r in worker._claim_batch(engine, 10)] == due
+
+
+def _params(pick: int) -> dict:
+    return {
+        "max_retries": worker.MAX_RETRIES,
+        "max_inflight": 2**31 - 1,
+        "owner": "other-worker:1",
+        "lease": 60,
+        "pick": pick,
+    }
+
+
+def test_concurrent_claims_get_disjoint_non_empty_batches(engine, queue, new_user):
+    owners = [new_user(), new_user()]
+    for owner in owners:
+        queue(10, owner=owner)
+
+    # Another worker's claim transaction is still open (its rows are locked).
+    with engine.connect() as other:
+        with other.begin():
+            first = worker._claim_rows(other, worker._fair_pick_sql(by_lane=False), _params(6))
+            second = worker._claim_batch(engine, 6)
+
+            assert len(first) == 6
+            assert len(second) == 6
+            assert not {r["id"] for r in first} & {r["id"] for r in second}
+            # still round-robin across owners among the unlocked rows
+            assert {r["owner_user_id"] for r in second} == set(owners)
+
+
+def test_due_backlog_counts_claimable_messages(engine, queue):
+    queue(3)
+    queue(2, not_before_at="2999-01-01T00:00:00+00:00")
+    assert worker._due_backlog(engine) == 3
+
+    worker._claim_batch(engine, 10)
+    assert worker._due_backlog(engine) == 0
+
+
+class _Stop:
+    """Stand-in for worker._STOP that records waits instead of sleeping."""
+
+    def __init__(self) -> None:
+        self.waits: list[float] = []
+
+    def is_set(self) -> bool:
+        return False
+
+    def wait(self, timeout: float) -> bool:
+        self.waits.append(timeout)
+        return False
+
+
+@pytest.fixture()
+def sending(engine, monkeypatch):
+    """Fake provider sends and a result buffer that only flushes when asked."""
+    sent: list[str] = []
+
+    def _send(*, to: str, body: str):
+        sent.append(to)
+        return SimpleNamespace(sid=f"SM{len(sent)}")
+
+    monkeypatch.setattr(worker, "send_whatsapp_text", _send)
+    monkeypatch.setattr(
+        worker,
+        "_RESULTS",
+        ResultBuffer(engine, owner=worker._lease_keeper(engine).owner, flush_size=10_000, flush_interval=3600),
+    )
+    monkeypatch.setattr(worker, "_STOP", _Stop())
+    return sent
+
+
+def test_drain_flushes_own_results_to_get_past_the_inflight_cap(monkeypatch, queue, statuses, engine, sending):
+    monkeypatch.setattr(worker, "MAX_INFLIGHT_PER_OWNER", 5)
+    monkeypatch.setattr(worker, "BATCH_SIZE", 3)
+    ids = queue(30)  # > cap * batch, all for one owner
+
+    assert worker.drain(engine) == 30
+
+    assert len(sending) == 30
+    assert {r.status for r in statuses(ids).values()} == {"sent"}
+    assert worker._STOP.waits == []  # never mistaken for lock contention
+
+
+def test_drain_backs_off_then_goes_idle_while_rows_are_locked(engine, queue, sending):
+    queue(4)
+
+    with engine.connect() as other:
+        with other.begin():
+            # another worker's claim is still open
+            worker._claim_rows(other, worker._fair_pick_sql(by_lane=False), _params(10))
+
+            assert worker.drain(engine) == 0
+
+    waits = worker._STOP.waits
+    assert len(waits) == worker.CLAIM_CONTENTION_RETRIES
+    base = worker.CLAIM_CONTENTION_BACKOFF_SECONDS
+    for attempt, delay in enumerate(waits):
+        assert base * 2**attempt <= delay <= 2 * base * 2**attempt
+    assert sending == []
+
+
+def test_fair_pick_only_locks_rows_of_the_oldest_owners(engine, queue, new_user):
+    owners = [new_user() for _ in range(4)]
+    for owner in owners:
+        queue(5, owner=owner)
+
+    with engine.connect() as picker, engine.connect() as probe:
+        with picker.begin():
+            picked = picker.execute(text(worker._fair_pick_sql(by_lane=False)), _params(2)).scalars().all()
+            with probe.begin():
+                unlocked = probe.execute(
+                    text("SELECT owner_user_id FROM outbound_messages FOR UPDATE SKIP LOCKED")
+                ).scalars().all()
+
+    assert len(picked) == 2
+    # only the two owners waiting longest had rows locked (at most :pick each)
+    assert Counter(unlocked) == {owners[0]: 3, owners[1]: 3, owners[2]: 5, owners[3]: 5}
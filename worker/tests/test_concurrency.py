@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app import worker
+from app.twilio_whatsapp import TwilioConfigError
+from app.writeback import ResultBuffer
+
+
+@pytest.fixture()
+def pool(engine, monkeypatch):
+    """Concurrent mode with a fresh executor and a result buffer flushed on demand."""
+    monkeypatch.setattr(worker, "CONCURRENCY", 4)
+    monkeypatch.setattr(worker, "_EXECUTOR", None)
+    monkeypatch.setattr(worker, "_STOP", threading.Event())
+    buffer = ResultBuffer(engine, owner=worker._lease_keeper(engine).owner, flush_size=10_000, flush_interval=3600)
+    monkeypatch.setattr(worker, "_RESULTS", buffer)
+    yield buffer
+    if worker._EXECUTOR is not None:
+        worker._EXECUTOR.shutdown(wait=True)
+
+
+def test_batch_is_sent_on_the_thread_pool(engine, queue, statuses, pool, monkeypatch):
+    threads: set[str] = set()
+
+    def send(*, to: str, body: str):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.2)
+        return SimpleNamespace(sid=f"SM-{time.monotonic_ns()}")
+
+    monkeypatch.setattr(worker, "send_whatsapp_text", send)
+    ids = queue(4)
+
+    started = time.monotonic()
+    assert worker.process_once(engine) == 4
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.6  # four 0.2s sends overlapped
+    assert len(threads) > 1 and all(name.startswith("send") for name in threads)
+    assert pool.flush() == 4
+    assert {r.status for r in statuses(ids).values()} == {"sent"}
+
+
+def test_config_error_stops_the_batch_and_releases_unstarted_messages(engine, queue, statuses, pool, monkeypatch):
+    monkeypatch.setattr(worker, "CONCURRENCY", 2)
+    calls: list[str] = []
+    lock = threading.Lock()
+
+    def send(*, to: str, body: str):
+        with lock:
+            calls.append(to)
+            first = len(calls) == 1
+        if first:
+            raise TwilioConfigError("TWILIO_ACCOUNT_SID is not set")
+        time.sleep(0.3)  # still running when the error is seen
+        return SimpleNamespace(sid="SM-ok")
+
+    monkeypatch.setattr(worker, "send_whatsapp_text", send)
+    ids = queue(8)
+
+    with pytest.raises(TwilioConfigError):
+        worker.process_once(engine)
+
+    rows = statuses(ids).values()
+    by_status = {s: [r for r in rows if r.status == s] for s in ("failed", "sent", "queued")}
+    assert len(by_status["failed"]) == 1
+    # sends already running were allowed to finish and were written back
+    assert len(by_status["sent"]) == len(calls) - 1
+    # the rest were handed back without using an attempt
+    assert len(by_status["queued"]) == 8 - len(calls) >= 4
+    assert all(r.claimed_by is None and r.retry_count == 0 for r in by_status["queued"])
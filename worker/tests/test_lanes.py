@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from collections import Counter
+
+import pytest
+
+from app import worker
+from app.lanes import lane_quotas, parse_lane_weights
+
+WEIGHTS = {"interactive": 6, "automation": 3, "marketing": 1}
+
+
+@pytest.mark.parametrize(
+    "limit, expected",
+    [
+        (10, {"interactive": 6, "automation": 3, "marketing": 1}),
+        (11, {"interactive": 7, "automation": 3, "marketing": 1}),  # leftover to the heaviest lane
+        (5, {"interactive": 3, "automation": 1, "marketing": 1}),  # every lane keeps a slot
+        (2, {"interactive": 1, "automation": 1, "marketing": 0}),
+        (1, {"interactive": 1, "automation": 0, "marketing": 0}),
+        (0, {}),
+    ],
+)
+def test_lane_quotas_follow_the_weights(limit, expected):
+    quotas = lane_quotas(limit, WEIGHTS)
+    assert quotas == expected
+    assert sum(quotas.values()) == limit
+
+
+def test_zero_weight_lanes_get_no_quota():
+    assert lane_quotas(4, {"interactive": 1, "marketing": 0}) == {"interactive": 4}
+    assert lane_quotas(4, {}) == {}
+
+
+def test_parse_lane_weights_skips_bad_entries():
+    assert parse_lane_weights(" interactive=6, marketing=x ,=2,automation=-1") == {
+        "interactive": 6,
+        "automation": 0,
+    }
+
+
+def test_interactive_messages_ride_the_next_batch_behind_a_blast(engine, queue, new_user, monkeypatch):
+    monkeypatch.setattr(worker, "LANE_WEIGHTS", WEIGHTS)
+    owner = new_user()
+    blast = queue(10, owner=owner, lane="marketing")
+    replies = queue(2, owner=owner, lane="interactive")  # queued after the blast
+
+    rows = worker._claim_batch(engine, 5)
+
+    assert Counter(r["lane"] for r in rows) == {"interactive": 2, "marketing": 3}
+    # unused interactive/automation slots went to the oldest marketing messages
+    assert [r["id"] for r in rows if r["lane"] == "marketing"] == blast[:3]
+    assert {r["id"] for r in rows} >= set(replies)
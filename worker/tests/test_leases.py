@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from sqlalchemy import text
+
+from app.leases import LeaseKeeper, reap_expired_leases
+
+
+def _claim(engine, ids, owner: str, *, expires_in: float) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                UPDATE outbound_messages
+                SET status = 'sending', claimed_by = :owner,
+                    lease_expires_at = now() + :s * interval '1 second'
+                WHERE id = ANY(:ids)
+                """
+            ),
+            {"ids": list(ids), "owner": owner, "s": expires_in},
+        )
+
+
+def test_reaper_requeues_expired_leases_only(engine, queue, statuses):
+    expired = queue(2)
+    live = queue(1)
+    last_try = queue(1, retry_count=2)
+    _claim(engine, expired + last_try, "crashed:1", expires_in=-5)
+    _claim(engine, live, "alive:1", expires_in=60)
+
+    assert reap_expired_leases(engine, lease_seconds=60, max_retries=3) == 3
+
+    rows = statuses(expired + live + last_try)
+    for msg_id in expired:
+        assert (rows[msg_id].status, rows[msg_id].claimed_by, rows[msg_id].retry_count) == ("queued", None, 1)
+        assert "crashed:1" in rows[msg_id].last_error
+    assert rows[live[0]].status == "sending" and rows[live[0]].claimed_by == "alive:1"
+    # the crashed attempt counts, so a poison message is dead-lettered
+    assert rows[last_try[0]].status == "failed"
+
+
+def test_heartbeat_only_extends_this_workers_claims(engine, queue, statuses):
+    mine = queue(1)
+    theirs = queue(1)
+    _claim(engine, mine, "me:1", expires_in=1)
+    _claim(engine, theirs, "other:1", expires_in=1)
+    before = statuses(mine + theirs)
+
+    keeper = LeaseKeeper(engine, owner="me:1", lease_seconds=300)
+    keeper.track(mine + theirs)
+    assert keeper.extend() == 1
+
+    after = statuses(mine + theirs)
+    assert after[mine[0]].lease_expires_at > before[mine[0]].lease_expires_at
+    assert after[theirs[0]].lease_expires_at == before[theirs[0]].lease_expires_at
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+from app import metrics
+
+
+@pytest.fixture()
+def scrape():
+    server = metrics.start_http_server(0, host="127.0.0.1")
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def _scrape(path: str = "/metrics") -> tuple[str, str]:
+        with urllib.request.urlopen(base + path, timeout=5) as resp:
+            return resp.headers["Content-Type"], resp.read().decode("utf-8")
+
+    yield _scrape
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def registered():
+    """Metrics created by a test are dropped from the registry afterwards."""
+    before = list(metrics.REGISTRY)
+    yield
+    metrics.REGISTRY[:] = before
+
+
+def test_scrape_serves_prometheus_text(scrape, registered):
+    sent = metrics.Counter("test_sent_total", "Sent messages.", ("channel", "error"))
+    sent.inc(channel="whatsapp", error='Bad "quote" \\ path\nnext line')
+    sent.inc(2, channel="email", error="none")
+    depth = metrics.CallbackGauge("test_queue_messages", "Queue depth.", ("status",))
+    depth.set_function(lambda: {("queued",): 7, ("sending",): 1.5})
+    latency = metrics.Histogram("test_send_seconds", "Send time.", buckets=(0.1, 1))
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    content_type, body = scrape()
+
+    assert content_type.startswith("text/plain; version=0.0.4")
+    lines = body.splitlines()
+    for name, kind in [
+        ("test_sent_total", "counter"),
+        ("test_queue_messages", "gauge"),
+        ("test_send_seconds", "histogram"),
+        ("worker_messages_total", "counter"),
+        ("worker_queue_messages", "gauge"),
+        ("worker_claim_duration_seconds", "histogram"),
+    ]:
+        assert f"# TYPE {name} {kind}" in lines
+    assert "# HELP test_sent_total Sent messages." in lines
+    # backslash, double quote and newline are escaped in label values
+    assert 'test_sent_total{channel="whatsapp",error="Bad \\"quote\\" \\\\ path\\nnext line"} 1' in lines
+    assert 'test_sent_total{channel="email",error="none"} 2' in lines
+    assert 'test_queue_messages{status="queued"} 7' in lines
+    assert 'test_queue_messages{status="sending"} 1.5' in lines
+    assert 'test_send_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_send_seconds_bucket{le="1"} 2' in lines
+    assert 'test_send_seconds_bucket{le="+Inf"} 2' in lines
+    assert "test_send_seconds_sum 0.55" in lines
+    assert "test_send_seconds_count 2" in lines
+
+
+def test_failing_gauge_is_left_out_of_the_scrape(scrape, registered):
+    def broken():
+        raise RuntimeError("database is down")
+
+    metrics.CallbackGauge("test_broken_gauge", "Always fails.").set_function(broken)
+    metrics.Counter("test_after_total", "Still rendered.").inc()
+
+    _, body = scrape()
+
+    assert "# TYPE test_broken_gauge gauge" in body
+    assert not [line for line in body.splitlines() if line.startswith("test_broken_gauge")]
+    assert "test_after_total 1" in body.splitlines()
+
+
+def test_unknown_path_is_404(scrape):
+    with pytest.raises(urllib.error.HTTPError) as err:
+        scrape("/nope")
+    assert err.value.code == 404
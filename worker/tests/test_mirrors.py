@@ -0,0 +1,45 @@
+"""The worker image only ships worker/app, so a few API modules are copied
+into it. Both trees use the package name `app`, so the copies are compared
+as source rather than imported side by side."""
+from __future__ import annotations
+
+import ast
+from pathlib import Path
+
+WORKER_APP = Path(__file__).resolve().parents[1] / "app"
+API_SERVICES = Path(__file__).resolve().parents[2] / "api" / "app" / "services"
+
+
+def _without_mirror_header(path: Path) -> str:
+    first, rest = path.read_text().split("\n", 1)
+    assert first.startswith("# Mirrors "), f"{path.name} lost its '# Mirrors ...' header"
+    return rest
+
+
+def _constants(path: Path, *names: str) -> dict[str, object]:
+    """Module-level literal assignments, read without importing the module."""
+    found = {}
+    for node in ast.parse(path.read_text()).body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            if node.targets[0].id in names:
+                found[node.targets[0].id] = ast.literal_eval(node.value)
+    assert set(found) == set(names), f"{path.name} is missing {set(names) - set(found)}"
+    return found
+
+
+def test_template_render_matches_api():
+    assert _without_mirror_header(WORKER_APP / "template_render.py") == (
+        API_SERVICES / "template_render.py"
+    ).read_text()
+
+
+def test_smtp_pool_matches_api():
+    assert _without_mirror_header(WORKER_APP / "smtp_pool.py") == (API_SERVICES / "smtp_pool.py").read_text()
+
+
+def test_conversation_state_upsert_matches_api():
+    # Worker and API write the same customer_conversation_state rows.
+    names = ("_RECORD_MESSAGES_SQL", "PREVIEW_LENGTH")
+    assert _constants(WORKER_APP / "conversation_state.py", *names) == _constants(
+        API_SERVICES / "conversation_state.py", *names
+    )
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from app import ratelimit, worker
+from app.ratelimit import RateLimited, RateLimiter, RateLimiterUnavailable, parse_rate_limits
+
+
+def _tokens(engine, key: str) -> float | None:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT tokens FROM rate_limit_buckets WHERE key = :k"), {"k": key}).scalar()
+
+
+def test_first_take_creates_the_shared_bucket(engine):
+    limiter = RateLimiter(engine, parse_rate_limits('{"whatsapp": {"per_second": 0.001, "burst": 2}}'), max_wait=0)
+
+    limiter.acquire("whatsapp")
+    limiter.acquire("whatsapp")
+    assert _tokens(engine, "whatsapp") == pytest.approx(0, abs=0.01)
+    with pytest.raises(RateLimited):
+        limiter.acquire("whatsapp")
+
+    # A second process draws from the same row.
+    other = RateLimiter(engine, parse_rate_limits('{"whatsapp": {"per_second": 0.001, "burst": 2}}'), max_wait=0)
+    with pytest.raises(RateLimited):
+        other.acquire("whatsapp")
+
+
+def test_rolled_back_first_take_still_creates_the_bucket_later(engine):
+    limiter = RateLimiter(engine, {"email": parse_rate_limits('{"email": {"burst": 5}}')["email"]}, max_wait=0)
+    failures = []
+
+    def fail_once(conn, cursor, statement, parameters, context, executemany):
+        if "UPDATE rate_limit_buckets" in statement and not failures:
+            failures.append(statement)
+            raise OperationalError(statement, parameters, Exception("connection lost"))
+
+    event.listen(engine, "before_cursor_execute", fail_once)
+    try:
+        # A database error is a deferral, not a failed send...
+        with pytest.raises(RateLimiterUnavailable) as err:
+            limiter.acquire("email")
+        assert err.value.retry_after > 0
+    finally:
+        event.remove(engine, "before_cursor_execute", fail_once)
+    # ...and the rolled-back INSERT didn't leave the bucket marked as created.
+    assert _tokens(engine, "email") is None
+    limiter.acquire("email")
+    assert _tokens(engine, "email") is not None
+
+
+@pytest.mark.parametrize("local_ttl", [1.0, 0.0], ids=["local", "shared"])
+def test_sender_token_is_returned_when_the_channel_is_empty(engine, monkeypatch, local_ttl):
+    monkeypatch.setattr(ratelimit, "_LOCAL_TOKEN_TTL_SECONDS", local_ttl)
+    limits = parse_rate_limits(
+        '{"whatsapp": {"per_second": 0.001, "burst": 1, "per_sender": {"per_second": 0.001, "burst": 1}}}'
+    )
+    limiter = RateLimiter(engine, limits, max_wait=0)
+
+    limiter.acquire("whatsapp", sender="a")
+    with pytest.raises(RateLimited):
+        limiter.acquire("whatsapp", sender="b")  # channel bucket is empty
+    if not local_ttl:
+        assert _tokens(engine, "whatsapp:sender:b") == pytest.approx(1, abs=0.01)
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE rate_limit_buckets SET tokens = 1 WHERE key = 'whatsapp'"))
+    # b's only token wasn't spent on the failed attempt
+    limiter.acquire("whatsapp", sender="b")
+
+
+def test_waiting_thread_does_not_hold_the_bucket_lock(engine):
+    limiter = RateLimiter(engine, parse_rate_limits('{"email": {"per_second": 2, "burst": 1}}'), max_wait=0)
+    limiter.acquire("email")
+    bucket = limiter._bucket("email", limiter._limits["email"].channel)
+
+    waiter = threading.Thread(target=bucket.take, args=(time.monotonic() + 5,))
+    waiter.start()
+    time.sleep(0.05)  # the waiter is now sleeping for the next token (~0.5s)
+    started = time.monotonic()
+    with pytest.raises(RateLimited):
+        limiter.acquire("email")
+    assert time.monotonic() - started < 0.25
+    waiter.join()
+
+
+def test_limiter_errors_defer_the_message_without_using_an_attempt():
+    class Broken:
+        def acquire(self, channel, *, sender=None):
+            raise RateLimiterUnavailable(channel, RuntimeError("db down"))
+
+    row = {
+        "id": "m1",
+        "customer_id": "c1",
+        "owner_user_id": "u1",
+        "channel": "whatsapp",
+        "lane": "interactive",
+        "customer_found_id": "c1",
+        "customer_can_contact": True,
+        "customer_phone": "+447700900001",
+        "customer_name": "Test",
+        "customer_company": None,
+        "template_id": None,
+        "body": "hi",
+        "retry_count": 2,
+        "created_at": None,
+    }
+    result = worker._process_message(row, Broken())
+
+    assert result.status == "queued"
+    assert not result.counts_as_attempt
+    assert result.retry_after_seconds == pytest.approx(5.0)
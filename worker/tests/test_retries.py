@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import smtplib
+
+import pytest
+from sqlalchemy import text
+from twilio.base.exceptions import TwilioRestException
+
+from app import worker
+from app.twilio_whatsapp import TwilioConfigError
+from app.writeback import ResultBuffer
+
+
+@pytest.mark.parametrize(
+    "err, permanent",
+    [
+        (worker.PermanentSendError("no phone"), True),
+        (TwilioConfigError("missing TWILIO_ACCOUNT_SID"), True),
+        (TwilioRestException(400, "/Messages", "invalid number"), True),
+        (TwilioRestException(404, "/Messages"), True),
+        (TwilioRestException(429, "/Messages", "too many requests"), False),
+        (TwilioRestException(503, "/Messages"), False),
+        (smtplib.SMTPRecipientsRefused({"x@example.com": (550, b"no such user")}), True),
+        (smtplib.SMTPResponseException(554, b"rejected"), True),
+        (smtplib.SMTPResponseException(421, b"try again later"), False),
+        (smtplib.SMTPServerDisconnected("gone"), False),
+        (TimeoutError(), False),
+    ],
+)
+def test_is_permanent(err, permanent):
+    assert worker._is_permanent(err) is permanent
+
+
+def test_retry_delay_doubles_with_jitter_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(worker, "RETRY_BACKOFF_SECONDS", 30.0)
+    monkeypatch.setattr(worker, "RETRY_BACKOFF_MAX_SECONDS", 200.0)
+    for retry_count, base in [(0, 30), (1, 60), (2, 120), (3, 200), (10, 200)]:
+        for _ in range(20):
+            assert base <= worker._retry_delay_seconds(retry_count) <= base * 1.2
+
+
+def _row(msg_id, customer_id, owner, retry_count: int) -> dict:
+    return {
+        "id": msg_id,
+        "customer_id": customer_id,
+        "owner_user_id": owner,
+        "channel": "whatsapp",
+        "lane": "interactive",
+        "customer_found_id": customer_id,
+        "customer_can_contact": True,
+        "customer_phone": "+447700900001",
+        "customer_name": "Test",
+        "customer_company": None,
+        "template_id": None,
+        "body": "hi",
+        "retry_count": retry_count,
+        "created_at": None,
+    }
+
+
+@pytest.fixture()
+def failing_send(monkeypatch):
+    def _send(*, to: str, body: str):
+        raise TwilioRestException(503, "/Messages", "provider down")
+
+    monkeypatch.setattr(worker, "send_whatsapp_text", _send)
+    monkeypatch.setattr(worker, "MAX_RETRIES", 3)
+
+
+def test_transient_failure_is_requeued_with_backoff(failing_send):
+    result = worker._process_message(_row("m1", "c1", "u1", retry_count=0))
+
+    assert result.status == "queued"
+    assert result.counts_as_attempt
+    assert worker.RETRY_BACKOFF_SECONDS <= result.retry_after_seconds <= worker.RETRY_BACKOFF_SECONDS * 1.2
+
+
+def test_last_attempt_moves_the_message_to_failed(engine, queue, statuses, failing_send):
+    (msg_id,) = queue(1, retry_count=2)
+    (row,) = worker._claim_batch(engine, 1)
+
+    result = worker._process_message(row)
+    assert result.status == "failed"
+
+    buffer = ResultBuffer(engine, owner=worker._lease_keeper(engine).owner)
+    buffer.add(result)
+    assert buffer.flush() == 1
+
+    stored = statuses([msg_id])[msg_id]
+    assert stored.status == "failed"
+    assert stored.retry_count == 3
+    assert "provider down" in stored.last_error
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM outbound_messages WHERE status = 'queued'")).scalar() == 0
+
+
+def test_permanent_failure_skips_remaining_retries(failing_send):
+    row = {**_row("m1", "c1", "u1", retry_count=0), "customer_can_contact": False}
+
+    result = worker._process_message(row)
+
+    assert result.status == "failed"
+    assert isinstance(result.error, worker.PermanentSendError)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from app import worker
+
+VERSIONS_DIR = Path(__file__).resolve().parents[2] / "api" / "alembic" / "versions"
+
+
+@pytest.fixture()
+def applied(engine):
+    """applied(*versions) rewrites alembic_version for one test; the real head is restored after."""
+    with engine.connect() as conn:
+        head = conn.execute(text("SELECT version_num FROM alembic_version")).scalars().all()
+
+    def _applied(*versions: str) -> None:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM alembic_version"))
+            for version in versions:
+                conn.execute(text("INSERT INTO alembic_version (version_num) VALUES (:v)"), {"v": version})
+
+    yield _applied
+    _applied(*head)
+
+
+def test_required_migration_is_a_real_revision():
+    (path,) = VERSIONS_DIR.glob(f"{worker.REQUIRED_MIGRATION}.py")
+    assert re.search(rf'^revision = "{worker.REQUIRED_MIGRATION}"$', path.read_text(), re.M)
+
+
+def test_migrated_database_is_ready(engine):
+    assert worker._schema_ready(engine)
+
+
+@pytest.mark.parametrize(
+    "versions, ready",
+    [
+        (("0019_conversation_state",), True),
+        (("0025_some_later_change",), True),  # compared by number, not by name
+        (("0018_interactions_customer_dir",), False),
+        (("0002_outbound",), False),
+        (("0018_interactions_customer_dir", "0020_thread_keyset"), True),  # any head (branches)
+        (("abc_not_numbered",), False),
+        ((), False),
+    ],
+)
+def test_schema_ready_compares_the_revision_number(applied, engine, monkeypatch, versions, ready):
+    monkeypatch.setattr(worker, "REQUIRED_MIGRATION", "0019_conversation_state")
+    applied(*versions)
+    assert worker._schema_ready(engine) is ready
+
+
+def test_no_alembic_version_table_is_not_ready(engine):
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE alembic_version RENAME TO alembic_version_saved"))
+    try:
+        assert worker._schema_ready(engine) is False
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE alembic_version_saved RENAME TO alembic_version"))
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import os
+import signal
+import time
+
+import pytest
+
+from app import supervisor
+
+
+def _crash(index: int) -> None:
+    os._exit(3)
+
+
+def _wait_dead(proc, timeout: float = 5.0) -> None:
+    proc.join(timeout)
+    assert not proc.is_alive()
+
+
+@pytest.fixture()
+def sup(monkeypatch):
+    monkeypatch.setattr(supervisor, "_run_child", _crash)
+    s = supervisor.Supervisor(1, shutdown_timeout=0.5)
+    yield s
+    for proc in s._children.values():
+        if proc.is_alive():
+            proc.kill()
+            proc.join()
+
+
+def test_crashing_child_is_restarted_with_backoff(sup, monkeypatch):
+    monkeypatch.setattr(supervisor, "MAX_RESTART_DELAY_SECONDS", 5.0)
+    sup._spawn(0)
+
+    delays = []
+    for _ in range(4):
+        proc = sup._children[0]
+        _wait_dead(proc)
+        assert proc.exitcode == 3
+        before = time.monotonic()
+        sup._check_children()
+        assert 0 not in sup._children  # not restarted straight away
+        delays.append(sup._restart_at[0] - before)
+        # skip the wait
+        sup._restart_at[0] = time.monotonic()
+        sup._check_children()
+        assert sup._children[0].pid != proc.pid
+
+    # 2**failures - 1, capped
+    assert delays == pytest.approx([1, 3, 5, 5], abs=0.1)
+
+
+def test_long_running_child_resets_the_backoff(sup):
+    sup._spawn(0)
+    first = sup._children[0]
+    _wait_dead(first)
+    sup._failures[0] = 4
+    sup._started[0] -= supervisor.MIN_UPTIME_SECONDS  # pretend it ran for a while
+
+    sup._check_children()
+
+    assert sup._failures[0] == 0
+    assert sup._children[0].pid != first.pid  # restarted without delay
+
+
+def test_shutdown_drains_and_kills_children_that_ignore_sigterm(monkeypatch):
+    ctx = supervisor.multiprocessing.get_context("fork")
+    ready = ctx.Event()
+
+    def stubborn(index: int) -> None:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        ready.set()
+        time.sleep(60)
+
+    def graceful(index: int) -> None:
+        ready.set()
+        time.sleep(60)  # default SIGTERM handling: exits at once
+
+    s = supervisor.Supervisor(2, shutdown_timeout=0.5)
+    for index, target in enumerate((stubborn, graceful)):
+        monkeypatch.setattr(supervisor, "_run_child", target)
+        ready.clear()
+        s._spawn(index)
+        assert ready.wait(5)
+
+    started = time.monotonic()
+    s._on_signal(signal.SIGTERM, None)
+    s._drain()
+
+    assert time.monotonic() - started < 5
+    assert s._children[0].exitcode == -signal.SIGKILL
+    assert s._children[1].exitcode == -signal.SIGTERM
+    assert not any(p.is_alive() for p in s._children.values())
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from sqlalchemy import event, text
+
+from app import worker
+from app.templates import TemplateStore
+
+
+@pytest.fixture()
+def template(engine):
+    """template(body) -> id of a new WhatsApp template."""
+
+    def _template(body: str) -> uuid.UUID:
+        template_id = uuid.uuid4()
+        with engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO templates (id, channel, name, body) VALUES (:id, 'whatsapp', :name, :body)"),
+                {"id": template_id, "name": f"t-{template_id}", "body": body},
+            )
+        return template_id
+
+    return _template
+
+
+def _edit(engine, template_id, body: str, *, touch: bool = True) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "UPDATE templates SET body = :body"
+                + (", updated_at = clock_timestamp()" if touch else "")
+                + " WHERE id = :id"
+            ),
+            {"id": template_id, "body": body},
+        )
+
+
+def _claimed(engine, *template_ids) -> list[dict]:
+    """Rows shaped like _claim_batch output (before hydrate) for the given templates."""
+    with engine.connect() as conn:
+        versions = dict(
+            conn.execute(
+                text("SELECT id, updated_at FROM templates WHERE id = ANY(:ids)"), {"ids": list(template_ids)}
+            ).all()
+        )
+    return [{"template_found_id": tid, "template_updated_at": versions[tid]} for tid in template_ids]
+
+
+@pytest.fixture()
+def template_queries(engine):
+    """Counts the template fetches issued by TemplateStore.hydrate."""
+    seen: list[str] = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if "FROM templates" in statement and "provider_template_id" in statement:
+            seen.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield seen
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def _hydrate(engine, store: TemplateStore, *template_ids) -> list[str]:
+    rows = _claimed(engine, *template_ids)
+    with engine.connect() as conn:
+        return [r["template_body"] for r in store.hydrate(conn, rows)]
+
+
+def test_cached_version_needs_no_query_and_an_edit_is_refetched(engine, template, template_queries):
+    store = TemplateStore()
+    tid = template("Hi {{customer_name}}")
+
+    assert _hydrate(engine, store, tid) == ["Hi {{customer_name}}"]
+    assert _hydrate(engine, store, tid, tid) == ["Hi {{customer_name}}"] * 2
+    assert len(template_queries) == 1
+
+    _edit(engine, tid, "Hello {{customer_name}}")
+
+    assert _hydrate(engine, store, tid) == ["Hello {{customer_name}}"]
+    assert len(template_queries) == 2
+
+
+def test_least_recently_used_template_is_evicted(engine, template, template_queries):
+    store = TemplateStore(maxsize=2)
+    t1, t2, t3 = template("one"), template("two"), template("three")
+
+    _hydrate(engine, store, t1, t2)
+    _hydrate(engine, store, t1)  # t1 is now the most recent
+    _hydrate(engine, store, t3)  # evicts t2
+    assert len(store) == 2
+    template_queries.clear()
+
+    assert _hydrate(engine, store, t1, t3) == ["one", "three"]
+    assert template_queries == []
+    assert _hydrate(engine, store, t2) == ["two"]
+    assert len(template_queries) == 1
+
+
+def test_templates_notify_evicts_the_cached_entry(engine, template, monkeypatch):
+    store = TemplateStore()
+    monkeypatch.setattr(worker, "_TEMPLATES", store)
+    tid = template("before")
+    assert _hydrate(engine, store, tid) == ["before"]
+
+    db_url = engine.url.render_as_string(hide_password=False)
+    listener = worker._QueueListener(db_url, (worker.TEMPLATES_CHANNEL,))
+    try:
+        listener.wait(0)  # connect and LISTEN
+        # An edit that keeps updated_at (same timestamp) is only caught by the NOTIFY.
+        _edit(engine, tid, "after", touch=False)
+        with engine.begin() as conn:
+            conn.execute(
+                text("SELECT pg_notify(:channel, :id)"), {"channel": worker.TEMPLATES_CHANNEL, "id": str(tid)}
+            )
+        worker._handle_notifications(listener.wait(5))
+    finally:
+        listener.close()
+
+    assert len(store) == 0
+    assert _hydrate(engine, store, tid) == ["after"]
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+from twilio.rest import Client
+
+from app import twilio_whatsapp
+
+
+class _FakeTwilio(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+    requests: list[dict] = []
+
+    def do_POST(self) -> None:  # noqa: N802 (http.server hook name)
+        length = int(self.headers.get("Content-Length") or 0)
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        self.requests.append({"path": self.path, "form": form, "client_port": self.client_address[1]})
+        body = json.dumps({"sid": f"SM{len(self.requests):032d}", "status": "queued"}).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+@pytest.fixture()
+def fake_twilio(monkeypatch):
+    _FakeTwilio.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeTwilio)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setenv("TWILIO_ACCOUNT_SID", "AC" + "0" * 32)
+    monkeypatch.setenv("TWILIO_AUTH_TOKEN", "token")
+    monkeypatch.setenv("TWILIO_WHATSAPP_FROM", "whatsapp:+15550000000")
+    monkeypatch.setenv("TWILIO_API_BASE_URL", base_url)
+    twilio_whatsapp.set_client(None)
+    yield base_url
+    twilio_whatsapp.set_client(None)
+    server.shutdown()
+    server.server_close()
+
+
+def test_sends_reuse_one_pooled_connection(fake_twilio):
+    first = twilio_whatsapp.send_whatsapp_text(to="whatsapp:+447700900001", body="Hello")
+    twilio_whatsapp.send_whatsapp_text(to="whatsapp:+447700900002", body="Again")
+    twilio_whatsapp.send_whatsapp_template(
+        to="whatsapp:+447700900003", content_sid="HX123", variables={"1": "Ada"}
+    )
+
+    assert first.sid == "SM" + "1".zfill(32)
+    reqs = _FakeTwilio.requests
+    assert len(reqs) == 3
+    assert {r["path"] for r in reqs} == {f"/2010-04-01/Accounts/AC{'0' * 32}/Messages.json"}
+    # one keep-alive session for the process: every request on the same connection
+    assert len({r["client_port"] for r in reqs}) == 1
+    assert reqs[0]["form"] == {"From": "whatsapp:+15550000000", "To": "whatsapp:+447700900001", "Body": "Hello"}
+    assert reqs[2]["form"]["ContentSid"] == "HX123"
+    assert json.loads(reqs[2]["form"]["ContentVariables"]) == {"1": "Ada"}
+    assert "Body" not in reqs[2]["form"]
+
+
+def test_set_client_swaps_the_process_client(fake_twilio):
+    client = Client("AC" + "1" * 32, "other-token")
+    client.api.base_url = fake_twilio
+    twilio_whatsapp.set_client(client, from_="whatsapp:+15551111111")
+
+    twilio_whatsapp.send_whatsapp_text(to="whatsapp:+447700900001", body="Hi")
+
+    (req,) = _FakeTwilio.requests
+    assert req["path"] == f"/2010-04-01/Accounts/AC{'1' * 32}/Messages.json"
+    assert req["form"]["From"] == "whatsapp:+15551111111"
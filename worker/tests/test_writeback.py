@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from sqlalchemy import text
+
+from app import metrics
+from app.leases import reap_expired_leases
+from app.writeback import ResultBuffer, SendResult
+
+
+def _claim(engine, ids, owner: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "UPDATE outbound_messages SET status = 'sending', claimed_by = :owner, "
+                "lease_expires_at = now() + interval '1 minute' WHERE id = ANY(:ids)"
+            ),
+            {"ids": list(ids), "owner": owner},
+        )
+
+
+def _sent(engine, msg_id) -> SendResult:
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT customer_id, owner_user_id FROM outbound_messages WHERE id = :id"), {"id": msg_id}
+        ).one()
+    return SendResult(
+        msg_id=msg_id,
+        customer_id=row.customer_id,
+        owner_user_id=row.owner_user_id,
+        channel="whatsapp",
+        provider_message_id=f"SM-{msg_id}",
+        content="hi",
+    )
+
+
+def test_write_back_records_results_for_held_claims(engine, queue, statuses):
+    ids = queue(2)
+    _claim(engine, ids, "me:1")
+    flushed = []
+    buffer = ResultBuffer(engine, owner="me:1", on_flush=flushed.extend)
+    buffer.add(_sent(engine, ids[0]))
+    failed = _sent(engine, ids[1])
+    failed.provider_message_id = None
+    failed.error = RuntimeError("boom")
+    failed.status = "queued"
+    failed.retry_after_seconds = 30
+    buffer.add(failed)
+
+    assert buffer.flush() == 2
+
+    rows = statuses(ids)
+    assert (rows[ids[0]].status, rows[ids[0]].claimed_by) == ("sent", None)
+    assert (rows[ids[1]].status, rows[ids[1]].retry_count, rows[ids[1]].last_error) == ("queued", 1, "boom")
+    assert set(flushed) == set(ids)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM interactions")).scalar_one() == 1
+
+
+def test_late_write_back_does_not_overwrite_a_reaped_or_reclaimed_message(engine, queue, statuses):
+    reaped, reclaimed = queue(2)
+    _claim(engine, [reaped, reclaimed], "stalled:1")
+    # The stalled worker's lease lapses: the reaper requeues both...
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE outbound_messages SET lease_expires_at = now() - interval '1 second'"))
+    assert reap_expired_leases(engine, lease_seconds=60, max_retries=3) == 2
+    # ...and another worker claims one of them again.
+    _claim(engine, [reclaimed], "healthy:1")
+    before = statuses([reaped, reclaimed])
+    stale_before = metrics.WRITEBACK_STALE._values.get((), 0)
+
+    buffer = ResultBuffer(engine, owner="stalled:1")
+    buffer.add(_sent(engine, reaped))
+    buffer.add(_sent(engine, reclaimed))
+    buffer.flush()
+
+    after = statuses([reaped, reclaimed])
+    assert after == before
+    assert after[reclaimed].claimed_by == "healthy:1"
+    assert metrics.WRITEBACK_STALE._values.get((), 0) - stale_before == 2